@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+"""This script checks that importing the package stays within its time budget."""
+import subprocess
+import sys
+
+# Budget in seconds for `import soepy` on top of the start-up of the interpreter.
+IMPORT_TIME_BUDGET = 0.05
+
+NUM_REPETITIONS = 10
+
+
+def measure_import_time(statement):
+    """Return the minimum wall time of running the statement in a fresh interpreter."""
+    cmd = [
+        sys.executable,
+        "-c",
+        "import time; start = time.perf_counter(); "
+        f"{statement}; print(time.perf_counter() - start)",
+    ]
+    return min(float(subprocess.check_output(cmd)) for _ in range(NUM_REPETITIONS))
+
+
+if __name__ == "__main__":
+
+    import_time = measure_import_time("import soepy")
+
+    print(f" \n ... import soepy: {import_time:.4f}s (budget {IMPORT_TIME_BUDGET}s)")
+
+    if import_time > IMPORT_TIME_BUDGET:
+        sys.exit(1)
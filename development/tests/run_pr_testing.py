@@ -27,6 +27,10 @@ cmd = ""
 cmd += f"python run.py --request check --num {num_tests_regression}"
 subprocess.check_call(cmd, shell=True, cwd=SCRIPT_DIR + "/regression")
 
+print(" \n ... running import time benchmark")
+cmd = "python import_time.py"
+subprocess.check_call(cmd, shell=True, cwd=SCRIPT_DIR + "/../benchmarks")
+
 print(" \n ... running property tests")
 cmd = f"python run.py --request run --hours {num_hours_property}"
 subprocess.check_call(cmd, shell=True, cwd=SCRIPT_DIR + "/property")
@@ -1,15 +1,68 @@
-"""The module allows to run tests from inside the interpreter."""
-import os
+"""The module allows to run tests from inside the interpreter.
 
-import pytest
+Importing the package is cheap. The simulation and solution modules, and with them
+numba, pandas, and the compilation of the numba kernels, are only loaded once one of
+the functions below is called.
+"""
+import importlib
+import os
 
-import soepy.soepy_config
-from soepy.simulate.simulate_python import simulate
+import soepy.simulate
 from soepy.soepy_config import PACKAGE_DIR
 
+LAZY_SUBPACKAGES = [
+    "exogenous_processes",
+    "pre_processing",
+    "shared",
+    "solve",
+    "test",
+]
+
+# Classes which are exposed at the top level and the modules they are imported from
+LAZY_CLASSES = {
+    "Pipeline": "soepy.simulate.pipeline",
+    "Simulator": "soepy.simulate.simulator",
+}
+
+
+def __getattr__(name):
+    """Import the subpackages, the simulation session, and the pipeline on first
+    access."""
+    if name in LAZY_SUBPACKAGES:
+        return importlib.import_module(f"soepy.{name}")
+    if name in LAZY_CLASSES:
+        return getattr(importlib.import_module(LAZY_CLASSES[name]), name)
+    raise AttributeError(f"module 'soepy' has no attribute '{name}'")
+
+
+# The subpackage is imported above before the function is defined. Otherwise the first
+# import of one of its modules would rebind `soepy.simulate` to the subpackage.
+def simulate(*args, **kwargs):
+    """Create a data frame of individuals' simulated experiences.
+
+    See :func:`soepy.simulate.simulate_python.simulate` for the arguments.
+
+    """
+    from soepy.simulate.simulate_python import simulate
+
+    return simulate(*args, **kwargs)
+
+
+def warmup():
+    """Compile all numba kernels ahead of time.
+
+    See :func:`soepy.shared.warmup.warmup` for the returned report.
+
+    """
+    from soepy.shared.warmup import warmup
+
+    return warmup()
+
 
 def test():
     """The function allows to run the tests from inside the interpreter."""
+    import pytest
+
     current_directory = os.getcwd()
     os.chdir(PACKAGE_DIR)
     pytest.main()
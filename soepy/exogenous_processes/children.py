@@ -1,7 +1,8 @@
 """This module reads in information on probabilities regarding the exogenous
 process of childbirth."""
 import numpy as np
-import pandas as pd
+
+from soepy.exogenous_processes.exogenous_auxiliary import read_exogenous_frame
 
 
 def define_child_age_update_rule(model_spec, states):
@@ -25,13 +26,16 @@ def define_child_age_update_rule(model_spec, states):
     return child_age_update_rule
 
 
-def gen_prob_child_vector(model_spec):
+def gen_prob_child_vector(model_spec, child_info=None):
     """Generates a vector with length `num_periods` which contains
-    the probability to get a child in the corresponding period."""
+    the probability to get a child in the corresponding period. The data frame
+    `child_info` is read from the file in the model specification if not given."""
 
     # Read data frame with information on probability to get a child
     # in every period
-    exog_child_info_df = pd.read_pickle(model_spec.child_info_file_name)
+    exog_child_info_df = read_exogenous_frame(
+        getattr(model_spec, "child_info_file_name", None), child_info
+    )
 
     exog_child_info_df = exog_child_info_df.iloc[
         exog_child_info_df.index.get_level_values("period") < model_spec.num_periods
@@ -54,12 +58,14 @@ def gen_prob_child_vector(model_spec):
     return prob_child
 
 
-def gen_prob_child_init_age_vector(model_spec):
+def gen_prob_child_init_age_vector(model_spec, child_age_shares=None):
     """Generates a list of lists containing the shares of individuals with
     kids aged -1 (no kids), 0, 1, 2, 3, and 4 in the model's first period.
     Shares differ by the level of education of the individuals."""
 
-    child_age_shares = pd.read_pickle(model_spec.child_age_shares_file_name)
+    child_age_shares = read_exogenous_frame(
+        getattr(model_spec, "child_age_shares_file_name", None), child_age_shares
+    )
 
     prob_child_age = []
     for educ_level in range(model_spec.num_educ_levels):
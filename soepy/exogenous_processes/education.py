@@ -1,13 +1,15 @@
 """This module reads in information on probabilities regarding the initial conditions
 on years of education"""
-import pandas as pd
+from soepy.exogenous_processes.exogenous_auxiliary import read_exogenous_frame
 
 
-def gen_prob_educ_level_vector(model_spec):
+def gen_prob_educ_level_vector(model_spec, educ_shares=None):
     """Generates a vector of probabilities reflecting the fractions of individuals
     with low, middle, and high levels of education in the SOEP data."""
 
-    prob_educ_level = pd.read_pickle(model_spec.educ_shares_file_name)
+    prob_educ_level = read_exogenous_frame(
+        getattr(model_spec, "educ_shares_file_name", None), educ_shares
+    )
 
     prob_educ_level = list(prob_educ_level["educ_shares"])
 
@@ -0,0 +1,26 @@
+"""This module provides auxiliary functions for the exogenous processes."""
+import pandas as pd
+
+
+def read_exogenous_frame(file_name, frame=None):
+    """Read the data frame of an exogenous process from a pickle file unless it is
+    given.
+
+    Parameters
+    ----------
+    file_name : str or None
+        Name of the file in the model specification. It is not required if `frame` is
+        given.
+    frame : pd.DataFrame, optional
+        Data frame of the exogenous process.
+
+    """
+    if frame is None:
+        if file_name is None:
+            raise ValueError(
+                "The data frame of an exogenous process is neither given nor is its "
+                "file in the model specification."
+            )
+        frame = pd.read_pickle(file_name)
+
+    return frame
@@ -0,0 +1,171 @@
+"""This module collects the probabilities of all exogenous processes of the model.
+
+The exogenous processes are the distributions of the initial conditions and the
+arrival of children and partners. Their probabilities are usually read from the data
+frames referenced in the model specification. :class:`ExogenousModel` holds the
+resulting arrays, such that they are read and validated only once. It can also be
+built from data frames in memory and saved to or loaded from a single binary file.
+"""
+import numpy as np
+
+from soepy.exogenous_processes.children import gen_prob_child_init_age_vector
+from soepy.exogenous_processes.children import gen_prob_child_vector
+from soepy.exogenous_processes.education import gen_prob_educ_level_vector
+from soepy.exogenous_processes.experience import gen_prob_init_exp_vector
+from soepy.exogenous_processes.partner import gen_prob_partner
+from soepy.exogenous_processes.partner import gen_prob_partner_present_vector
+
+# Data frames of the exogenous processes and the keys of their files in the model
+# specification
+EXOGENOUS_FRAMES = {
+    "educ_shares": "educ_shares_file_name",
+    "child_age_shares": "child_age_shares_file_name",
+    "partner_shares": "partner_shares_file_name",
+    "exp_shares_ft": "ft_exp_shares_file_name",
+    "exp_shares_pt": "pt_exp_shares_file_name",
+    "child_info": "child_info_file_name",
+    "partner_arrival_info": "partner_arrival_info_file_name",
+    "partner_separation_info": "partner_separation_info_file_name",
+}
+
+
+class ExogenousModel:
+    """Probabilities of the exogenous processes.
+
+    The arrays are passed to the solution and the simulation in the order of
+    :attr:`names`.
+
+    Parameters
+    ----------
+    model_spec : namedtuple
+        Model specification which determines the expected shapes.
+    prob_educ_level : np.ndarray
+        Array with shape (num_educ_levels,) containing the shares of the education
+        levels.
+    prob_child_age : np.ndarray
+        Array with shape (num_educ_levels, child_age_init_max + 2) containing the
+        shares of the ages of the youngest child at entry, starting with no child.
+    prob_partner_present : np.ndarray
+        Array with shape (num_educ_levels,) containing the shares with a partner at
+        entry.
+    prob_exp_ft, prob_exp_pt : np.ndarray
+        Arrays with shape (num_educ_levels, init_exp_max + 1) containing the shares of
+        the years of full-time and part-time experience at entry.
+    prob_child : np.ndarray
+        Array with shape (num_periods, num_educ_levels) containing the probabilities
+        that a child arrives.
+    prob_partner : np.ndarray
+        Array with shape (num_periods, num_educ_levels, 2, 2) containing the
+        transition probabilities of the partner status.
+
+    Raises
+    ------
+    ValueError
+        If an array does not have the shape implied by the model specification.
+
+    """
+
+    names = (
+        "prob_educ_level",
+        "prob_child_age",
+        "prob_partner_present",
+        "prob_exp_ft",
+        "prob_exp_pt",
+        "prob_child",
+        "prob_partner",
+    )
+
+    def __init__(
+        self,
+        model_spec,
+        prob_educ_level,
+        prob_child_age,
+        prob_partner_present,
+        prob_exp_ft,
+        prob_exp_pt,
+        prob_child,
+        prob_partner,
+    ):
+        self.prob_educ_level = np.asarray(prob_educ_level, dtype=float)
+        self.prob_child_age = np.asarray(prob_child_age, dtype=float)
+        self.prob_partner_present = np.asarray(prob_partner_present, dtype=float)
+        self.prob_exp_ft = np.asarray(prob_exp_ft, dtype=float)
+        self.prob_exp_pt = np.asarray(prob_exp_pt, dtype=float)
+        self.prob_child = np.asarray(prob_child, dtype=float)
+        self.prob_partner = np.asarray(prob_partner, dtype=float)
+
+        num_educ_levels = model_spec.num_educ_levels
+        shapes = {
+            "prob_educ_level": (num_educ_levels,),
+            "prob_child_age": (num_educ_levels, model_spec.child_age_init_max + 2),
+            "prob_partner_present": (num_educ_levels,),
+            "prob_exp_ft": (num_educ_levels, model_spec.init_exp_max + 1),
+            "prob_exp_pt": (num_educ_levels, model_spec.init_exp_max + 1),
+            "prob_child": (model_spec.num_periods, num_educ_levels),
+            "prob_partner": (model_spec.num_periods, num_educ_levels, 2, 2),
+        }
+        invalid = [
+            f"{name} has shape {getattr(self, name).shape} instead of {shape}"
+            for name, shape in shapes.items()
+            if getattr(self, name).shape != shape
+        ]
+        if invalid:
+            raise ValueError(
+                f"The exogenous processes do not match the model specification: "
+                f"{'; '.join(invalid)}."
+            )
+
+    @classmethod
+    def from_frames(cls, model_spec, **frames):
+        """Build the exogenous processes from data frames.
+
+        Parameters
+        ----------
+        model_spec : namedtuple
+            Model specification.
+        **frames : pd.DataFrame
+            Data frames of the exogenous processes with the names in
+            :data:`EXOGENOUS_FRAMES`. The missing data frames are read from the files
+            in the model specification.
+
+        """
+        unknown = sorted(set(frames) - set(EXOGENOUS_FRAMES))
+        if unknown:
+            raise ValueError(f"The exogenous processes {unknown} do not exist.")
+
+        return cls(
+            model_spec,
+            gen_prob_educ_level_vector(model_spec, frames.get("educ_shares")),
+            gen_prob_child_init_age_vector(model_spec, frames.get("child_age_shares")),
+            gen_prob_partner_present_vector(model_spec, frames.get("partner_shares")),
+            gen_prob_init_exp_vector(
+                model_spec,
+                getattr(model_spec, EXOGENOUS_FRAMES["exp_shares_ft"], None),
+                frames.get("exp_shares_ft"),
+            ),
+            gen_prob_init_exp_vector(
+                model_spec,
+                getattr(model_spec, EXOGENOUS_FRAMES["exp_shares_pt"], None),
+                frames.get("exp_shares_pt"),
+            ),
+            gen_prob_child_vector(model_spec, frames.get("child_info")),
+            gen_prob_partner(
+                model_spec,
+                frames.get("partner_arrival_info"),
+                frames.get("partner_separation_info"),
+            ),
+        )
+
+    @classmethod
+    def load(cls, path, model_spec):
+        """Load the exogenous processes from a file written by :meth:`save`."""
+        with np.load(path) as bundle:
+            return cls(model_spec, *[bundle[name] for name in cls.names])
+
+    def save(self, path):
+        """Save the exogenous processes to a single binary file in the npz format."""
+        np.savez(path, **dict(zip(self.names, self.to_tuple())))
+
+    def to_tuple(self):
+        """Return the arrays in the order of :attr:`names`."""
+        return tuple(getattr(self, name) for name in self.names)
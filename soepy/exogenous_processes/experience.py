@@ -1,14 +1,14 @@
 """This module reads in information on probabilities to have accumulated experience
 in part-time and/or full-time work before the model entry/initial age."""
-import pandas as pd
+from soepy.exogenous_processes.exogenous_auxiliary import read_exogenous_frame
 
 
-def gen_prob_init_exp_vector(model_spec, model_spec_exp_file_key):
+def gen_prob_init_exp_vector(model_spec, model_spec_exp_file_key, exp_shares=None):
     """Generates a list of lists containing the shares of individuals with
     ft/pt experience of 0, 1, 2, 3, and 4 years in the model's first period.
     Shares differ by the level of education of the individuals."""
 
-    exp_shares = pd.read_pickle(model_spec_exp_file_key)
+    exp_shares = read_exogenous_frame(model_spec_exp_file_key, exp_shares)
 
     init_exp = []
     for educ_level in range(model_spec.num_educ_levels):
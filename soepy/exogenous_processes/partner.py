@@ -1,17 +1,21 @@
 """This module reads in information on probabilities regarding the exogenous
 process of marriage."""
 import numpy as np
-import pandas as pd
 
+from soepy.exogenous_processes.exogenous_auxiliary import read_exogenous_frame
 
-def gen_prob_partner(model_spec):
+
+def gen_prob_partner(
+    model_spec, partner_arrival_info=None, partner_separation_info=None
+):
     """Generates a vector with length `num_periods` which contains
     the probability to loose ones partner in the corresponding period."""
 
     # Read data frame with information on probability to loose ones partner
     # in every period
-    exog_partner_separation_info_df = pd.read_pickle(
-        model_spec.partner_separation_info_file_name
+    exog_partner_separation_info_df = read_exogenous_frame(
+        getattr(model_spec, "partner_separation_info_file_name", None),
+        partner_separation_info,
     )
 
     exog_partner_separation_info_df = exog_partner_separation_info_df.loc[
@@ -20,8 +24,9 @@ def gen_prob_partner(model_spec):
 
     # Read data frame with information on probability to get a partner
     # in every period
-    exog_partner_arrival_info_df = pd.read_pickle(
-        model_spec.partner_arrival_info_file_name
+    exog_partner_arrival_info_df = read_exogenous_frame(
+        getattr(model_spec, "partner_arrival_info_file_name", None),
+        partner_arrival_info,
     )
 
     exog_partner_arrival_info_df = exog_partner_arrival_info_df.loc[
@@ -41,10 +46,12 @@ def gen_prob_partner(model_spec):
     return prob_mat
 
 
-def gen_prob_partner_present_vector(model_spec):
+def gen_prob_partner_present_vector(model_spec, partner_shares=None):
     """Generates a list containing the shares of individuals with
     a partner present in the household in the model's first period.
     Shares differ by the level of education of the individuals."""
 
-    partner_shares = pd.read_pickle(model_spec.partner_shares_file_name)
+    partner_shares = read_exogenous_frame(
+        getattr(model_spec, "partner_shares_file_name", None), partner_shares
+    )
     return partner_shares.to_numpy().flatten()
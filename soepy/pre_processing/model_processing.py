@@ -1,5 +1,6 @@
 import collections
-import copy
+import functools
+import types
 
 import numpy as np
 import pandas as pd
@@ -10,6 +11,12 @@ from soepy.pre_processing.tax_and_transfers_params import process_elterngeld
 from soepy.pre_processing.tax_and_transfers_params import process_ssc
 from soepy.pre_processing.tax_and_transfers_params import process_tax_system
 
+# The C implementation of the yaml loader is used if libyaml is available
+YAML_LOADER = getattr(yaml, "CLoader", yaml.Loader)
+
+# Number of compiled model specifications read from files which are cached
+MODEL_SPEC_CACHE_SIZE = 16
+
 
 def read_model_params_init(model_params_init_file_name):
     """Reads in specification of model parameters
@@ -148,16 +155,39 @@ def read_model_spec_init(model_spec_init_dict, model_params):
     """Reads in the model specification from yaml file.
     This initialisation component contains only information
     that does not change during estimation. Inputs are made
-    available as named tuple."""
+    available as named tuple.
+
+    Specifications read from a file are compiled once per content of the file and
+    number of types. Repeated reads of the same file return the same object.
+
+    """
+    num_types = get_num_types(model_params)
 
     # Import yaml initialization file as dictionary init_dict
     if isinstance(model_spec_init_dict, str):
-        with open(model_spec_init_dict) as y:
-            model_spec_init = yaml.load(y, Loader=yaml.Loader)
+        with open(model_spec_init_dict, "rb") as y:
+            model_spec = _compile_model_spec_file(y.read(), num_types)
     else:
-        model_spec_init = copy.deepcopy(model_spec_init_dict)
+        model_spec = compile_model_spec(model_spec_init_dict, num_types)
+
+    return model_spec
+
+
+def compile_model_spec(model_spec_init_dict, num_types):
+    """Compile the nested model specification to an immutable specification.
 
-    model_spec_dict_expand = expand_model_spec_dict(model_spec_init, model_params)
+    The groups of the nested dictionary are copied before they are processed, such
+    that `model_spec_init_dict` is left unchanged without copying its values. In the
+    returned namedtuple, lists are converted to tuples, dictionaries to read-only
+    mappings, and arrays to read-only copies. It is compared and hashed by its values
+    and can serve as a key of caches.
+
+    """
+    model_spec_init = {
+        group: dict(values) for group, values in model_spec_init_dict.items()
+    }
+
+    model_spec_dict_expand = expand_model_spec_dict(model_spec_init, num_types)
 
     model_spec_dict_flat = flatten_model_spec_dict(model_spec_dict_expand)
 
@@ -166,16 +196,28 @@ def read_model_spec_init(model_spec_init_dict, model_params):
     return model_spec
 
 
-def expand_model_spec_dict(model_spec_init_dict, model_params_df):
-    # Gather education years in list object
-    num_educ_levels = len(model_spec_init_dict["EDUC"]["educ_years"])
+@functools.lru_cache(maxsize=MODEL_SPEC_CACHE_SIZE)
+def _compile_model_spec_file(content, num_types):
+    """Compile the model specification from the content of a yaml file."""
+    model_spec_init = yaml.load(content, Loader=YAML_LOADER)
+
+    return compile_model_spec(model_spec_init, num_types)
+
 
-    # Determine number of types
+def get_num_types(model_params_df):
+    """Determine the number of types from the parameters."""
     try:
         num_types = len(model_params_df.loc["shares"].to_numpy()) + 1
     except KeyError:
         num_types = 1
 
+    return num_types
+
+
+def expand_model_spec_dict(model_spec_init_dict, num_types):
+    # Gather education years in list object
+    num_educ_levels = len(model_spec_init_dict["EDUC"]["educ_years"])
+
     # Append derived attributes to init_dict
     model_spec_init_dict["DERIVED_ATTR"] = {
         "num_educ_levels": num_educ_levels,
@@ -222,6 +264,75 @@ def flatten_model_spec_dict(model_spec_dict):
 def dict_to_namedtuple_spec(dictionary):
     """Coverts non-nested dictionary to namedtuple"""
 
-    return collections.namedtuple("model_specification", dictionary.keys())(
-        **dictionary
-    )
+    spec_type = _get_model_spec_type(tuple(dictionary))
+
+    return spec_type(**{key: _freeze(value) for key, value in dictionary.items()})
+
+
+class _FrozenModelSpec:
+    """Equality and hashing of model specifications by their values."""
+
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return isinstance(other, _FrozenModelSpec) and (
+            self._fields == other._fields and get_hash_key(self) == get_hash_key(other)
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self._fields, get_hash_key(self)))
+
+    def __reduce__(self):
+        return dict_to_namedtuple_spec, (self._asdict(),)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_model_spec_type(fields):
+    """Create the class of model specifications with the given fields once."""
+    base = collections.namedtuple("model_specification", fields)
+
+    return type("model_specification", (_FrozenModelSpec, base), {"__slots__": ()})
+
+
+def _freeze(value):
+    """Convert a value of the model specification to an immutable value."""
+    if isinstance(value, (list, tuple)):
+        value = tuple(_freeze(item) for item in value)
+    elif isinstance(value, dict):
+        value = types.MappingProxyType(
+            {key: _freeze(item) for key, item in value.items()}
+        )
+    elif isinstance(value, np.ndarray):
+        value = value.copy()
+        value.flags.writeable = False
+
+    return value
+
+
+def get_hash_key(value):
+    """Convert a value of the model specification or the parameters to a hashable
+    key.
+
+    Sequences and mappings are converted item by item and numpy scalars to Python
+    scalars, such that equal values have equal keys. Float arrays are converted like
+    sequences of floats, as the parameters hold the same values as lists or arrays
+    depending on how they were read. Other arrays are converted to their bytes.
+
+    """
+    if isinstance(value, (list, tuple)):
+        key = tuple(get_hash_key(item) for item in value)
+    elif isinstance(value, (dict, types.MappingProxyType)):
+        key = tuple(sorted((key, get_hash_key(item)) for key, item in value.items()))
+    elif isinstance(value, np.ndarray) and value.dtype.kind == "f":
+        key = get_hash_key(value.astype(np.float64).tolist())
+    elif isinstance(value, np.ndarray):
+        key = (value.dtype.str, value.shape, value.tobytes())
+    elif isinstance(value, np.generic):
+        key = value.item()
+    else:
+        key = value
+
+    return key
@@ -0,0 +1,159 @@
+"""This module maps flat parameter vectors to the parameters of the model.
+
+Optimizers work with flat vectors of floats. :func:`read_model_params_init` parses a
+data frame of parameters group by group, which costs more than the conversion itself.
+:class:`ParamsVector` inspects the data frame of parameters once and records the
+positions of all entries in the vector. Each vector is then converted by filling
+preallocated arrays, without pandas.
+"""
+import collections
+
+import numpy as np
+
+from soepy.pre_processing.model_processing import read_model_params_init
+
+EDUC_LEVELS = ["low", "middle", "high"]
+
+
+class ParamsVector:
+    """Conversion of flat parameter vectors to the parameters of the model.
+
+    The entries of a vector are the values of the parameters in the order of the rows
+    of the data frame of parameters the conversion is set up with. The parameters
+    returned by :meth:`to_model_params` are identical to the ones returned by
+    :func:`read_model_params_init` for a data frame with these values. They share the
+    preallocated arrays, which are overwritten by the next conversion.
+
+    Parameters
+    ----------
+    model_params_init_file_name : str or pd.DataFrame
+        Parameters which determine the names and the order of the entries.
+
+    """
+
+    def __init__(self, model_params_init_file_name):
+        model_params_df, model_params = read_model_params_init(
+            model_params_init_file_name
+        )
+        self.index = model_params_df.index
+        self.num_types = len(model_params.type_shares)
+
+        positions = {name: i for i, name in enumerate(self.index)}
+
+        # Parameters which are copied from the vector to an array
+        self._arrays = {}
+        for category, param in [
+            ("const_wage_eq", "gamma_0"),
+            ("exp_returns_f", "gamma_f"),
+            ("exp_returns_p", "gamma_p"),
+            ("exp_returns_p_bias", "gamma_p_bias"),
+        ]:
+            self._arrays[param] = np.array(
+                [positions[category, f"{param}_{educ}"] for educ in EDUC_LEVELS]
+            )
+        for i in ["no", "yes"]:
+            for j in ["f", "p"]:
+                self._arrays[f"{i}_kids_{j}"] = np.array(
+                    [
+                        positions["disutil_work", f"{i}_kids_{j}_educ_{educ}"]
+                        for educ in EDUC_LEVELS
+                    ]
+                )
+        if self.num_types > 1:
+            for i in ["p", "f"]:
+                self._arrays[f"theta_{i}"] = np.array(
+                    [
+                        position
+                        for (category, name), position in positions.items()
+                        if category == "hetrg_unobs" and f"theta_{i}" in name
+                    ]
+                )
+
+        # Parameters which are copied from the vector to a scalar
+        self._scalars = {
+            name: position
+            for (category, name), position in positions.items()
+            if category == "disutil_work" and "child" in name
+        }
+
+        self._shocks_sd = np.array(
+            [
+                positions["sd_wage_shock", "sigma_1"],
+                positions["sd_wage_shock", "sigma_2"],
+            ]
+        )
+        self._type_shares = np.array(
+            [
+                position
+                for (category, name), position in positions.items()
+                if category == "shares" and "share" in name
+            ],
+            dtype=np.int64,
+        )
+
+        self._buffers = {
+            param: np.empty(indexes.shape[0]) for param, indexes in self._arrays.items()
+        }
+        self._buffers["shocks_cov"] = np.empty(2)
+        self._buffers["type_shares"] = np.empty(self.num_types)
+
+        self._model_params_type = collections.namedtuple(
+            "model_parameters", model_params._fields
+        )
+
+    def to_vector(self, model_params_init_file_name):
+        """Extract the flat vector from a data frame of parameters.
+
+        Parameters
+        ----------
+        model_params_init_file_name : str or pd.DataFrame
+            Parameters with the same rows as the data frame the conversion is set up
+            with, in any order.
+
+        Returns
+        -------
+        x : np.ndarray
+            Values of the parameters.
+
+        """
+        model_params_df, _ = read_model_params_init(model_params_init_file_name)
+
+        return model_params_df.loc[self.index, "value"].to_numpy(dtype=float)
+
+    def to_model_params(self, x):
+        """Convert a flat vector to the parameters of the model.
+
+        Parameters
+        ----------
+        x : np.ndarray
+            Values of the parameters in the order of :attr:`index`.
+
+        Returns
+        -------
+        model_params : namedtuple
+            Parameters of the model as returned by :func:`read_model_params_init`.
+
+        """
+        x = np.asarray(x, dtype=float)
+        if x.shape != (self.index.shape[0],):
+            raise ValueError(
+                f"The parameter vector has shape {x.shape}, but {self.index.shape[0]} "
+                "parameters are expected."
+            )
+
+        values = {}
+        for param, indexes in self._arrays.items():
+            values[param] = np.take(x, indexes, out=self._buffers[param])
+        for name, position in self._scalars.items():
+            values[name] = x[position]
+
+        shocks_cov = np.take(x, self._shocks_sd, out=self._buffers["shocks_cov"])
+        values["shocks_cov"] = np.square(shocks_cov, out=shocks_cov)
+
+        # The share of the baseline type is one minus the sum of the remaining shares
+        type_shares = self._buffers["type_shares"]
+        np.take(x, self._type_shares, out=type_shares[1:])
+        type_shares[0] = 1 - type_shares[1:].sum()
+        values["type_shares"] = type_shares
+
+        return self._model_params_type(**values)
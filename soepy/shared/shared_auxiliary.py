@@ -1,3 +1,6 @@
+import functools
+import threading
+
 import numba
 import numpy as np
 
@@ -5,25 +8,67 @@ from soepy.shared.shared_constants import INVALID_FLOAT
 from soepy.shared.shared_constants import NUM_CHOICES
 from soepy.shared.tax_and_transfers import calculate_net_income
 
+# Number of combinations of seeds and dimensions for which standard normal draws are
+# cached
+STANDARD_NORMALS_CACHE_SIZE = 8
+
+# The workqueue threading layer of numba does not support parallel kernels launched
+# concurrently from several threads. All launches of the parallel kernels of the
+# package hold this lock.
+KERNEL_LOCK = threading.Lock()
+
 
 def draw_disturbances(seed, num_periods, num_draws, model_params):
     """Creates desired number of draws of a multivariate standard normal
     distribution.
 
+    The draws are identical to :func:`np.random.multivariate_normal` with a diagonal
+    covariance matrix after seeding the global generator with `seed`. The underlying
+    standard normal draws are cached, such that repeated solutions only rescale them
+    and use common random numbers. The global generator is left unchanged.
+
     """
-    np.random.seed(seed)
+    standard_normals = draw_standard_normals(seed, num_periods, num_draws)
+
+    return scale_standard_normals(standard_normals, model_params.shocks_cov)
 
-    # Input parameters of the distribution
-    mean = [0, 0]
-    shocks_cov_matrix = np.zeros((2, 2), float)
-    np.fill_diagonal(shocks_cov_matrix, model_params.shocks_cov)
 
-    # Create draws from the standard normal distribution
-    draws = np.random.multivariate_normal(
-        mean, shocks_cov_matrix, (num_periods, num_draws)
+@functools.lru_cache(maxsize=STANDARD_NORMALS_CACHE_SIZE)
+def draw_standard_normals(seed, num_periods, num_draws):
+    """Draw the standard normal draws which underlie :func:`draw_disturbances`.
+
+    The draws do not depend on the parameters. They are drawn once per seed and
+    dimensions from a generator with the same stream as the seeded global generator,
+    and can be rescaled with :func:`scale_standard_normals` for any variances of the
+    shocks. The cached array is read-only.
+
+    """
+    standard_normals = np.random.RandomState(seed).standard_normal(
+        (num_periods, num_draws, 2)
     )
+    standard_normals.setflags(write=False)
+
+    return standard_normals
+
 
-    return draws
+def scale_standard_normals(standard_normals, shocks_cov):
+    """Transform standard normal draws to draws of the shocks.
+
+    The transformation is the one applied by :func:`np.random.multivariate_normal`,
+    such that the draws are identical up to the last bit.
+
+    """
+    draws = np.dot(standard_normals.reshape(-1, 2), get_shocks_transform(shocks_cov))
+    draws += np.zeros(2)
+
+    return draws.reshape(standard_normals.shape)
+
+
+def get_shocks_transform(shocks_cov):
+    """Matrix which maps standard normal draws to draws of the shocks."""
+    _, singular_values, vectors = np.linalg.svd(np.diag(shocks_cov))
+
+    return np.sqrt(singular_values)[:, None] * vectors
 
 
 def calculate_utility_components(
@@ -59,6 +104,27 @@ def calculate_utility_components(
         Array of dimension (num_states, num_choices) containing the utility
         contribution of non-pecuniary factors.
 
+    """
+    log_wage_systematic = calculate_log_wage_systematic_process(
+        model_params, model_spec, states, is_expected
+    )
+
+    non_consumption_utility = calculate_non_consumption_utility(
+        model_params, model_spec, states, covariates
+    )
+
+    return log_wage_systematic, non_consumption_utility
+
+
+def calculate_log_wage_systematic_process(
+    model_params, model_spec, states, is_expected
+):
+    """Calculate systematic wages for the human capital accumulation process that
+    agents expect or that the market generates.
+
+    The non-consumption utilities do not depend on the process. Only the systematic
+    wages differ between the solution and the simulation of the model.
+
     """
     if is_expected:
         # Calculate biased part-time expectation by using ratio from expected data and structural paramteters
@@ -67,7 +133,8 @@ def calculate_utility_components(
         ) * model_params.gamma_p
     else:
         gamma_p = model_params.gamma_p
-    log_wage_systematic = calculate_log_wage_systematic(
+
+    return calculate_log_wage_systematic(
         gamma_0=model_params.gamma_0,
         gamma_p=gamma_p,
         gamma_f=model_params.gamma_f,
@@ -75,12 +142,6 @@ def calculate_utility_components(
         states=states,
     )
 
-    non_consumption_utility = calculate_non_consumption_utility(
-        model_params, model_spec, states, covariates
-    )
-
-    return log_wage_systematic, non_consumption_utility
-
 
 def calculate_log_wage_systematic(gamma_0, gamma_f, gamma_p, model_spec, states):
     """Calculate systematic wages, i.e., wages net of shock, for all states."""
@@ -188,7 +249,7 @@ def calculate_non_consumption_utility(model_params, model_spec, states, covariat
     return non_consumption_utility
 
 
-@numba.jit(nopython=True)
+@numba.jit(nopython=True, cache=True)
 def calculate_non_employment_consumption_resources(
     deductions_spec,
     income_tax_spec,
@@ -218,7 +279,7 @@ def calculate_non_employment_consumption_resources(
     return non_employment_consumption_resources
 
 
-@numba.jit(nopython=True)
+@numba.jit(nopython=True, cache=True)
 def calculate_employment_consumption_resources(
     deductions_spec,
     income_tax_spec,
@@ -36,7 +36,28 @@ DATA_LABLES_SIM = [
     "Male_Wages",
 ]
 
+# Compact integer data types of the states and the choice. The identifiers keep 64
+# bits, as the offsets of replications and user-supplied populations exceed the range
+# of 32 bits. The remaining columns of the simulated data are floats.
+DATA_FORMATS_SIM_COMPACT = {
+    "Identifier": np.int64,
+    "Period": np.int8,
+    "Education_Level": np.int8,
+    "Lagged_Choice": np.int8,
+    "Experience_Part_Time": np.int16,
+    "Experience_Full_Time": np.int16,
+    "Type": np.int8,
+    "Age_Youngest_Child": np.int8,
+    "Partner_Indicator": np.int8,
+    "Choice": np.int8,
+}
+
 DATA_FORMATS_SIM = {
-    key: (np.int if key in DATA_LABLES_SIM[:10] else np.float)
-    for key in DATA_LABLES_SIM
+    key: DATA_FORMATS_SIM_COMPACT.get(key, np.float64) for key in DATA_LABLES_SIM
 }
+
+# Structured data type of the simulated data including the observed wage.
+DATA_DTYPE_SIM = np.dtype(
+    [(key, DATA_FORMATS_SIM[key]) for key in DATA_LABLES_SIM]
+    + [("Wage_Observed", np.float64)]
+)
@@ -0,0 +1,230 @@
+"""This module compiles the numba kernels of the package ahead of time.
+
+All kernels are decorated with ``cache=True`` so that their machine code is written
+to disk after the first compilation. Subsequent processes load the kernels from the
+cache instead of compiling them again. The location of the cache can be changed via
+the ``NUMBA_CACHE_DIR`` environment variable, e.g. to share it across a worker pool.
+"""
+import collections
+import time
+
+import numpy as np
+
+from soepy.exogenous_processes.children import define_child_age_update_rule
+from soepy.pre_processing.tax_and_transfers_params import create_tax_parameters
+from soepy.shared.shared_auxiliary import calculate_employment_consumption_resources
+from soepy.shared.shared_auxiliary import calculate_non_employment_consumption_resources
+from soepy.shared.shared_auxiliary import KERNEL_LOCK
+from soepy.shared.shared_constants import DATA_DTYPE_SIM
+from soepy.shared.shared_constants import HOURS
+from soepy.shared.tax_and_transfers import calculate_net_income
+from soepy.simulate.initial_states import create_alias_table
+from soepy.simulate.random_draws import philox_uniforms
+from soepy.simulate.simulate_distribution import _calculate_choice_probabilities
+from soepy.simulate.simulate_kernel import _simulate_period
+from soepy.solve.create_state_space import create_child_indexes
+from soepy.solve.create_state_space import pyth_create_state_space
+from soepy.solve.emaxs import construct_emax
+
+
+def warmup():
+    """Compile all numba kernels for the signatures used by the package.
+
+    The kernels are called once on tiny inputs that have the same types and memory
+    layouts as the arrays passed during a regular solution and simulation run. The
+    function is meant to be called before a worker starts to take on jobs.
+
+    Returns
+    -------
+    report : dict
+        Dictionary mapping the name of each kernel to the seconds it took to compile
+        it or to load it from the on-disk cache.
+
+    """
+    report = {}
+    for name, func in _WARMUP_STEPS:
+        start = time.perf_counter()
+        func()
+        report[name] = time.perf_counter() - start
+
+    return report
+
+
+def _warmup_state_space():
+    return pyth_create_state_space(_tiny_model_spec())
+
+
+def _warmup_child_indexes():
+    model_spec = _tiny_model_spec()
+    states, indexer = pyth_create_state_space(model_spec)
+    child_age_update_rule = define_child_age_update_rule(model_spec, states)
+
+    return create_child_indexes(states, indexer, model_spec, child_age_update_rule)
+
+
+def _warmup_net_income():
+    tax_params, ssc_deductions = _tiny_tax_inputs()
+
+    return calculate_net_income(tax_params, ssc_deductions, 100.0, 100.0, True)
+
+
+def _warmup_non_employment_consumption_resources():
+    tax_params, ssc_deductions = _tiny_tax_inputs()
+    covariates = np.ones((2, 4))
+
+    return calculate_non_employment_consumption_resources(
+        ssc_deductions, tax_params, covariates[:, 1], np.ones((2, 3)), True
+    )
+
+
+def _warmup_employment_consumption_resources():
+    tax_params, ssc_deductions = _tiny_tax_inputs()
+    covariates = np.ones((2, 4))
+
+    return calculate_employment_consumption_resources(
+        ssc_deductions, tax_params, np.ones((2, 2)), covariates[:, 1], True
+    )
+
+
+def _warmup_construct_emax():
+    # The signature of the generalized ufunc is compiled, or loaded from the cache,
+    # when its module is imported. The first call starts up the threading layer.
+    tax_params, ssc_deductions = _tiny_tax_inputs()
+
+    with KERNEL_LOCK:
+        return construct_emax(
+            0.95,
+            np.zeros(2),
+            np.ones((2, 3)),
+            np.zeros((2, 2)),
+            np.zeros((2, 3, 2, 2)),
+            np.zeros(2),
+            np.full((2, 2), 0.5),
+            HOURS,
+            -0.5,
+            np.ones(2),
+            ssc_deductions,
+            tax_params,
+            np.zeros((3, 2)),
+            np.zeros(2, dtype=np.int64),
+            np.ones(2),
+            np.zeros(2),
+            np.ones(2),
+            True,
+            np.zeros(4),
+        )
+
+
+def _warmup_philox_uniforms():
+    return philox_uniforms(np.uint64(0), np.arange(2), 0, 0)
+
+
+def _warmup_alias_table():
+    return create_alias_table(np.full(2, 0.5))
+
+
+def _warmup_simulate_period():
+    tax_params, ssc_deductions = _tiny_tax_inputs()
+    model_spec = _tiny_model_spec()
+    states, indexer = pyth_create_state_space(model_spec)
+    child_age_update_rule = define_child_age_update_rule(model_spec, states)
+    child_state_indexes = create_child_indexes(
+        states, indexer, model_spec, child_age_update_rule
+    )
+    num_states = states.shape[0]
+
+    with KERNEL_LOCK:
+        return _simulate_period(
+            0,
+            model_spec.num_periods,
+            np.arange(2),
+            np.zeros(2, dtype=np.int64),
+            np.zeros((2, 2)),
+            np.zeros(2, dtype=np.int64),
+            np.zeros(2, dtype=np.int64),
+            states,
+            child_state_indexes,
+            np.zeros((num_states, 4)),
+            np.ones((num_states, 4)),
+            np.zeros(num_states),
+            np.ones((num_states, 3)),
+            np.ones(num_states),
+            HOURS,
+            ssc_deductions,
+            tax_params,
+            True,
+            _read_only(np.zeros((3, 2))),
+            -0.5,
+            0.95,
+            tuple(
+                np.empty(2, dtype=DATA_DTYPE_SIM[label])
+                for label in DATA_DTYPE_SIM.names
+            ),
+            np.ones(len(DATA_DTYPE_SIM.names), dtype=np.bool_),
+            np.empty((2, 15)),
+        )
+
+
+def _warmup_choice_probabilities():
+    tax_params, ssc_deductions = _tiny_tax_inputs()
+    states, _ = pyth_create_state_space(_tiny_model_spec())
+    num_states = states.shape[0]
+
+    with KERNEL_LOCK:
+        return _calculate_choice_probabilities(
+            np.zeros((2, 2, 2)),
+            states,
+            np.zeros((num_states, 4)),
+            np.ones((num_states, 4)),
+            np.zeros(num_states),
+            np.ones((num_states, 3)),
+            np.ones(num_states),
+            HOURS,
+            ssc_deductions,
+            tax_params,
+            True,
+            _read_only(np.zeros((3, 2))),
+            -0.5,
+            0.95,
+        )
+
+
+def _tiny_model_spec():
+    model_spec = collections.namedtuple(
+        "model_spec",
+        "num_periods num_educ_levels num_types last_child_bearing_period "
+        "child_age_max educ_years child_age_init_max init_exp_max",
+    )
+    return model_spec(2, 1, 1, 0, 1, [0], 0, 0)
+
+
+def _tiny_tax_inputs():
+    return _read_only(create_tax_parameters()), _read_only(np.array([0.2, 1000.0]))
+
+
+def _read_only(array):
+    # The arrays of the model specification are read-only, which the kernels are
+    # compiled for
+    array.flags.writeable = False
+
+    return array
+
+
+_WARMUP_STEPS = [
+    ("pyth_create_state_space", _warmup_state_space),
+    ("create_child_indexes", _warmup_child_indexes),
+    ("calculate_net_income", _warmup_net_income),
+    (
+        "calculate_non_employment_consumption_resources",
+        _warmup_non_employment_consumption_resources,
+    ),
+    (
+        "calculate_employment_consumption_resources",
+        _warmup_employment_consumption_resources,
+    ),
+    ("construct_emax", _warmup_construct_emax),
+    ("philox_uniforms", _warmup_philox_uniforms),
+    ("create_alias_table", _warmup_alias_table),
+    ("simulate_period", _warmup_simulate_period),
+    ("calculate_choice_probabilities", _warmup_choice_probabilities),
+]
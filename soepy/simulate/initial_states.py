@@ -0,0 +1,378 @@
+"""This module samples the initial states of agents from their joint distribution.
+
+The initial conditions of an agent are the education level, the age of the youngest
+child, the partner status, the years of part-time and full-time experience, and the
+type. Given the education level, the components are independent. Their joint
+distribution is tabulated once for all combinations, and agents are sampled from the
+table with the alias method of Walker (1977) in the formulation of Vose (1991). Each
+agent requires two uniform draws and two lookups in the table, whatever the number of
+combinations.
+
+Instead of sampling, the initial states can also be given as a population, e.g., an
+observed sample or a synthetic cohort. :func:`stack_initial_population` validates the
+population against the state space and converts it to initial states.
+"""
+import itertools
+
+import numba
+import numpy as np
+import pandas as pd
+
+from soepy.shared.shared_constants import DATA_LABLES_SIM
+from soepy.shared.shared_constants import MISSING_INT
+
+# Number of agents sampled at once, which bounds the memory of the temporary arrays
+SAMPLE_CHUNK_SIZE = 2 ** 20
+
+
+class InitialStatesSampler:
+    """Sampler of the initial states of agents.
+
+    The alias table only depends on the distribution of the initial conditions. The
+    sampler can thus be shared by all simulations with the same inputs.
+
+    Parameters
+    ----------
+    model_params : namedtuple
+        Contains the shares of the types.
+    model_spec : namedtuple
+        Contains the dimensions of the initial conditions.
+    prob_educ_level, prob_child_age, prob_partner_present, prob_exp_ft, prob_exp_pt
+        Distributions of the initial conditions as passed to
+        :func:`draw_initial_states`.
+
+    """
+
+    def __init__(
+        self,
+        model_params,
+        model_spec,
+        prob_educ_level,
+        prob_child_age,
+        prob_partner_present,
+        prob_exp_ft,
+        prob_exp_pt,
+    ):
+        outcomes, probs = get_initial_distribution(
+            model_params,
+            model_spec,
+            prob_educ_level,
+            prob_child_age,
+            prob_partner_present,
+            prob_exp_ft,
+            prob_exp_pt,
+        )
+
+        is_possible = probs > 0
+        self.outcomes = outcomes[is_possible]
+        self.probs = probs[is_possible]
+        self.alias_probs, self.aliases = create_alias_table(self.probs)
+
+    def draw(self, rng, identifiers):
+        """Draw the initial states of agents from a random number generator.
+
+        Parameters
+        ----------
+        rng : np.random.Generator or module
+            Random number generator. Passing the :mod:`numpy.random` module draws from
+            the global generator.
+        identifiers : np.ndarray
+            Identifiers of the agents.
+
+        Returns
+        -------
+        initial_states : np.ndarray
+            Array with shape (num_agents, 9). See :func:`draw_initial_states`.
+
+        """
+        initial_states = np.empty((identifiers.shape[0], 9), dtype=np.int64)
+
+        for start in range(0, identifiers.shape[0], SAMPLE_CHUNK_SIZE):
+            chunk = slice(start, start + SAMPLE_CHUNK_SIZE)
+            uniforms = rng.random((identifiers[chunk].shape[0], 2))
+            self._fill(initial_states[chunk], identifiers[chunk], uniforms)
+
+        return initial_states
+
+    def sample(self, uniforms, identifiers):
+        """Sample the initial states of agents from given uniform draws.
+
+        Parameters
+        ----------
+        uniforms : np.ndarray
+            Array with shape (num_agents, 2) containing uniform draws on the unit
+            interval. The initial state of an agent only depends on its own draws.
+        identifiers : np.ndarray
+            Identifiers of the agents.
+
+        Returns
+        -------
+        initial_states : np.ndarray
+            Array with shape (num_agents, 9). See :func:`draw_initial_states`.
+
+        """
+        initial_states = np.empty((identifiers.shape[0], 9), dtype=np.int64)
+        self._fill(initial_states, identifiers, uniforms)
+
+        return initial_states
+
+    def _fill(self, initial_states, identifiers, uniforms):
+        """Write the initial states selected by the uniform draws."""
+        indexes = sample_alias_table(self.alias_probs, self.aliases, uniforms)
+
+        initial_states[:, 0] = identifiers
+        initial_states[:, 1:] = self.outcomes[indexes]
+
+
+def stack_initial_population(population, indexer):
+    """Convert a population to the initial states of the simulation.
+
+    Parameters
+    ----------
+    population : pd.DataFrame or dict
+        Population with one row per agent and the columns of the state space
+        components in :data:`DATA_LABLES_SIM`. The column "Period" contains the period
+        in which the agent enters the model. The optional column "Identifier" defaults
+        to the position of the agent.
+    indexer : np.ndarray
+        Array mapping the state space components to the index of the state.
+
+    Returns
+    -------
+    initial_states : np.ndarray
+        Array with shape (num_agents, 9). See :func:`draw_initial_states`.
+
+    Raises
+    ------
+    ValueError
+        If a column is missing, a value is missing or not integral, an identifier
+        occurs twice, or an agent does not enter the model in a state of the state
+        space.
+
+    """
+    missing = [label for label in DATA_LABLES_SIM[1:9] if label not in population]
+    if missing:
+        raise ValueError(f"The population lacks the columns {missing}.")
+
+    num_agents = len(population[DATA_LABLES_SIM[1]])
+    initial_states = np.empty((num_agents, 9), dtype=np.int64)
+
+    if "Identifier" in population:
+        initial_states[:, 0], is_integral = _get_integral_column(
+            population["Identifier"]
+        )
+        if not is_integral.all():
+            invalid = np.flatnonzero(~is_integral)
+            raise ValueError(
+                f"The identifiers of {invalid.shape[0]} agents are missing or not "
+                f"integral, e.g., of the agents at positions {invalid[:5].tolist()}."
+            )
+        if np.unique(initial_states[:, 0]).shape[0] < num_agents:
+            raise ValueError("The identifiers of the population are not unique.")
+    else:
+        initial_states[:, 0] = np.arange(num_agents)
+
+    # All columns are checked before an error is raised, such that it reports all
+    # agents with missing or non-integral values at once
+    is_valid = np.ones(num_agents, dtype=np.bool_)
+    invalid_labels = []
+    for i, label in enumerate(DATA_LABLES_SIM[1:9], start=1):
+        initial_states[:, i], is_integral = _get_integral_column(population[label])
+        if not is_integral.all():
+            invalid_labels.append(label)
+            is_valid &= is_integral
+
+    if invalid_labels:
+        invalid = initial_states[~is_valid, 0]
+        raise ValueError(
+            f"The initial states of {invalid.shape[0]} agents are missing or not "
+            f"integral in the columns {invalid_labels}, e.g., of the agents with "
+            f"identifiers {invalid[:5].tolist()}."
+        )
+
+    validate_initial_states(initial_states, indexer)
+
+    return initial_states
+
+
+def _get_integral_column(values):
+    """Convert a column of the population to integers and flag the values which are
+    missing or not integral. The flagged values are set to zero."""
+    values = np.asarray(values)
+    if values.dtype.kind in "iub":
+        return values.astype(np.int64), np.ones(values.shape[0], dtype=np.bool_)
+
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(
+        dtype=np.float64, na_value=np.nan
+    )
+    is_integral = np.isfinite(values) & (np.floor(values) == values)
+
+    return np.where(is_integral, values, 0).astype(np.int64), is_integral
+
+
+def validate_initial_states(initial_states, indexer):
+    """Check that all agents enter the model in a state of the state space.
+
+    The components are first checked against the dimensions of `indexer`, such that
+    negative components do not wrap around. Only the age of the youngest child takes
+    the value -1 if there is no child.
+
+    Raises
+    ------
+    ValueError
+        If any agent enters in a state outside of the state space.
+
+    """
+    components = initial_states[:, 1:]
+    lower = np.zeros(indexer.ndim, dtype=np.int64)
+    lower[6] = -1
+    upper = np.array(indexer.shape) - np.where(lower < 0, 1, 0)
+
+    is_valid = np.all((components >= lower) & (components < upper), axis=1)
+    is_valid[is_valid] = indexer[tuple(components[is_valid].T)] != MISSING_INT
+
+    if not is_valid.all():
+        invalid = initial_states[~is_valid, 0]
+        raise ValueError(
+            f"The initial states of {invalid.shape[0]} agents are not in the state "
+            f"space, e.g., of the agents with identifiers {invalid[:5].tolist()}."
+        )
+
+
+def get_initial_distribution(
+    model_params,
+    model_spec,
+    prob_educ_level,
+    prob_child_age,
+    prob_partner_present,
+    prob_exp_ft,
+    prob_exp_pt,
+):
+    """Tabulate the joint distribution of the initial conditions.
+
+    Returns
+    -------
+    outcomes : np.ndarray
+        Array with shape (num_outcomes, 8) containing the period of entry into the
+        model and the state space components at entry for each combination of the
+        initial conditions.
+    probs : np.ndarray
+        Probabilities of the combinations.
+
+    """
+    outcomes, probs = [], []
+
+    for educ_level in range(model_spec.num_educ_levels):
+        components = [
+            (
+                np.arange(-1, model_spec.child_age_init_max + 1),
+                np.asarray(prob_child_age[educ_level]),
+            ),
+            (
+                np.arange(2),
+                np.array(
+                    [
+                        1 - prob_partner_present[educ_level],
+                        prob_partner_present[educ_level],
+                    ]
+                ),
+            ),
+            (
+                np.arange(model_spec.init_exp_max + 1),
+                np.asarray(prob_exp_pt[educ_level]),
+            ),
+            (
+                np.arange(model_spec.init_exp_max + 1),
+                np.asarray(prob_exp_ft[educ_level]),
+            ),
+            (np.arange(model_spec.num_types), np.asarray(model_params.type_shares)),
+        ]
+
+        values = np.array(list(itertools.product(*[value for value, _ in components])))
+        child_age, partner, exp_pt, exp_ft, type_ = values.T
+
+        outcomes.append(
+            np.column_stack(
+                (
+                    np.full(values.shape[0], model_spec.educ_years[educ_level]),
+                    np.full(values.shape[0], educ_level),
+                    np.zeros(values.shape[0]),
+                    exp_pt,
+                    exp_ft,
+                    type_,
+                    child_age,
+                    partner,
+                )
+            ).astype(np.int64)
+        )
+        probs.append(
+            prob_educ_level[educ_level]
+            * np.prod(
+                list(itertools.product(*[prob for _, prob in components])), axis=1
+            )
+        )
+
+    return np.concatenate(outcomes), np.concatenate(probs)
+
+
+def sample_alias_table(alias_probs, aliases, uniforms):
+    """Map pairs of uniform draws to outcomes with an alias table.
+
+    The first draw selects a column of the table, the second draw decides between the
+    column and its alias.
+
+    """
+    columns = np.minimum(
+        (uniforms[:, 0] * alias_probs.shape[0]).astype(np.int64),
+        alias_probs.shape[0] - 1,
+    )
+
+    return np.where(uniforms[:, 1] < alias_probs[columns], columns, aliases[columns])
+
+
+@numba.njit(cache=True)
+def create_alias_table(probs):
+    """Create the alias table of a discrete distribution.
+
+    Returns
+    -------
+    alias_probs : np.ndarray
+        Probability to keep the outcome of each column.
+    aliases : np.ndarray
+        Outcome taken instead of the outcome of each column.
+
+    """
+    num_outcomes = probs.shape[0]
+    scaled = probs / probs.sum() * num_outcomes
+
+    alias_probs = np.ones(num_outcomes)
+    aliases = np.arange(num_outcomes)
+
+    small = np.empty(num_outcomes, dtype=np.int64)
+    large = np.empty(num_outcomes, dtype=np.int64)
+    num_small, num_large = 0, 0
+    for i in range(num_outcomes):
+        if scaled[i] < 1:
+            small[num_small] = i
+            num_small += 1
+        else:
+            large[num_large] = i
+            num_large += 1
+
+    while num_small > 0 and num_large > 0:
+        num_small -= 1
+        less = small[num_small]
+        more = large[num_large - 1]
+
+        alias_probs[less] = scaled[less]
+        aliases[less] = more
+
+        # The column of the larger outcome gives up the remainder of the column
+        scaled[more] = scaled[more] + scaled[less] - 1
+        if scaled[more] < 1:
+            num_large -= 1
+            small[num_small] = more
+            num_small += 1
+
+    # The remaining columns are full up to rounding errors
+    return alias_probs, aliases
@@ -0,0 +1,412 @@
+"""This module provides a simulation pipeline which caches its intermediate results.
+
+A simulation runs a fixed chain of stages: the exogenous processes, the state space,
+the covariates, the utility components, the consumption resources of non-employment,
+the draws of the solution, the backward induction, and the simulation itself. Each
+stage depends on a few fields of the model specification and the parameters and on
+the results of earlier stages, as listed in :data:`STAGES`. A :class:`Pipeline` keeps
+the latest result of each stage and recomputes a stage only if one of its inputs
+changed. A change of the wage equation, for example, leaves the exogenous processes
+and the state space untouched, and a change of the number of agents only reruns the
+simulation.
+"""
+import collections
+import threading
+
+from soepy.exogenous_processes.children import define_child_age_update_rule
+from soepy.exogenous_processes.exogenous_model import EXOGENOUS_FRAMES
+from soepy.exogenous_processes.exogenous_model import ExogenousModel
+from soepy.pre_processing.model_processing import get_hash_key
+from soepy.pre_processing.model_processing import read_model_params_init
+from soepy.pre_processing.model_processing import read_model_spec_init
+from soepy.shared.shared_auxiliary import calculate_utility_components
+from soepy.shared.shared_auxiliary import draw_standard_normals
+from soepy.shared.shared_auxiliary import scale_standard_normals
+from soepy.simulate.simulate_auxiliary import pyth_simulate
+from soepy.simulate.simulate_auxiliary import pyth_simulate_periods
+from soepy.simulate.simulate_moments import accumulate_moments
+from soepy.simulate.simulate_moments import get_moment_columns
+from soepy.solve.covariates import construct_covariates
+from soepy.solve.create_state_space import create_child_indexes
+from soepy.solve.create_state_space import pyth_create_state_space
+from soepy.solve.solve_python import get_non_employment_consumption_resources
+from soepy.solve.solve_python import pyth_backward_induction
+
+# Simulations seed and draw from the global random number generator one at a time
+_GLOBAL_RNG_LOCK = threading.Lock()
+
+Stage = collections.namedtuple("Stage", ["spec_fields", "params_fields", "stages"])
+
+# Fields of the model specification and of the parameters as well as the earlier
+# stages each stage depends on, in the order in which the stages are run. The
+# simulation depends on all of them and is not cached.
+STAGES = {
+    "exogenous_model": Stage(
+        spec_fields=(
+            "num_periods",
+            "num_educ_levels",
+            "child_age_max",
+            "child_age_init_max",
+            "init_exp_max",
+            "last_child_bearing_period",
+        )
+        + tuple(EXOGENOUS_FRAMES.values()),
+        params_fields=(),
+        stages=(),
+    ),
+    "state_space": Stage(
+        spec_fields=(
+            "num_periods",
+            "num_educ_levels",
+            "num_types",
+            "educ_years",
+            "child_age_max",
+            "child_age_init_max",
+            "init_exp_max",
+            "last_child_bearing_period",
+        ),
+        params_fields=(),
+        stages=(),
+    ),
+    "covariates": Stage(
+        spec_fields=(
+            "child_benefits",
+            "partner_cf_const",
+            "partner_cf_age",
+            "partner_cf_age_sq",
+            "partner_cf_educ",
+        ),
+        params_fields=(),
+        stages=("state_space",),
+    ),
+    "utility_components": Stage(
+        spec_fields=("num_types", "exp_cap"),
+        params_fields=(
+            "gamma_0",
+            "gamma_f",
+            "gamma_p",
+            "gamma_p_bias",
+            "no_kids_f",
+            "no_kids_p",
+            "yes_kids_f",
+            "yes_kids_p",
+            "child_02_f",
+            "child_02_p",
+            "child_35_f",
+            "child_35_p",
+            "child_6orolder_f",
+            "child_6orolder_p",
+            "theta_f",
+            "theta_p",
+        ),
+        stages=("state_space", "covariates"),
+    ),
+    "non_employment_consumption_resources": Stage(
+        spec_fields=(
+            "alg1_replacement_no_child",
+            "alg1_replacement_child",
+            "regelsatz_single",
+            "regelsatz_partner",
+            "regelsatz_child",
+            "housing_single",
+            "housing_addtion",
+            "addition_child_single",
+            "elterngeld_min",
+            "elterngeld_max",
+            "motherhood_replacement",
+            "ssc_deductions",
+            "tax_params",
+            "tax_splitting",
+        ),
+        params_fields=(),
+        stages=("state_space", "covariates", "utility_components"),
+    ),
+    "draws_emax": Stage(
+        spec_fields=("seed_emax", "num_periods", "num_draws_emax"),
+        params_fields=("shocks_cov",),
+        stages=(),
+    ),
+    "emaxs": Stage(
+        spec_fields=(
+            "num_periods",
+            "delta",
+            "mu",
+            "ssc_deductions",
+            "tax_params",
+            "tax_splitting",
+            "child_care_costs",
+        ),
+        params_fields=(),
+        stages=(
+            "exogenous_model",
+            "state_space",
+            "covariates",
+            "utility_components",
+            "non_employment_consumption_resources",
+            "draws_emax",
+        ),
+    ),
+}
+
+
+class Pipeline:
+    """Simulation pipeline which recomputes only the stages whose inputs changed.
+
+    The results of :meth:`simulate` and :meth:`moments` are identical to the ones of
+    :func:`soepy.simulate.simulate_python.simulate` and
+    :func:`soepy.simulate.simulate_python.simulate_moments` with the same parameters
+    and model specification. Both may change between calls.
+
+    Parameters
+    ----------
+    is_expected : bool
+        Whether the model is solved with the human capital accumulation process that
+        agents expect.
+    exogenous_model : ExogenousModel, optional
+        Probabilities of the exogenous processes. They are read from the files in the
+        model specification if not given. The files are identified by their names, so
+        call :meth:`clear` after changing the content of a file.
+
+    Attributes
+    ----------
+    num_computations : collections.Counter
+        Number of times each stage was computed.
+
+    Notes
+    -----
+    The pipeline can be shared by threads. The stages are computed outside of the lock
+    which guards the cache, so threads which miss the same stage at the same time
+    compute it concurrently. Each thread uses the results it computed or found. The
+    parallel kernels of the backward induction and the simulation are launched by one
+    thread at a time, see :data:`soepy.shared.shared_auxiliary.KERNEL_LOCK`, and the
+    simulations run one at a time, as they draw from the global random number
+    generator.
+
+    """
+
+    def __init__(self, is_expected=True, exogenous_model=None):
+        self.is_expected = is_expected
+        self.exogenous_model = exogenous_model
+        self.num_computations = collections.Counter()
+        self._cache = {}
+        self._num_results = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def solve(self, model_params_init_file_name, model_spec_init_file_name, until=None):
+        """Run the stages up to the solution of the model.
+
+        Parameters
+        ----------
+        model_params_init_file_name : str or pd.DataFrame
+            Parameters of the model.
+        model_spec_init_file_name : str or dict
+            Model specification.
+        until : str, optional
+            Name of the last stage which is run. Defaults to the last stage.
+
+        Returns
+        -------
+        model_params : namedtuple
+            Parsed parameters.
+        model_spec : namedtuple
+            Parsed model specification.
+        results : dict
+            Results of the stages in :data:`STAGES`. They are shared with the cache
+            and must not be modified.
+
+        """
+        model_params_df, model_params = read_model_params_init(
+            model_params_init_file_name
+        )
+        model_spec = read_model_spec_init(model_spec_init_file_name, model_params_df)
+
+        # Each computed result has an identifier, which enters the keys of the stages
+        # depending on it
+        results = {}
+        identifiers = {}
+        for name, stage in STAGES.items():
+            key = (
+                tuple(
+                    get_hash_key(getattr(model_spec, field, None))
+                    for field in stage.spec_fields
+                ),
+                tuple(
+                    get_hash_key(getattr(model_params, field, None))
+                    for field in stage.params_fields
+                ),
+                tuple(identifiers[upstream] for upstream in stage.stages),
+            )
+            with self._lock:
+                entry = self._cache.get(name)
+
+            if entry is None or entry[0] != key:
+                compute = getattr(self, f"_compute_{name}")
+                result = compute(model_spec, model_params, results)
+                with self._lock:
+                    self._num_results += 1
+                    entry = (key, self._num_results, result)
+                    self._cache[name] = entry
+                    self.num_computations[name] += 1
+
+            _, identifiers[name], results[name] = entry
+            if name == until:
+                break
+
+        return model_params, model_spec, results
+
+    def simulate(
+        self,
+        model_params_init_file_name,
+        model_spec_init_file_name,
+        float32=False,
+        columns=None,
+    ):
+        """Create a data frame of individuals' simulated experiences.
+
+        See :meth:`solve` for the parameters and the model specification and
+        :func:`soepy.simulate.simulate_python.simulate` for the other arguments.
+
+        """
+        simulate_inputs, child_state_indexes, utility_components = self._get_inputs(
+            model_params_init_file_name, model_spec_init_file_name
+        )
+
+        with _GLOBAL_RNG_LOCK:
+            df = pyth_simulate(
+                *simulate_inputs,
+                is_expected=False,
+                child_state_indexes=child_state_indexes,
+                float32=float32,
+                columns=columns,
+                utility_components=utility_components,
+            )
+
+        return df
+
+    def moments(self, model_params_init_file_name, model_spec_init_file_name, moments):
+        """Compute moments of individuals' simulated experiences.
+
+        See :func:`soepy.simulate.simulate_python.simulate_moments`.
+
+        """
+        simulate_inputs, child_state_indexes, utility_components = self._get_inputs(
+            model_params_init_file_name, model_spec_init_file_name
+        )
+
+        with _GLOBAL_RNG_LOCK:
+            blocks = pyth_simulate_periods(
+                *simulate_inputs,
+                is_expected=False,
+                as_frame=False,
+                child_state_indexes=child_state_indexes,
+                columns=get_moment_columns(moments),
+                utility_components=utility_components,
+            )
+            results = accumulate_moments(blocks, moments)
+
+        return results
+
+    def clear(self):
+        """Remove the results of all stages."""
+        with self._lock:
+            self._cache.clear()
+
+    def _get_inputs(self, model_params_init_file_name, model_spec_init_file_name):
+        """Solve the model and collect the positional arguments of the simulation as
+        well as the indexes of the states in the next period and the utility
+        components of the solution."""
+        model_params, model_spec, results = self.solve(
+            model_params_init_file_name, model_spec_init_file_name
+        )
+        states, indexer, child_age_update_rule, child_state_indexes = results[
+            "state_space"
+        ]
+
+        simulate_inputs = (
+            model_params,
+            model_spec,
+            states,
+            indexer,
+            results["emaxs"],
+            results["covariates"],
+            results["non_employment_consumption_resources"],
+            child_age_update_rule,
+            *results["exogenous_model"].to_tuple(),
+        )
+        utility_components = (*results["utility_components"], self.is_expected)
+
+        return simulate_inputs, child_state_indexes, utility_components
+
+    def _compute_exogenous_model(self, model_spec, model_params, results):
+        if self.exogenous_model is not None:
+            return self.exogenous_model
+
+        return ExogenousModel.from_frames(model_spec)
+
+    def _compute_state_space(self, model_spec, model_params, results):
+        states, indexer = pyth_create_state_space(model_spec)
+        child_age_update_rule = define_child_age_update_rule(model_spec, states)
+        child_state_indexes = create_child_indexes(
+            states, indexer, model_spec, child_age_update_rule
+        )
+
+        return states, indexer, child_age_update_rule, child_state_indexes
+
+    def _compute_covariates(self, model_spec, model_params, results):
+        return construct_covariates(results["state_space"][0], model_spec)
+
+    def _compute_utility_components(self, model_spec, model_params, results):
+        return calculate_utility_components(
+            model_params,
+            model_spec,
+            results["state_space"][0],
+            results["covariates"],
+            self.is_expected,
+        )
+
+    def _compute_non_employment_consumption_resources(
+        self, model_spec, model_params, results
+    ):
+        log_wage_systematic, _ = results["utility_components"]
+
+        return get_non_employment_consumption_resources(
+            model_spec,
+            results["state_space"][0],
+            results["covariates"],
+            log_wage_systematic,
+        )
+
+    def _compute_draws_emax(self, model_spec, model_params, results):
+        standard_normals = draw_standard_normals(
+            model_spec.seed_emax, model_spec.num_periods, model_spec.num_draws_emax
+        )
+
+        return scale_standard_normals(standard_normals, model_params.shocks_cov)
+
+    def _compute_emaxs(self, model_spec, model_params, results):
+        states, _, _, child_state_indexes = results["state_space"]
+        log_wage_systematic, non_consumption_utilities = results["utility_components"]
+        exogenous_model = results["exogenous_model"]
+
+        return pyth_backward_induction(
+            model_spec,
+            states,
+            child_state_indexes,
+            log_wage_systematic,
+            non_consumption_utilities,
+            results["draws_emax"],
+            results["covariates"],
+            exogenous_model.prob_child,
+            exogenous_model.prob_partner,
+            results["non_employment_consumption_resources"],
+            model_spec.ssc_deductions,
+        )
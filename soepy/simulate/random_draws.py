@@ -0,0 +1,240 @@
+"""This module provides the random draws of the simulation.
+
+In every period, the simulation requires the wage shocks of all agents as well as
+draws for the arrival of a child and the change of the partner status. The classes in
+this module provide these draws from different sources of randomness.
+"""
+import numba
+import numpy as np
+
+from soepy.shared.shared_auxiliary import get_shocks_transform
+
+# Types of events which enter the counter of the counter-based generator
+EVENT_SHOCKS = 0
+EVENT_CHILD = 1
+EVENT_PARTNER = 2
+EVENT_INITIAL = 3
+
+# Number of standard normal draws by which the global generator is advanced at once
+BURN_CHUNK_SIZE = 2 ** 20
+
+# Constants of the Philox4x32 generator, see Salmon et al. (2011)
+MASK_32 = np.uint64(0xFFFFFFFF)
+PHILOX_M0 = np.uint64(0xD2511F53)
+PHILOX_M1 = np.uint64(0xCD9E8D57)
+PHILOX_W0 = np.uint64(0x9E3779B9)
+PHILOX_W1 = np.uint64(0xBB67AE85)
+
+
+class SequentialDraws:
+    """Draws taken one after another from a sequential random number generator.
+
+    Parameters
+    ----------
+    rng : np.random.Generator or module
+        Random number generator. Passing the :mod:`numpy.random` module draws from the
+        global generator.
+    model_params : namedtuple
+        Contains the variances of the wage shocks.
+
+    """
+
+    def __init__(self, rng, model_params):
+        self.rng = rng
+        self.shocks_sd = np.sqrt(model_params.shocks_cov)
+
+    def shocks(self, period, identifiers):
+        """Wage shocks with shape (num_agents, 2) for part-time and full-time work."""
+        return self.rng.standard_normal((identifiers.shape[0], 2)) * self.shocks_sd
+
+    def child_arrival(self, period, identifiers, prob_child):
+        """Indicator whether a child arrives in the next period."""
+        return self.rng.binomial(size=identifiers.shape[0], n=1, p=prob_child)
+
+    def partner_status(self, period, identifiers, partner_status, prob_partner):
+        """Partner status in the next period.
+
+        Parameters
+        ----------
+        partner_status : np.ndarray
+            Current partner indicator of each agent.
+        prob_partner : np.ndarray
+            Array with shape (num_agents, 2, 2) containing the transition probabilities
+            from the current to the next partner status.
+
+        """
+        new_partner_status = partner_status.copy()
+
+        # Get individuals without partner
+        no_partner = partner_status == 0
+        new_partner_status[no_partner] = self.rng.binomial(
+            size=no_partner.sum(), n=1, p=prob_partner[no_partner, 0, 1],
+        )
+
+        # Get individuals with partner
+        with_partner = partner_status == 1
+        new_partner_status[with_partner] -= self.rng.binomial(
+            size=with_partner.sum(), n=1, p=prob_partner[with_partner, 1, 0],
+        )
+
+        return new_partner_status
+
+
+class LegacyDraws(SequentialDraws):
+    """Draws from the global random number generator as in previous releases.
+
+    The wage shocks of all agents in all periods used to be drawn at once with
+    :func:`np.random.multivariate_normal` after seeding the global generator with
+    `seed`. Here, the same shocks are drawn period by period from a separate generator
+    with the same seed. The global generator is advanced past these shocks, so that
+    the child and partner draws which follow are unchanged as well.
+
+    Parameters
+    ----------
+    seed : int
+        Seed of the simulation.
+    num_periods : int
+        Number of periods.
+    num_agents : int
+        Number of agents. Shocks are drawn for all agents in every period.
+    model_params : namedtuple
+        Contains the variances of the wage shocks.
+
+    """
+
+    def __init__(self, seed, num_periods, num_agents, model_params):
+        super().__init__(np.random, model_params)
+        self.num_agents = num_agents
+        self.shocks_rng = np.random.RandomState(seed)
+
+        # Transformation applied by np.random.multivariate_normal
+        self.shocks_transform = get_shocks_transform(model_params.shocks_cov)
+
+        np.random.seed(seed)
+        num_draws = num_periods * num_agents * 2
+        for start in range(0, num_draws, BURN_CHUNK_SIZE):
+            np.random.standard_normal(min(BURN_CHUNK_SIZE, num_draws - start))
+
+    def shocks(self, period, identifiers):
+        """Wage shocks with shape (num_agents, 2) for part-time and full-time work.
+
+        The method has to be called exactly once per period in increasing order of the
+        periods.
+
+        """
+        draws = np.dot(
+            self.shocks_rng.standard_normal((self.num_agents, 2)),
+            self.shocks_transform,
+        )
+        draws += np.zeros(2)
+
+        return draws[identifiers]
+
+
+class CounterDraws:
+    """Draws from a counter-based random number generator.
+
+    Each draw is a function of the seed, the identifier of the agent, the period, and
+    the type of event. The draws of any subset of agents can thus be generated without
+    generating the draws of all other agents. The methods have the same interface as
+    the ones of :class:`SequentialDraws`.
+
+    Parameters
+    ----------
+    seed : int
+        Seed of the simulation.
+    model_params : namedtuple
+        Contains the variances of the wage shocks.
+
+    """
+
+    def __init__(self, seed, model_params):
+        self.seed = seed
+        self.shocks_sd = np.sqrt(model_params.shocks_cov)
+
+    def uniforms(self, period, identifiers, event):
+        """Array with shape (num_agents, 2) of uniform draws on the open unit interval."""
+        return philox_uniforms(
+            np.uint64(self.seed), identifiers.astype(np.int64), period, event
+        )
+
+    def initial_uniforms(self, identifiers):
+        """Array with shape (num_agents, 2) of uniform draws for the initial states."""
+        return self.uniforms(0, identifiers, EVENT_INITIAL)
+
+    def shocks(self, period, identifiers):
+        """Wage shocks with shape (num_agents, 2) for part-time and full-time work."""
+        uniforms = self.uniforms(period, identifiers, EVENT_SHOCKS)
+
+        # Box-Muller transform
+        radius = np.sqrt(-2 * np.log(uniforms[:, 0]))
+        angle = 2 * np.pi * uniforms[:, 1]
+        normals = np.column_stack((radius * np.cos(angle), radius * np.sin(angle)))
+
+        return normals * self.shocks_sd
+
+    def child_arrival(self, period, identifiers, prob_child):
+        """Indicator whether a child arrives in the next period."""
+        uniforms = self.uniforms(period, identifiers, EVENT_CHILD)
+
+        return (uniforms[:, 0] < prob_child).astype(np.int64)
+
+    def partner_status(self, period, identifiers, partner_status, prob_partner):
+        """Partner status in the next period. See :meth:`SequentialDraws.partner_status`.
+        """
+        uniforms = self.uniforms(period, identifiers, EVENT_PARTNER)
+
+        arrival = uniforms[:, 0] < prob_partner[:, 0, 1]
+        separation = uniforms[:, 1] < prob_partner[:, 1, 0]
+
+        return np.where(partner_status == 0, arrival, 1 - separation).astype(
+            partner_status.dtype
+        )
+
+
+@numba.njit(cache=True)
+def philox_uniforms(seed, identifiers, period, event):
+    """Generate two uniform draws for each agent with the Philox4x32-10 generator.
+
+    The counter consists of the identifier, the period, and the event. The key is the
+    seed. Each block of four 32-bit integers is converted to two doubles with 53
+    random bits on the open unit interval.
+
+    """
+    num_agents = identifiers.shape[0]
+    uniforms = np.empty((num_agents, 2))
+
+    for i in range(num_agents):
+        identifier = np.uint64(identifiers[i])
+        words = philox4x32(
+            identifier & MASK_32,
+            identifier >> np.uint64(32),
+            np.uint64(period) & MASK_32,
+            np.uint64(event) & MASK_32,
+            seed & MASK_32,
+            seed >> np.uint64(32),
+        )
+        for j in range(2):
+            upper = words[2 * j] >> np.uint64(5)
+            lower = words[2 * j + 1] >> np.uint64(6)
+            uniforms[i, j] = (upper * 67108864.0 + lower + 0.5) / 9007199254740992.0
+
+    return uniforms
+
+
+@numba.njit(cache=True)
+def philox4x32(counter_0, counter_1, counter_2, counter_3, key_0, key_1):
+    """Apply ten rounds of Philox4x32 to a counter of four 32-bit words."""
+    for _ in range(10):
+        product_0 = PHILOX_M0 * counter_0
+        product_1 = PHILOX_M1 * counter_2
+        counter_0, counter_1, counter_2, counter_3 = (
+            (product_1 >> np.uint64(32)) ^ counter_1 ^ key_0,
+            product_1 & MASK_32,
+            (product_0 >> np.uint64(32)) ^ counter_3 ^ key_1,
+            product_0 & MASK_32,
+        )
+        key_0 = (key_0 + PHILOX_W0) & MASK_32
+        key_1 = (key_1 + PHILOX_W1) & MASK_32
+
+    return counter_0, counter_1, counter_2, counter_3
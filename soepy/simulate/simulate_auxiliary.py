@@ -1,12 +1,30 @@
 import numpy as np
 import pandas as pd
 
-from soepy.shared.shared_auxiliary import calculate_employment_consumption_resources
+from soepy.shared.shared_auxiliary import calculate_log_wage_systematic_process
 from soepy.shared.shared_auxiliary import calculate_utility_components
-from soepy.shared.shared_auxiliary import draw_disturbances
-from soepy.shared.shared_constants import DATA_FORMATS_SIM
 from soepy.shared.shared_constants import DATA_LABLES_SIM
 from soepy.shared.shared_constants import HOURS
+from soepy.simulate.random_draws import LegacyDraws
+from soepy.simulate.random_draws import SequentialDraws
+from soepy.simulate.simulate_kernel import simulate_period
+from soepy.simulate.simulate_output import get_output_dtype
+from soepy.solve.create_state_space import create_child_indexes
+
+
+# Columns of the simulated data which are derived from the state by :func:`pyth_derive_columns`
+DERIVED_COLUMNS = [
+    "Log_Systematic_Wage",
+    "Non_Consumption_Utility_N",
+    "Non_Consumption_Utility_P",
+    "Non_Consumption_Utility_F",
+    "Flow_Utility_N",
+    "Continuation_Value_N",
+    "Continuation_Value_P",
+    "Continuation_Value_F",
+    "Value_Function_N",
+    "Male_Wages",
+]
 
 
 def pyth_simulate(
@@ -26,273 +44,693 @@ def pyth_simulate(
     prob_child,
     prob_partner,
     is_expected,
+    child_state_indexes=None,
+    float32=False,
+    columns=None,
+    utility_components=None,
+    initial_states=None,
 ):
-    """Simulate agent experiences."""
+    """Simulate agent experiences.
+
+    The number of rows of the simulated panel is known once the initial states are
+    drawn. The columns are allocated at once with compact data types and filled
+    period by period. The data frame is constructed from the columns without a copy.
+
+    Parameters
+    ----------
+    child_state_indexes : np.ndarray, optional
+        Indexes of the states in the next period. They are created if not given.
+    float32 : bool
+        If True, the float columns are stored in single precision.
+    columns : list, optional
+        Columns of the simulated data. Defaults to all columns. The other columns are
+        not stored. The columns which only depend on the state can be added later with
+        :func:`pyth_derive_columns`.
+    utility_components : tuple, optional
+        Systematic log wages and non-consumption utilities of the solution and the
+        value of `is_expected` they were computed for. See
+        :func:`get_utility_components`.
+    initial_states : np.ndarray, optional
+        Array with shape (num_agents, 9) as returned by
+        :func:`stack_initial_population`. The agents are simulated from these initial
+        states instead of drawing them from the distributions of the initial
+        conditions. The draws are then taken from a generator seeded with
+        `model_spec.seed_sim` which leaves the global generator unchanged.
+
+    """
+    (
+        initial_states,
+        draws,
+        log_wage_systematic,
+        non_consumption_utilities,
+        child_state_indexes,
+    ) = _setup_simulation(
+        model_params,
+        model_spec,
+        states,
+        indexer,
+        covariates,
+        child_age_update_rule,
+        prob_educ_level,
+        prob_child_age,
+        prob_partner_present,
+        prob_exp_ft,
+        prob_exp_pt,
+        is_expected,
+        child_state_indexes,
+        utility_components,
+        initial_states,
+    )
 
-    np.random.seed(model_spec.seed_sim)
+    data = allocate_simulated_data(
+        count_simulated_rows(initial_states, model_spec.num_periods), float32, columns
+    )
 
-    # Draw initial condition: education level
-    initial_educ_level = np.random.choice(
-        model_spec.num_educ_levels, model_spec.num_agents_sim, p=prob_educ_level
+    for _ in simulate_agents(
+        initial_states,
+        draws,
+        model_spec,
+        states,
+        indexer,
+        child_state_indexes,
+        emaxs,
+        covariates,
+        log_wage_systematic,
+        non_consumption_utilities,
+        non_employment_consumption_resources,
+        prob_child,
+        prob_partner,
+        out=data,
+    ):
+        pass
+
+    dataset = pd.DataFrame(data, copy=False)
+
+    return dataset
+
+
+def pyth_simulate_periods(
+    model_params,
+    model_spec,
+    states,
+    indexer,
+    emaxs,
+    covariates,
+    non_employment_consumption_resources,
+    child_age_update_rule,
+    prob_educ_level,
+    prob_child_age,
+    prob_partner_present,
+    prob_exp_ft,
+    prob_exp_pt,
+    prob_child,
+    prob_partner,
+    is_expected,
+    as_frame=True,
+    child_state_indexes=None,
+    columns=None,
+    utility_components=None,
+    initial_states=None,
+):
+    """Simulate agent experiences period by period.
+
+    The generator yields the experiences of all agents in one period at a time, such
+    that the simulated panel can be aggregated or written to disk without holding it
+    in memory. The random draws are taken from the global random number generator in
+    the same order as in :func:`pyth_simulate`. The generator should hence be exhausted
+    before the global generator is used elsewhere. The wage shocks are drawn in each
+    period, such that the memory required does not grow with the number of periods.
+
+    Parameters
+    ----------
+    as_frame : bool
+        If True, each period is yielded as a data frame. Otherwise, it is yielded as a
+        structured array with the same columns.
+    child_state_indexes : np.ndarray, optional
+        Indexes of the states in the next period as returned by
+        :func:`create_state_space_objects`. They are created if not given.
+    columns : list, optional
+        Columns of the simulated data. Defaults to all columns.
+    utility_components : tuple, optional
+        Utility components of the solution. See :func:`get_utility_components`.
+    initial_states : np.ndarray, optional
+        Initial states of the agents. See :func:`pyth_simulate`.
+
+    Yields
+    ------
+    block : pd.DataFrame or np.ndarray
+        Experiences of all agents in the period with the columns of
+        :data:`DATA_LABLES_SIM` and the observed wage, or the selected columns.
+
+    """
+    (
+        initial_states,
+        draws,
+        log_wage_systematic,
+        non_consumption_utilities,
+        child_state_indexes,
+    ) = _setup_simulation(
+        model_params,
+        model_spec,
+        states,
+        indexer,
+        covariates,
+        child_age_update_rule,
+        prob_educ_level,
+        prob_child_age,
+        prob_partner_present,
+        prob_exp_ft,
+        prob_exp_pt,
+        is_expected,
+        child_state_indexes,
+        utility_components,
+        initial_states,
     )
 
-    # Draw initial conditions: age of youngest child, partner status,
-    # experience full-time and experience part-time
-    initial_child_age = np.full(model_spec.num_agents_sim, np.nan)
-    initial_partner_status = np.full(model_spec.num_agents_sim, np.nan)
-    initial_pt_exp = np.full(model_spec.num_agents_sim, np.nan)
-    initial_ft_exp = np.full(model_spec.num_agents_sim, np.nan)
+    dtype = get_output_dtype(columns)
+
+    for data in simulate_agents(
+        initial_states,
+        draws,
+        model_spec,
+        states,
+        indexer,
+        child_state_indexes,
+        emaxs,
+        covariates,
+        log_wage_systematic,
+        non_consumption_utilities,
+        non_employment_consumption_resources,
+        prob_child,
+        prob_partner,
+        columns=columns,
+    ):
+        if as_frame:
+            yield pd.DataFrame(data, copy=False)
+        else:
+            block = np.empty(data[dtype.names[0]].shape[0], dtype=dtype)
+            for label, column in data.items():
+                block[label] = column
+            yield block
 
-    for educ_level in range(model_spec.num_educ_levels):
-        # Child
-        initial_child_age[initial_educ_level == educ_level] = np.random.choice(
-            list(range(-1, model_spec.child_age_init_max + 1)),
-            sum(initial_educ_level == educ_level),
-            p=prob_child_age[educ_level],
-        )
-        # Partner
-        initial_partner_status[initial_educ_level == educ_level] = np.random.binomial(
-            size=sum(initial_educ_level == educ_level),
-            n=1,
-            p=prob_partner_present[educ_level],
+
+def _setup_simulation(
+    model_params,
+    model_spec,
+    states,
+    indexer,
+    covariates,
+    child_age_update_rule,
+    prob_educ_level,
+    prob_child_age,
+    prob_partner_present,
+    prob_exp_ft,
+    prob_exp_pt,
+    is_expected,
+    child_state_indexes,
+    utility_components,
+    initial_states,
+):
+    """Draw the initial states and set up the draws and the utility components."""
+
+    if initial_states is None:
+        np.random.seed(model_spec.seed_sim)
+
+        # Draw initial conditions from the global random number generator
+        initial_states = draw_initial_states(
+            np.random,
+            np.arange(model_spec.num_agents_sim),
+            model_params,
+            model_spec,
+            prob_educ_level,
+            prob_child_age,
+            prob_partner_present,
+            prob_exp_ft,
+            prob_exp_pt,
         )
 
-        # Part-time experience
-        initial_pt_exp[initial_educ_level == educ_level] = np.random.choice(
-            list(range(0, model_spec.init_exp_max + 1)),
-            sum(initial_educ_level == educ_level),
-            p=prob_exp_pt[educ_level],
+        # Draw shocks period by period
+        attrs_spec = ["seed_sim", "num_periods", "num_agents_sim"]
+        draws = LegacyDraws(
+            *[getattr(model_spec, attr) for attr in attrs_spec], model_params
         )
-        # Full-time experience
-        initial_ft_exp[initial_educ_level == educ_level] = np.random.choice(
-            list(range(0, model_spec.init_exp_max + 1)),
-            sum(initial_educ_level == educ_level),
-            p=prob_exp_ft[educ_level],
+    else:
+        draws = SequentialDraws(
+            np.random.default_rng(model_spec.seed_sim), model_params
         )
-    # Draw random type
-    type_ = np.random.choice(
-        list(np.arange(model_spec.num_types)),
-        model_spec.num_agents_sim,
-        p=model_params.type_shares,
-    )
 
-    # Draw shocks
-    attrs_spec = ["seed_sim", "num_periods", "num_agents_sim"]
-    draws_sim = draw_disturbances(
-        *[getattr(model_spec, attr) for attr in attrs_spec], model_params
+    # Calculate utility components
+    log_wage_systematic, non_consumption_utilities = get_utility_components(
+        model_params,
+        model_spec,
+        states,
+        covariates,
+        is_expected,
+        utility_components,
+        visited_only=True,
     )
 
-    # Calculate utility components
-    log_wage_systematic, non_consumption_utilities = calculate_utility_components(
-        model_params, model_spec, states, covariates, is_expected
+    if child_state_indexes is None:
+        child_state_indexes = create_child_indexes(
+            states, indexer, model_spec, child_age_update_rule
+        )
+
+    return (
+        initial_states,
+        draws,
+        log_wage_systematic,
+        non_consumption_utilities,
+        child_state_indexes,
     )
 
-    # Determine initial states according to initial conditions
-    initial_states = pd.DataFrame(
-        np.column_stack(
-            (
-                np.arange(model_spec.num_agents_sim),
-                np.array(model_spec.educ_years)[initial_educ_level],
-                initial_educ_level,
-                np.zeros(model_spec.num_agents_sim),
-                initial_pt_exp,
-                initial_ft_exp,
-                type_,
-                initial_child_age,
-                initial_partner_status,
+
+def get_utility_components(
+    model_params,
+    model_spec,
+    states,
+    covariates,
+    is_expected,
+    utility_components=None,
+    visited_only=False,
+):
+    """Get the utility components of the simulation from those of the solution.
+
+    The components of the solution are reused if they were computed for the same
+    `is_expected`. Otherwise, only the systematic log wages differ. They are computed
+    for all states or, if `visited_only` is True, for the states visited by agents
+    in :func:`simulate_agents`.
+
+    Parameters
+    ----------
+    utility_components : tuple, optional
+        Tuple of the systematic log wages and the non-consumption utilities of all
+        states and the value of `is_expected` they were computed for. If not given,
+        the components are calculated from scratch.
+
+    Returns
+    -------
+    log_wage_systematic : np.ndarray or VisitedLogWageSystematic
+        Systematic log wages of all states.
+    non_consumption_utilities : np.ndarray
+        Array with shape (num_states, 3) containing the non-consumption utilities.
+
+    """
+    if utility_components is None:
+        return calculate_utility_components(
+            model_params, model_spec, states, covariates, is_expected
+        )
+
+    (
+        log_wage_systematic,
+        non_consumption_utilities,
+        is_expected_solution,
+    ) = utility_components
+    if is_expected_solution != is_expected:
+        if visited_only:
+            log_wage_systematic = VisitedLogWageSystematic(
+                model_params, model_spec, states, is_expected
+            )
+        else:
+            log_wage_systematic = calculate_log_wage_systematic_process(
+                model_params, model_spec, states, is_expected
             )
-        ),
-        columns=DATA_LABLES_SIM[:9],
-    ).astype(np.int)
 
-    tax_splitting = model_spec.tax_splitting
-    data = []
+    return log_wage_systematic, non_consumption_utilities
 
-    # Loop over all periods
-    for period in range(model_spec.num_periods):
 
-        initial_states_in_period = initial_states.loc[
-            initial_states.Period.eq(period)
-        ].to_numpy()
+class VisitedLogWageSystematic:
+    """Systematic log wages which are computed for the visited states only.
 
-        # Get all agents in the period.
-        if period == 0:
-            current_states = initial_states_in_period
-        else:
-            current_states = np.vstack((current_states, initial_states_in_period))
-
-        idx = indexer[
-            current_states[:, 1],  # 0 period
-            current_states[:, 2],  # 1 educ_level
-            current_states[:, 3],  # 2 lagged_choice
-            current_states[:, 4],  # 3 exp_pt
-            current_states[:, 5],  # 4 exp_ft
-            current_states[:, 6],  # 5 type
-            current_states[:, 7],  # 6 age_youngest_child
-            current_states[:, 8],  # 7 partner_indicator
-        ]
+    Agents visit only a small share of the state space. The systematic log wages of
+    the states are computed when agents reach them for the first time. The remaining
+    states are missing.
 
-        # Extract corresponding utilities
-        current_log_wage_systematic = log_wage_systematic[idx]
-        current_non_consumption_utilities = non_consumption_utilities[idx]
-        current_non_employment_consumption_resources = non_employment_consumption_resources[
-            idx
-        ]
-        current_equivalence_scale = covariates[idx][:, 2]
-        current_male_wages = covariates[idx][:, 1]
-        current_child_benefits = covariates[idx][:, 3]
+    """
 
-        current_wages = np.exp(
-            current_log_wage_systematic.reshape(-1, 1)
-            + draws_sim[period, current_states[:, 0]]
-        )
+    def __init__(self, model_params, model_spec, states, is_expected):
+        self.model_params = model_params
+        self.model_spec = model_spec
+        self.states = states
+        self.is_expected = is_expected
+        self.values = np.full(states.shape[0], np.nan)
 
-        current_female_income = HOURS[1:] * current_wages
+    def update(self, state_indexes):
+        """Compute the systematic log wages of the states not visited before.
 
-        current_employment_consumption_resources = calculate_employment_consumption_resources(
-            model_spec.ssc_deductions,
-            model_spec.tax_params,
-            current_female_income,
-            current_male_wages,
-            tax_splitting,
-        )
+        Returns
+        -------
+        values : np.ndarray
+            Systematic log wages of all states.
 
-        current_employment_consumption_resources += current_child_benefits.reshape(
-            -1, 1
+        """
+        state_indexes = state_indexes[np.isnan(self.values[state_indexes])]
+        self.values[state_indexes] = calculate_log_wage_systematic_process(
+            self.model_params,
+            self.model_spec,
+            self.states[state_indexes],
+            self.is_expected,
         )
 
-        child_care_costs = get_child_care_cost_for_choice(
-            covariates[idx][:, 0].astype(float), model_spec.child_care_costs
-        )
+        return self.values
 
-        current_employment_consumption_resources -= child_care_costs
 
-        # Join alternative consumption resources. Ensure positivity.
-        current_consumption_resources = np.hstack(
-            (
-                current_non_employment_consumption_resources.reshape(-1, 1),
-                current_employment_consumption_resources,
-            )
-        ).clip(min=np.finfo(float).eps)
+def allocate_simulated_data(num_rows, float32=False, columns=None):
+    """Allocate the columns of simulated data.
+
+    The states and the choice are stored as small integers. The float columns are
+    stored in double or, if `float32` is True, in single precision.
+
+    Returns
+    -------
+    data : dict
+        Dictionary mapping the columns of :data:`DATA_DTYPE_SIM`, or the selected
+        `columns` in the same order, to empty arrays.
+
+    """
+    dtype = get_output_dtype(columns, float32=float32)
+
+    return {label: np.empty(num_rows, dtype=dtype[label]) for label in dtype.names}
 
-        # Calculate total values for all choices
-        flow_utilities = (
-            (current_consumption_resources / current_equivalence_scale.reshape(-1, 1))
-            ** model_spec.mu
+
+def count_simulated_rows(initial_states, num_periods):
+    """Count the rows of the simulated panel, i.e., the periods agents spend in the
+    model."""
+    return int(np.clip(num_periods - initial_states[:, 1], 0, None).sum())
+
+
+def pyth_derive_columns(
+    data,
+    labels,
+    model_spec,
+    indexer,
+    emaxs,
+    covariates,
+    log_wage_systematic,
+    non_consumption_utilities,
+    non_employment_consumption_resources,
+):
+    """Derive columns of simulated data which only depend on the state.
+
+    The state of each row is looked up from the state space components in `data`. The
+    wages and the utilities of employment depend on the wage shocks and cannot be
+    derived.
+
+    Parameters
+    ----------
+    data : pd.DataFrame or dict
+        Simulated data with at least the columns of the state space components.
+    labels : list
+        Columns to derive. See :data:`DERIVED_COLUMNS`.
+
+    Returns
+    -------
+    derived : dict
+        Dictionary mapping the labels to the derived columns.
+
+    """
+    unknown = [label for label in labels if label not in DERIVED_COLUMNS]
+    if unknown:
+        raise ValueError(f"Columns cannot be derived from the state: {unknown}.")
+
+    state_indexes = indexer[
+        tuple(np.asarray(data[label], dtype=np.int64) for label in DATA_LABLES_SIM[1:9])
+    ]
+
+    # Columns of arrays over the state space
+    by_state = {
+        "Log_Systematic_Wage": log_wage_systematic,
+        "Male_Wages": covariates[:, 1],
+    }
+    for choice, suffix in enumerate("NPF"):
+        by_state[f"Non_Consumption_Utility_{suffix}"] = non_consumption_utilities[
+            :, choice
+        ]
+        by_state[f"Continuation_Value_{suffix}"] = emaxs[:, choice]
+
+    derived = {
+        label: by_state[label][state_indexes] for label in labels if label in by_state
+    }
+
+    if "Flow_Utility_N" in labels or "Value_Function_N" in labels:
+        # Flow utility of non-employment as in the simulation kernel
+        consumption_resources = np.maximum(
+            non_employment_consumption_resources[state_indexes],
+            np.finfo(np.float64).eps,
+        )
+        flow_utility = (
+            (consumption_resources / covariates[state_indexes, 2]) ** model_spec.mu
             / model_spec.mu
-            * current_non_consumption_utilities
+            * non_consumption_utilities[state_indexes, 0]
+        )
+        derived["Flow_Utility_N"] = flow_utility
+        derived["Value_Function_N"] = (
+            flow_utility + model_spec.delta * emaxs[state_indexes, 0]
         )
 
-        # Extract continuation values for all choices
-        continuation_values = emaxs[idx, :3]
+    return {label: derived[label] for label in labels}
 
-        value_functions = flow_utilities + model_spec.delta * continuation_values
 
-        # Determine choice as option with highest choice specific value function
-        choice = np.argmax(value_functions, axis=1)
+def draw_initial_states(
+    rng,
+    identifiers,
+    model_params,
+    model_spec,
+    prob_educ_level,
+    prob_child_age,
+    prob_partner_present,
+    prob_exp_ft,
+    prob_exp_pt,
+):
+    """Draw the initial states of agents.
 
-        child_current_age = current_states[:, 7]
+    Parameters
+    ----------
+    rng : np.random.Generator or module
+        Random number generator. Passing the :mod:`numpy.random` module draws from the
+        global generator.
+    identifiers : np.ndarray
+        Identifiers of the agents.
 
-        # Update child age
-        # Modification for simulations with very few periods
-        # where maximum childbearing age is not reached by the end of the model
-        if period == model_spec.num_periods - 1:
-            child_new_age = child_current_age
+    Returns
+    -------
+    initial_states : np.ndarray
+        Array with shape (num_agents, 9) containing the identifier, the period of
+        entry into the model, and the state space components at entry.
 
-        # Periods where the probability to have a child is still positive
-        elif period <= model_spec.last_child_bearing_period:
-            # Update current states according to exogenous processes
-            # Relate to child age updating
-            kids_current_draw = np.random.binomial(
-                size=current_states.shape[0],
-                n=1,
-                p=prob_child[period + 1, current_states[:, 2]],
-            )
+    """
+    num_agents = identifiers.shape[0]
 
-            # Convert to age of child according to age update rule
-            child_new_age = np.where(
-                kids_current_draw == 0, child_age_update_rule[idx], 0
-            )
-            # Periods where no new child can arrive
-        else:
-            child_new_age = child_age_update_rule[idx]
+    # Draw initial condition: education level
+    initial_educ_level = rng.choice(
+        model_spec.num_educ_levels, num_agents, p=prob_educ_level
+    )
 
-        # Update partner status according to random draw
-        current_partner_status = current_states[:, 8]
-        new_partner_status = np.full(current_states.shape[0], np.nan)
-
-        # Get individuals without partner
-        current_states_no_partner = current_states[current_states[:, 8] == 0]
-        partner_arrival_current_draw = np.random.binomial(
-            size=current_states_no_partner.shape[0],
-            n=1,
-            p=prob_partner[period, current_states_no_partner[:, 2], 0, 1],
-        )
-        new_partner_status[current_states[:, 8] == 0] = partner_arrival_current_draw
-
-        # Get individuals with partner
-        current_states_with_partner = current_states[current_states[:, 8] == 1]
-        partner_separation_current_draw = np.random.binomial(
-            size=current_states_with_partner.shape[0],
-            n=1,
-            p=prob_partner[period, current_states_with_partner[:, 2], 1, 0],
+    # Draw initial conditions: age of youngest child, partner status,
+    # experience full-time and experience part-time
+    initial_child_age = np.full(num_agents, np.nan)
+    initial_partner_status = np.full(num_agents, np.nan)
+    initial_pt_exp = np.full(num_agents, np.nan)
+    initial_ft_exp = np.full(num_agents, np.nan)
+
+    for educ_level in range(model_spec.num_educ_levels):
+        is_educ_level = initial_educ_level == educ_level
+        num_educ_level = is_educ_level.sum()
+        # Child
+        initial_child_age[is_educ_level] = rng.choice(
+            list(range(-1, model_spec.child_age_init_max + 1)),
+            num_educ_level,
+            p=prob_child_age[educ_level],
         )
-        new_partner_status[current_states[:, 8] == 1] = (
-            current_partner_status[current_states[:, 8] == 1]
-            - partner_separation_current_draw
+        # Partner
+        initial_partner_status[is_educ_level] = rng.binomial(
+            size=num_educ_level, n=1, p=prob_partner_present[educ_level],
         )
 
-        # Record period experiences
-        rows = np.column_stack(
-            (
-                current_states.copy(),
-                choice,
-                current_log_wage_systematic,
-                current_wages,
-                current_non_consumption_utilities,
-                flow_utilities,
-                continuation_values,
-                value_functions,
-                current_male_wages,
-            )
+        # Part-time experience
+        initial_pt_exp[is_educ_level] = rng.choice(
+            list(range(0, model_spec.init_exp_max + 1)),
+            num_educ_level,
+            p=prob_exp_pt[educ_level],
+        )
+        # Full-time experience
+        initial_ft_exp[is_educ_level] = rng.choice(
+            list(range(0, model_spec.init_exp_max + 1)),
+            num_educ_level,
+            p=prob_exp_ft[educ_level],
         )
+    # Draw random type
+    type_ = rng.choice(
+        list(np.arange(model_spec.num_types)), num_agents, p=model_params.type_shares,
+    )
 
-        data.append(rows)
+    return stack_initial_states(
+        identifiers,
+        model_spec,
+        initial_educ_level,
+        initial_pt_exp,
+        initial_ft_exp,
+        type_,
+        initial_child_age,
+        initial_partner_status,
+    )
 
-        # Update current states according to choice
-        current_states[:, 1] += 1
-        current_states[:, 3] = choice
-        current_states[:, 4] = np.where(
-            choice == 1, current_states[:, 4] + 1, current_states[:, 4]
-        )
-        current_states[:, 5] = np.where(
-            choice == 2, current_states[:, 5] + 1, current_states[:, 5]
+
+def stack_initial_states(
+    identifiers,
+    model_spec,
+    initial_educ_level,
+    initial_pt_exp,
+    initial_ft_exp,
+    type_,
+    initial_child_age,
+    initial_partner_status,
+):
+    """Determine initial states according to initial conditions."""
+    initial_states = np.column_stack(
+        (
+            identifiers,
+            np.array(model_spec.educ_years)[initial_educ_level],
+            initial_educ_level,
+            np.zeros(identifiers.shape[0]),
+            initial_pt_exp,
+            initial_ft_exp,
+            type_,
+            initial_child_age,
+            initial_partner_status,
         )
-        current_states[:, 7] = child_new_age
-        current_states[:, 8] = new_partner_status
+    ).astype(np.int64)
+
+    return initial_states
 
-    dataset = pd.DataFrame(np.vstack(data), columns=DATA_LABLES_SIM).astype(
-        DATA_FORMATS_SIM
+
+def simulate_agents(
+    initial_states,
+    draws,
+    model_spec,
+    states,
+    indexer,
+    child_state_indexes,
+    emaxs,
+    covariates,
+    log_wage_systematic,
+    non_consumption_utilities,
+    non_employment_consumption_resources,
+    prob_child,
+    prob_partner,
+    out=None,
+    columns=None,
+):
+    """Simulate the experiences of a group of agents period by period.
+
+    Agents enter the model in the period recorded in their initial state. Within
+    a period, agents are ordered by their period of entry and then by their position
+    in :data:`initial_states`.
+
+    Parameters
+    ----------
+    initial_states : np.ndarray
+        Array with shape (num_agents, 9) as returned by :func:`draw_initial_states`.
+    draws : SequentialDraws, LegacyDraws, or CounterDraws
+        Source of the wage shocks and the exogenous events.
+    child_state_indexes : np.ndarray
+        Array with shape (num_states, 3, 2, 2) containing the index of the state in the
+        next period by choice, arrival of a child, and partner status.
+    log_wage_systematic : np.ndarray or VisitedLogWageSystematic
+        Systematic log wages of all states or of the states visited by the agents.
+    out : dict, optional
+        Columns as returned by :func:`allocate_simulated_data` with one row for each
+        period the agents spend in the model. The periods are written to consecutive
+        rows. If not given, the columns are allocated in each period.
+    columns : list, optional
+        Columns allocated in each period if `out` is not given. Defaults to all
+        columns.
+
+    Yields
+    ------
+    data : dict
+        Columns of the experiences of the agents in the period. See
+        :func:`pyth_simulate_periods`.
+
+    """
+    num_periods = model_spec.num_periods
+
+    # Order agents by their period of entry, such that the agents in the model are the
+    # first agents in each period.
+    initial_states = initial_states[np.argsort(initial_states[:, 1], kind="stable")]
+    num_agents_period = np.searchsorted(
+        initial_states[:, 1], np.arange(num_periods), side="right"
     )
 
-    # Determine the period wage given choice in the period
-    dataset["Wage_Observed"] = np.nan
-    dataset.loc[dataset["Choice"] == 1, "Wage_Observed"] = dataset.loc[
-        dataset["Choice"] == 1, "Period_Wage_P"
-    ]
-    dataset.loc[dataset["Choice"] == 2, "Wage_Observed"] = dataset.loc[
-        dataset["Choice"] == 2, "Period_Wage_F"
-    ]
+    # Agents are represented by the index of their state, which is looked up once at
+    # their entry into the model.
+    initial_states = initial_states[: num_agents_period[-1]]
+    identifiers = np.ascontiguousarray(initial_states[:, 0])
+    educ_level = initial_states[:, 2]
+    state_indexes = indexer[tuple(initial_states[:, 1:].T)]
 
-    return dataset
+    values = np.empty((initial_states.shape[0], 15))
+    offset = 0
+
+    # Loop over all periods
+    for period in range(num_periods):
+
+        num_agents = num_agents_period[period]
+
+        shocks = draws.shocks(period, identifiers[:num_agents])
 
+        # Draw the arrival of a child in periods where the probability to have a child
+        # is still positive. In the last period, the state is not updated.
+        if period < num_periods - 1 and period <= model_spec.last_child_bearing_period:
+            kids_draw = draws.child_arrival(
+                period,
+                identifiers[:num_agents],
+                prob_child[period + 1, educ_level[:num_agents]],
+            )
+        else:
+            kids_draw = np.zeros(num_agents, dtype=np.int64)
+
+        # Update partner status according to random draw
+        new_partner_status = draws.partner_status(
+            period,
+            identifiers[:num_agents],
+            states[state_indexes[:num_agents], 7],
+            prob_partner[period, educ_level[:num_agents]],
+        )
+
+        if out is None:
+            data = allocate_simulated_data(num_agents, columns=columns)
+        else:
+            data = {
+                label: column[offset : offset + num_agents]
+                for label, column in out.items()
+            }
+            offset += num_agents
+
+        if isinstance(log_wage_systematic, VisitedLogWageSystematic):
+            log_wage_systematic_period = log_wage_systematic.update(
+                state_indexes[:num_agents]
+            )
+        else:
+            log_wage_systematic_period = log_wage_systematic
+
+        simulate_period(
+            period,
+            identifiers[:num_agents],
+            state_indexes[:num_agents],
+            shocks,
+            kids_draw,
+            new_partner_status,
+            model_spec,
+            states,
+            child_state_indexes,
+            emaxs,
+            covariates,
+            log_wage_systematic_period,
+            non_consumption_utilities,
+            non_employment_consumption_resources,
+            HOURS,
+            data,
+            values[:num_agents],
+        )
 
-def get_child_care_cost_for_choice(child_bins, child_care_costs):
-    child_bins[child_bins > 2] = 0
-    child_costs = np.zeros((child_bins.shape[0], 2))
-    for choice in range(2):
-        for age_bin in range(1, 3):
-            child_costs[child_bins == age_bin, choice] = child_care_costs[
-                age_bin, choice
-            ]
-    return child_costs
+        yield data
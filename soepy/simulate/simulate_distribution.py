@@ -0,0 +1,332 @@
+"""This module propagates the distribution of the population over the state space.
+
+Instead of sampling agents, the share of the population in each state is pushed
+forward period by period. The choice probabilities of each state are computed from
+the draws of the solution, the initial conditions enter with their probabilities,
+and the exogenous processes are applied with their transition probabilities. The
+result is free of sampling noise and its cost does not depend on the number of agents.
+"""
+import numba
+import numpy as np
+import pandas as pd
+
+from soepy.shared.shared_auxiliary import draw_disturbances
+from soepy.shared.shared_auxiliary import KERNEL_LOCK
+from soepy.shared.shared_constants import DATA_LABLES_SIM
+from soepy.shared.shared_constants import HOURS
+from soepy.shared.shared_constants import NUM_CHOICES
+from soepy.simulate.initial_states import get_initial_distribution
+from soepy.simulate.simulate_auxiliary import get_utility_components
+from soepy.simulate.simulate_kernel import calculate_flow_utility
+from soepy.solve.create_state_space import create_child_indexes
+
+
+def pyth_simulate_distribution(
+    model_params,
+    model_spec,
+    states,
+    indexer,
+    emaxs,
+    covariates,
+    non_employment_consumption_resources,
+    child_age_update_rule,
+    prob_educ_level,
+    prob_child_age,
+    prob_partner_present,
+    prob_exp_ft,
+    prob_exp_pt,
+    prob_child,
+    prob_partner,
+    is_expected,
+    child_state_indexes=None,
+    utility_components=None,
+):
+    """Compute the distribution of the population over the states and choices.
+
+    The arguments are the ones of :func:`pyth_simulate`. As in the simulation, the
+    agents choose according to `is_expected` and the continuation values of the
+    solution. The choice probabilities are the shares of the draws of the solution in
+    which a choice is optimal. The utility components of the solution are reused as
+    described in :func:`get_utility_components`.
+
+    Returns
+    -------
+    distribution : pd.DataFrame
+        Data frame with one row for each state the population reaches. It contains the
+        state space components with the labels of :data:`DATA_LABLES_SIM`, the share of
+        the population in the state, "Mass", and the probabilities of the choices,
+        "Choice_Probability_N", "Choice_Probability_P", and "Choice_Probability_F".
+
+    """
+    log_wage_systematic, non_consumption_utilities = get_utility_components(
+        model_params, model_spec, states, covariates, is_expected, utility_components
+    )
+
+    if child_state_indexes is None:
+        child_state_indexes = create_child_indexes(
+            states, indexer, model_spec, child_age_update_rule
+        )
+
+    # The choice probabilities are integrated with the draws of the solution
+    attrs_spec = ["seed_emax", "num_periods", "num_draws_emax"]
+    draws = draw_disturbances(
+        *[getattr(model_spec, attr) for attr in attrs_spec], model_params
+    )
+
+    choice_probabilities = calculate_choice_probabilities(
+        model_spec,
+        draws,
+        states,
+        emaxs,
+        covariates,
+        log_wage_systematic,
+        non_consumption_utilities,
+        non_employment_consumption_resources,
+    )
+
+    initial_mass = get_initial_mass(
+        model_params,
+        model_spec,
+        indexer,
+        states.shape[0],
+        prob_educ_level,
+        prob_child_age,
+        prob_partner_present,
+        prob_exp_ft,
+        prob_exp_pt,
+    )
+
+    mass = propagate_mass(
+        initial_mass,
+        choice_probabilities,
+        model_spec,
+        states,
+        child_state_indexes,
+        prob_child,
+        prob_partner,
+    )
+
+    is_reached = mass > 0
+    distribution = pd.DataFrame(
+        states[is_reached], columns=DATA_LABLES_SIM[1:9]
+    ).assign(Mass=mass[is_reached])
+    for choice, suffix in enumerate("NPF"):
+        distribution[f"Choice_Probability_{suffix}"] = choice_probabilities[
+            is_reached, choice
+        ]
+
+    return distribution
+
+
+def get_choice_shares(distribution, by="Period"):
+    """Compute the shares of the choices by groups of states.
+
+    Returns
+    -------
+    choice_shares : pd.DataFrame
+        Data frame with the groups as index and the choices as columns, as returned by
+        ``df.groupby(by)["Choice"].value_counts(normalize=True).unstack()`` for
+        simulated data `df`.
+
+    """
+    probabilities = distribution[[f"Choice_Probability_{s}" for s in "NPF"]]
+    weighted = probabilities.mul(distribution["Mass"], axis=0)
+    weighted.columns = pd.Index(range(NUM_CHOICES), name="Choice")
+
+    counts = weighted.groupby([distribution[label] for label in np.atleast_1d(by)])
+    counts = counts.sum()
+
+    return counts.div(counts.sum(axis=1), axis=0)
+
+
+def calculate_choice_probabilities(
+    model_spec,
+    draws,
+    states,
+    emaxs,
+    covariates,
+    log_wage_systematic,
+    non_consumption_utilities,
+    non_employment_consumption_resources,
+):
+    """Calculate the probability of each choice in each state.
+
+    Returns
+    -------
+    choice_probabilities : np.ndarray
+        Array with shape (num_states, 3) containing the share of the draws in the
+        period of the state in which the respective choice is optimal.
+
+    """
+    with KERNEL_LOCK:
+        return _calculate_choice_probabilities(
+            draws,
+            states,
+            emaxs,
+            covariates,
+            log_wage_systematic,
+            non_consumption_utilities,
+            non_employment_consumption_resources,
+            HOURS,
+            model_spec.ssc_deductions,
+            model_spec.tax_params,
+            model_spec.tax_splitting,
+            np.asarray(model_spec.child_care_costs, dtype=np.float64),
+            model_spec.mu,
+            model_spec.delta,
+        )
+
+
+@numba.njit(parallel=True, cache=True)
+def _calculate_choice_probabilities(
+    draws,
+    states,
+    emaxs,
+    covariates,
+    log_wage_systematic,
+    non_consumption_utilities,
+    non_employment_consumption_resources,
+    hours,
+    deductions_spec,
+    income_tax_spec,
+    tax_splitting,
+    child_care_costs,
+    mu,
+    delta,
+):
+    num_draws = draws.shape[1]
+    choice_probabilities = np.zeros((states.shape[0], NUM_CHOICES))
+
+    for idx in numba.prange(states.shape[0]):
+        period = states[idx, 0]
+
+        for i in range(num_draws):
+            choice = 0
+            current_max = 0.0
+            for j in range(NUM_CHOICES):
+                wage = 0.0
+                if j > 0:
+                    wage = np.exp(log_wage_systematic[idx] + draws[period, i, j - 1])
+
+                value_function = (
+                    calculate_flow_utility(
+                        j,
+                        wage,
+                        covariates[idx],
+                        non_consumption_utilities[idx, j],
+                        non_employment_consumption_resources[idx],
+                        hours,
+                        deductions_spec,
+                        income_tax_spec,
+                        tax_splitting,
+                        child_care_costs,
+                        mu,
+                    )
+                    + delta * emaxs[idx, j]
+                )
+
+                # As in the simulation, the first missing value is the maximum
+                if j == 0:
+                    current_max = value_function
+                elif value_function > current_max or (
+                    np.isnan(value_function) and not np.isnan(current_max)
+                ):
+                    choice = j
+                    current_max = value_function
+
+            choice_probabilities[idx, choice] += 1
+
+        choice_probabilities[idx] /= num_draws
+
+    return choice_probabilities
+
+
+def get_initial_mass(
+    model_params,
+    model_spec,
+    indexer,
+    num_states,
+    prob_educ_level,
+    prob_child_age,
+    prob_partner_present,
+    prob_exp_ft,
+    prob_exp_pt,
+):
+    """Compute the share of the population entering the model in each state.
+
+    The initial conditions are distributed as in :func:`draw_initial_states`. Agents
+    enter in the period equal to the years of education of their education level.
+    Agents entering after the last period are not part of the population.
+
+    """
+    outcomes, probs = get_initial_distribution(
+        model_params,
+        model_spec,
+        prob_educ_level,
+        prob_child_age,
+        prob_partner_present,
+        prob_exp_ft,
+        prob_exp_pt,
+    )
+    is_entering = (probs > 0) & (outcomes[:, 0] < model_spec.num_periods)
+
+    state_indexes = indexer[tuple(outcomes[is_entering].T)]
+
+    return np.bincount(state_indexes, probs[is_entering], minlength=num_states)
+
+
+def propagate_mass(
+    initial_mass,
+    choice_probabilities,
+    model_spec,
+    states,
+    child_state_indexes,
+    prob_child,
+    prob_partner,
+):
+    """Push the share of the population in each state forward through the periods.
+
+    The mass of each state is split by the choice probabilities and the probabilities
+    of the arrival of a child and of the partner status in the next period, and added
+    to the corresponding states in the next period. The exogenous processes follow the
+    same probabilities as in :func:`simulate_agents`.
+
+    Returns
+    -------
+    mass : np.ndarray
+        Share of the population in each state.
+
+    """
+    mass = initial_mass.copy()
+
+    for period in range(model_spec.num_periods - 1):
+        in_period = np.flatnonzero(states[:, 0] == period)
+        educ_level = states[in_period, 1]
+        partner = states[in_period, 7]
+
+        prob_kids = np.zeros((in_period.shape[0], 2))
+        if period <= model_spec.last_child_bearing_period:
+            prob_kids[:, 1] = prob_child[period + 1, educ_level]
+        prob_kids[:, 0] = 1 - prob_kids[:, 1]
+
+        prob_partner_period = prob_partner[period, educ_level]
+        prob_partner_next = np.empty((in_period.shape[0], 2))
+        prob_partner_next[:, 1] = np.where(
+            partner == 0, prob_partner_period[:, 0, 1], 1 - prob_partner_period[:, 1, 0]
+        )
+        prob_partner_next[:, 0] = 1 - prob_partner_next[:, 1]
+
+        weights = (
+            mass[in_period, None, None, None]
+            * choice_probabilities[in_period, :, None, None]
+            * prob_kids[:, None, :, None]
+            * prob_partner_next[:, None, None, :]
+        )
+        is_positive = weights > 0
+        mass += np.bincount(
+            child_state_indexes[in_period][is_positive],
+            weights[is_positive],
+            minlength=mass.shape[0],
+        )
+
+    return mass
@@ -0,0 +1,286 @@
+"""This module contains the compiled kernel of the simulation.
+
+The kernel simulates one period for all agents in the model. Each agent is represented
+by the index of her state in the state space. The kernel computes the consumption
+resources, the flow utilities and the value functions, determines the choice, and
+moves the agent to the state of the next period according to the choice and the
+exogenous processes. The random draws are taken before the kernel is called.
+"""
+import numba
+import numpy as np
+
+from soepy.shared.shared_auxiliary import KERNEL_LOCK
+from soepy.shared.shared_constants import DATA_DTYPE_SIM
+from soepy.shared.tax_and_transfers import calculate_net_income
+
+# Placeholders passed to the kernel for the columns which are not stored
+_NOT_STORED = {
+    label: np.empty(0, dtype=DATA_DTYPE_SIM[label]) for label in DATA_DTYPE_SIM.names
+}
+
+
+def simulate_period(
+    period,
+    identifiers,
+    state_indexes,
+    shocks,
+    kids_draw,
+    new_partner_status,
+    model_spec,
+    states,
+    child_state_indexes,
+    emaxs,
+    covariates,
+    log_wage_systematic,
+    non_consumption_utilities,
+    non_employment_consumption_resources,
+    hours,
+    columns,
+    values,
+):
+    """Simulate one period for all agents in the model.
+
+    See :func:`_simulate_period` for the arguments. The indexes in `state_indexes`
+    are updated in place. The experiences are written to `columns`, a dictionary
+    with the columns of the simulated data for the agents in the period. Columns
+    which are not in the dictionary are not stored.
+
+    """
+    with KERNEL_LOCK:
+        _simulate_period(
+            period,
+            model_spec.num_periods,
+            identifiers,
+            state_indexes,
+            shocks,
+            kids_draw,
+            new_partner_status,
+            states,
+            child_state_indexes,
+            emaxs,
+            covariates,
+            log_wage_systematic,
+            non_consumption_utilities,
+            non_employment_consumption_resources,
+            hours,
+            model_spec.ssc_deductions,
+            model_spec.tax_params,
+            model_spec.tax_splitting,
+            np.asarray(model_spec.child_care_costs, dtype=np.float64),
+            model_spec.mu,
+            model_spec.delta,
+            tuple(
+                columns.get(label, _NOT_STORED[label]) for label in DATA_DTYPE_SIM.names
+            ),
+            np.array([label in columns for label in DATA_DTYPE_SIM.names]),
+            values,
+        )
+
+
+@numba.njit(parallel=True, cache=True)
+def _simulate_period(
+    period,
+    num_periods,
+    identifiers,
+    state_indexes,
+    shocks,
+    kids_draw,
+    new_partner_status,
+    states,
+    child_state_indexes,
+    emaxs,
+    covariates,
+    log_wage_systematic,
+    non_consumption_utilities,
+    non_employment_consumption_resources,
+    hours,
+    deductions_spec,
+    income_tax_spec,
+    tax_splitting,
+    child_care_costs,
+    mu,
+    delta,
+    columns,
+    is_stored,
+    values,
+):
+    """Simulate one period for all agents in the model.
+
+    Parameters
+    ----------
+    period : int
+        Current period.
+    num_periods : int
+        Number of periods. Agents do not move to a new state in the last period.
+    identifiers : np.ndarray
+        Identifiers of the agents.
+    state_indexes : np.ndarray
+        Index of the current state of each agent in `states`.
+    shocks : np.ndarray
+        Array with shape (num_agents, 2) containing the wage shocks.
+    kids_draw : np.ndarray
+        Indicator whether a child arrives in the next period. It must be zero in the
+        periods in which no child can arrive.
+    new_partner_status : np.ndarray
+        Partner indicator in the next period.
+    child_state_indexes : np.ndarray
+        Array with shape (num_states, 3, 2, 2) containing the index of the state in the
+        next period by choice, arrival of a child, and partner status.
+    columns : tuple
+        Arrays for the columns of :data:`DATA_DTYPE_SIM` in the same order, which are
+        filled with the experiences of the agents in the period.
+    is_stored : np.ndarray
+        Indicator for each column whether it is stored. The arrays of the other
+        columns are placeholders.
+    values : np.ndarray
+        Array with shape (num_agents, 15) used as scratch space for the wages and the
+        utilities of all choices.
+
+    """
+    for i in numba.prange(state_indexes.shape[0]):
+        idx = state_indexes[i]
+
+        choice = 0
+        for j in range(3):
+            wage = 0.0
+            if j > 0:
+                wage = np.exp(log_wage_systematic[idx] + shocks[i, j - 1])
+                values[i, j] = wage
+
+            flow_utility = calculate_flow_utility(
+                j,
+                wage,
+                covariates[idx],
+                non_consumption_utilities[idx, j],
+                non_employment_consumption_resources[idx],
+                hours,
+                deductions_spec,
+                income_tax_spec,
+                tax_splitting,
+                child_care_costs,
+                mu,
+            )
+            continuation_value = emaxs[idx, j]
+            value_function = flow_utility + delta * continuation_value
+
+            values[i, 3 + j] = non_consumption_utilities[idx, j]
+            values[i, 6 + j] = flow_utility
+            values[i, 9 + j] = continuation_value
+            values[i, 12 + j] = value_function
+
+            # Determine choice as option with highest choice specific value function.
+            # As in np.argmax, the first missing value is the maximum.
+            current_max = values[i, 12 + choice]
+            if value_function > current_max or (
+                np.isnan(value_function) and not np.isnan(current_max)
+            ):
+                choice = j
+
+        # Record period experiences. The columns have different data types and
+        # are hence indexed with constants.
+        if is_stored[0]:
+            columns[0][i] = identifiers[i]
+        if is_stored[1]:
+            columns[1][i] = states[idx, 0]
+        if is_stored[2]:
+            columns[2][i] = states[idx, 1]
+        if is_stored[3]:
+            columns[3][i] = states[idx, 2]
+        if is_stored[4]:
+            columns[4][i] = states[idx, 3]
+        if is_stored[5]:
+            columns[5][i] = states[idx, 4]
+        if is_stored[6]:
+            columns[6][i] = states[idx, 5]
+        if is_stored[7]:
+            columns[7][i] = states[idx, 6]
+        if is_stored[8]:
+            columns[8][i] = states[idx, 7]
+        if is_stored[9]:
+            columns[9][i] = choice
+        if is_stored[10]:
+            columns[10][i] = log_wage_systematic[idx]
+        if is_stored[11]:
+            columns[11][i] = values[i, 1]
+        if is_stored[12]:
+            columns[12][i] = values[i, 2]
+        if is_stored[13]:
+            columns[13][i] = values[i, 3]
+        if is_stored[14]:
+            columns[14][i] = values[i, 4]
+        if is_stored[15]:
+            columns[15][i] = values[i, 5]
+        if is_stored[16]:
+            columns[16][i] = values[i, 6]
+        if is_stored[17]:
+            columns[17][i] = values[i, 7]
+        if is_stored[18]:
+            columns[18][i] = values[i, 8]
+        if is_stored[19]:
+            columns[19][i] = values[i, 9]
+        if is_stored[20]:
+            columns[20][i] = values[i, 10]
+        if is_stored[21]:
+            columns[21][i] = values[i, 11]
+        if is_stored[22]:
+            columns[22][i] = values[i, 12]
+        if is_stored[23]:
+            columns[23][i] = values[i, 13]
+        if is_stored[24]:
+            columns[24][i] = values[i, 14]
+        if is_stored[25]:
+            columns[25][i] = covariates[idx, 1]
+        if is_stored[26]:
+            if choice == 0:
+                columns[26][i] = np.nan
+            else:
+                columns[26][i] = values[i, choice]
+
+        # Move to the state in the next period according to choice and exogenous
+        # processes
+        if period < num_periods - 1:
+            state_indexes[i] = child_state_indexes[
+                idx, choice, kids_draw[i], new_partner_status[i]
+            ]
+
+
+@numba.njit(cache=True)
+def calculate_flow_utility(
+    choice,
+    wage,
+    covariates,
+    non_consumption_utility,
+    non_employment_consumption_resources,
+    hours,
+    deductions_spec,
+    income_tax_spec,
+    tax_splitting,
+    child_care_costs,
+    mu,
+):
+    """Calculate the flow utility of a choice given the wage of the agent.
+
+    The covariates are the ones of the agent's state, i.e., the child care bin, the
+    male wage, the equivalence scale, and the child benefits.
+
+    """
+    child_bin = int(covariates[0])
+
+    if choice == 0:
+        consumption_resources = non_employment_consumption_resources
+    else:
+        consumption_resources = calculate_net_income(
+            income_tax_spec,
+            deductions_spec,
+            hours[choice] * wage,
+            covariates[1],
+            tax_splitting,
+        )
+        consumption_resources += covariates[3]
+        if child_bin == 1 or child_bin == 2:
+            consumption_resources -= child_care_costs[child_bin, choice - 1]
+
+    # Ensure positivity
+    consumption_resources = max(consumption_resources, np.finfo(np.float64).eps)
+
+    return (consumption_resources / covariates[2]) ** mu / mu * non_consumption_utility
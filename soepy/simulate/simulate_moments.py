@@ -0,0 +1,311 @@
+"""This module aggregates moments of the simulated data while it is simulated.
+
+Moments are specified as a dictionary mapping the name of each moment to its
+specification, e.g.,
+
+.. code-block:: python
+
+    moments = {
+        "choice_shares": {"statistic": "share", "variable": "Choice",
+                          "by": ["Period", "Education_Level"]},
+        "transitions": {"statistic": "share", "variable": "Choice",
+                        "by": ["Lagged_Choice"]},
+        "wage_mean": {"statistic": "mean", "variable": "Wage_Observed",
+                      "by": ["Experience_Full_Time"],
+                      "bins": {"Experience_Full_Time": [0, 5, 10]}},
+    }
+
+The statistic "share" computes the shares of the values of an integer column within
+each group, "mean" and "var" compute the mean and the sample variance of a column
+ignoring missing values. The groups are given by the columns in "by". Columns in
+"bins" are grouped by the largest edge not larger than the value. Rows with values
+below the first edge are ignored.
+"""
+import numpy as np
+import pandas as pd
+
+from soepy.simulate.simulate_output import get_output_dtype
+
+MOMENT_STATISTICS = ["share", "mean", "var"]
+
+
+class MomentAccumulator:
+    """Accumulate a moment over blocks of simulated data with running sums.
+
+    The blocks are reduced to sums by group, which are merged into the sums of the
+    previous blocks. The means and variances are merged with the pairwise update of
+    Chan et al. (1979).
+
+    Parameters
+    ----------
+    statistic : str
+        One of :data:`MOMENT_STATISTICS`.
+    variable : str
+        Column of the simulated data the statistic is computed for.
+    by : list, optional
+        Columns defining the groups.
+    bins : dict, optional
+        Dictionary mapping columns in `by` to the edges of their bins.
+
+    """
+
+    def __init__(self, statistic, variable, by=None, bins=None):
+        if statistic not in MOMENT_STATISTICS:
+            raise NotImplementedError(f"Statistic {statistic} not implemented.")
+
+        self.statistic = statistic
+        self.variable = variable
+        self.by = [] if by is None else list(by)
+        self.bins = {} if bins is None else bins
+
+        # Check the columns
+        get_output_dtype(self.columns)
+
+        self.slots = {}
+        self.count = np.zeros(0)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+
+    @property
+    def columns(self):
+        """Columns of the simulated data required by the moment."""
+        return list(dict.fromkeys(self.by + [self.variable]))
+
+    def update(self, data):
+        """Add a block of simulated data given as a mapping from columns to arrays."""
+        keys = []
+        is_valid = np.ones(len(data[self.variable]), dtype=np.bool_)
+        for label in self.by:
+            values, is_in_bin = _group_values(data[label], self.bins.get(label))
+            keys.append(values)
+            is_valid &= is_in_bin
+
+        values = np.asarray(data[self.variable])
+        if self.statistic == "share":
+            keys.append(values)
+            values = np.ones(len(values))
+        else:
+            values = values.astype(np.float64)
+
+        unique_keys, inverse = _encode_groups(
+            [key[is_valid] for key in keys], is_valid.sum()
+        )
+        values = values[is_valid]
+        slots = self._get_slots(unique_keys)
+
+        # Moments of the block by group, ignoring missing values
+        is_observed = ~np.isnan(values)
+        count = np.bincount(inverse[is_observed], minlength=len(unique_keys))
+        total = np.bincount(
+            inverse[is_observed], values[is_observed], minlength=len(unique_keys)
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, total / count, 0.0)
+        m2 = np.bincount(
+            inverse[is_observed],
+            (values[is_observed] - mean[inverse[is_observed]]) ** 2,
+            minlength=len(unique_keys),
+        )
+
+        # Merge with the moments of the previous blocks
+        count_merged = self.count[slots] + count
+        delta = mean - self.mean[slots]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = np.where(count_merged > 0, count / count_merged, 0.0)
+        self.mean[slots] += delta * weight
+        self.m2[slots] += m2 + delta ** 2 * self.count[slots] * weight
+        self.count[slots] = count_merged
+
+    def result(self):
+        """Compute the moment from the accumulated sums.
+
+        Returns
+        -------
+        moment : pd.DataFrame, pd.Series, or float
+            For shares, a data frame with the groups as index and the values of the
+            variable as columns. Otherwise, a series with the groups as index. Without
+            groups, the shares are a series and the other statistics a float.
+
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if self.statistic == "share":
+                values = self.count
+            elif self.statistic == "mean":
+                values = np.where(self.count > 0, self.mean, np.nan)
+            else:
+                values = np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+        names = self.by + ([self.variable] if self.statistic == "share" else [])
+        if not names:
+            return float(values[0]) if values.size else np.nan
+
+        keys = np.array(list(self.slots), dtype=np.float64).reshape(-1, len(names))
+        index = pd.MultiIndex.from_arrays(
+            [_as_integer(level) for level in keys.T], names=names
+        )
+        moment = pd.Series(values, index=index, name=self.variable).sort_index()
+
+        if self.statistic == "share":
+            if self.by:
+                moment = moment.unstack(self.variable, fill_value=0)
+                moment = moment.div(moment.sum(axis=1), axis=0)
+            else:
+                moment = moment / moment.sum()
+
+        if moment.index.nlevels == 1:
+            moment.index = moment.index.get_level_values(0)
+
+        return moment
+
+    def _get_slots(self, keys):
+        """Look up the positions of the groups in the running sums."""
+        slots = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(map(tuple, keys.tolist())):
+            slots[i] = self.slots.setdefault(key, len(self.slots))
+
+        num_new = len(self.slots) - len(self.count)
+        if num_new > 0:
+            self.count = np.append(self.count, np.zeros(num_new))
+            self.mean = np.append(self.mean, np.zeros(num_new))
+            self.m2 = np.append(self.m2, np.zeros(num_new))
+
+        return slots
+
+
+def accumulate_moments(blocks, moments):
+    """Accumulate moments over blocks of simulated data.
+
+    Parameters
+    ----------
+    blocks : iterable
+        Mappings from columns to arrays, e.g., the periods yielded by
+        :func:`pyth_simulate_periods`.
+    moments : dict
+        Dictionary mapping the names of the moments to their specification. See the
+        module docstring.
+
+    Returns
+    -------
+    results : dict
+        Dictionary mapping the names of the moments to their values.
+
+    """
+    accumulators = {name: MomentAccumulator(**spec) for name, spec in moments.items()}
+
+    for block in blocks:
+        for accumulator in accumulators.values():
+            accumulator.update(block)
+
+    return {name: accumulator.result() for name, accumulator in accumulators.items()}
+
+
+def stack_moments(results):
+    """Stack moments into a long data frame with one row per value.
+
+    Parameters
+    ----------
+    results : dict
+        Dictionary mapping the names of the moments to their values as returned by
+        :func:`accumulate_moments`.
+
+    Returns
+    -------
+    stacked : pd.DataFrame
+        Data frame with the column "Moment", the columns of the groups and of the
+        values of shares, and the column "Value". Columns which do not apply to a
+        moment are missing.
+
+    """
+    frames = []
+    for name, moment in results.items():
+        if isinstance(moment, pd.DataFrame):
+            moment = moment.stack()
+        if isinstance(moment, pd.Series):
+            frame = moment.rename("Value").reset_index()
+        else:
+            frame = pd.DataFrame({"Value": [moment]})
+        frame.insert(0, "Moment", name)
+        frames.append(frame)
+
+    stacked = pd.concat(frames, ignore_index=True)
+    columns = [label for label in stacked.columns if label not in ["Moment", "Value"]]
+
+    return stacked[["Moment", *columns, "Value"]]
+
+
+def get_moment_columns(moments):
+    """Collect the columns of the simulated data required by the moments."""
+    columns = []
+    for spec in moments.values():
+        columns += spec.get("by", []) + [spec["variable"]]
+
+    return list(dict.fromkeys(columns))
+
+
+def _encode_groups(keys, num_rows):
+    """Encode the groups of rows defined by several key columns.
+
+    Returns
+    -------
+    unique_keys : np.ndarray
+        Array with shape (num_groups, num_keys) containing the keys of the groups.
+    inverse : np.ndarray
+        Group of each row.
+
+    """
+    if not keys:
+        return np.empty((min(num_rows, 1), 0)), np.zeros(num_rows, dtype=np.int64)
+
+    levels, codes = zip(*map(_factorize, keys))
+    dims = [len(level) for level in levels]
+
+    unique_combined, inverse = _factorize(np.ravel_multi_index(codes, dims))
+
+    unique_keys = np.empty((len(unique_combined), len(keys)))
+    for j, code in enumerate(np.unravel_index(unique_combined, dims)):
+        unique_keys[:, j] = levels[j][code]
+
+    return unique_keys, inverse
+
+
+def _factorize(values):
+    """Map values to the codes 0, 1, ... of their sorted unique values.
+
+    Integral values with a small range are counted instead of sorted.
+
+    """
+    if values.dtype.kind == "f" and np.all(np.mod(values, 1) == 0):
+        values = values.astype(np.int64)
+
+    if values.dtype.kind not in "iu" or values.size == 0:
+        return np.unique(values, return_inverse=True)
+
+    low = values.min()
+    offsets = values.astype(np.int64) - low
+    size = int(offsets.max()) + 1
+    if size > 4 * values.size:
+        return np.unique(values, return_inverse=True)
+
+    is_present = np.bincount(offsets, minlength=size) > 0
+    codes = np.cumsum(is_present) - 1
+
+    return np.flatnonzero(is_present) + low, codes[offsets]
+
+
+def _as_integer(values):
+    """Convert values to integers if they are all integral."""
+    if np.all(np.mod(values, 1) == 0):
+        return values.astype(np.int64)
+    return values
+
+
+def _group_values(values, edges):
+    """Map values to their group and indicate whether they fall into a bin."""
+    values = np.asarray(values)
+    if edges is None:
+        return values, np.ones(len(values), dtype=np.bool_)
+
+    edges = np.asarray(edges)
+    bins = np.searchsorted(edges, values, side="right") - 1
+
+    return edges[np.maximum(bins, 0)], bins >= 0
@@ -0,0 +1,209 @@
+"""This module writes the simulated data to disk while it is simulated."""
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from soepy.shared.shared_constants import DATA_DTYPE_SIM
+from soepy.shared.shared_constants import DATA_FORMATS_SIM_COMPACT
+
+# Number of bytes reserved for the header of each column file. The header is written
+# once the number of rows is known.
+NPY_HEADER_SIZE = 128
+
+FILE_FORMATS = ["npy", "feather", "parquet"]
+
+
+def write_simulated_data(
+    blocks, path, file_format="npy", columns=None, compact=True, float32=False
+):
+    """Write blocks of simulated data to disk as they are produced.
+
+    Parameters
+    ----------
+    blocks : iterable
+        Structured arrays with the columns of the simulated data, e.g., the periods
+        yielded by :func:`pyth_simulate_periods` with `as_frame=False`.
+    path : str or pathlib.Path
+        Location of the output.
+    file_format : str
+        One of :data:`FILE_FORMATS`. With "npy", `path` is a directory containing one
+        `.npy` file per column, which can be memory-mapped with
+        :func:`load_simulated_data`. With "feather", `path` is an uncompressed Arrow
+        IPC file, which can be memory-mapped with `pyarrow.memory_map`. With "parquet",
+        each block is written as a row group. The latter two require `pyarrow`.
+    columns : list, optional
+        Columns to write. Defaults to all columns.
+    compact : bool
+        If True, the states and the choice are stored as small integers.
+    float32 : bool
+        If True, the float columns are stored in single precision.
+
+    Returns
+    -------
+    num_rows : int
+        Number of rows written to disk.
+
+    """
+    dtype = get_output_dtype(columns, compact, float32)
+
+    if file_format == "npy":
+        writer = _NpyWriter(path, dtype)
+    elif file_format in ["feather", "parquet"]:
+        writer = _ArrowWriter(path, dtype, file_format)
+    else:
+        raise NotImplementedError(f"File format {file_format} not implemented.")
+
+    # The output is only completed once all blocks are written. Otherwise, it is
+    # removed, such that a truncated panel cannot be mistaken for a complete one.
+    num_rows = 0
+    try:
+        for block in blocks:
+            writer.write(block)
+            num_rows += block.shape[0]
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close(num_rows)
+
+    return num_rows
+
+
+def load_simulated_data(path, columns=None):
+    """Memory-map the columns of simulated data written in the "npy" format.
+
+    Returns
+    -------
+    data : dict
+        Dictionary mapping each column to a read-only memory-mapped array.
+
+    """
+    path = Path(path)
+    if columns is None:
+        columns = [
+            label for label in DATA_DTYPE_SIM.names if (path / f"{label}.npy").exists()
+        ]
+
+    return {label: np.load(path / f"{label}.npy", mmap_mode="r") for label in columns}
+
+
+def get_output_dtype(columns=None, compact=True, float32=False):
+    """Construct the structured data type of the simulated data written to disk."""
+    if columns is None:
+        columns = list(DATA_DTYPE_SIM.names)
+
+    unknown = [label for label in columns if label not in DATA_DTYPE_SIM.names]
+    if unknown:
+        raise ValueError(f"Unknown columns of simulated data: {unknown}.")
+    if not columns:
+        raise ValueError("At least one column of simulated data is required.")
+
+    dtype = []
+    for label in DATA_DTYPE_SIM.names:
+        if label not in columns:
+            continue
+        if label in DATA_FORMATS_SIM_COMPACT:
+            format_ = DATA_FORMATS_SIM_COMPACT[label] if compact else np.int64
+        else:
+            format_ = np.float32 if float32 else np.float64
+        dtype.append((label, format_))
+
+    return np.dtype(dtype)
+
+
+class _NpyWriter:
+    """Append the columns of each block to one `.npy` file per column."""
+
+    def __init__(self, path, dtype):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dtype = dtype
+        self.files = {}
+        try:
+            for label in dtype.names:
+                self.files[label] = open(self.path / f"{label}.npy", "wb")
+                self.files[label].write(b"\x00" * NPY_HEADER_SIZE)
+        except BaseException:
+            self.abort()
+            raise
+
+    def write(self, block):
+        for label, file in self.files.items():
+            file.write(block[label].astype(self.dtype[label]).tobytes())
+
+    def close(self, num_rows):
+        for label, file in self.files.items():
+            file.seek(0)
+            _write_npy_header(file, self.dtype[label], num_rows)
+            file.close()
+
+    def abort(self):
+        """Close and remove the column files without writing their headers."""
+        for label, file in self.files.items():
+            file.close()
+            _remove_file(self.path / f"{label}.npy")
+
+
+class _ArrowWriter:
+    """Write each block as a record batch of an Arrow IPC or a Parquet file."""
+
+    def __init__(self, path, dtype, file_format):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError(f"Writing {file_format} files requires pyarrow.")
+
+        self.pa = pa
+        self.path = Path(path)
+        self.dtype = dtype
+        self.schema = pa.schema(
+            [(label, pa.from_numpy_dtype(dtype[label])) for label in dtype.names]
+        )
+        if file_format == "feather":
+            self.writer = pa.ipc.new_file(str(path), self.schema)
+        else:
+            self.writer = pq.ParquetWriter(str(path), self.schema)
+
+    def write(self, block):
+        batch = self.pa.RecordBatch.from_arrays(
+            [
+                self.pa.array(block[label].astype(self.dtype[label]))
+                for label in self.dtype.names
+            ],
+            schema=self.schema,
+        )
+        self.writer.write_table(self.pa.Table.from_batches([batch]))
+
+    def close(self, num_rows):
+        self.writer.close()
+
+    def abort(self):
+        """Close and remove the incomplete file."""
+        self.writer.close()
+        _remove_file(self.path)
+
+
+def _remove_file(path):
+    """Remove a file if it exists."""
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _write_npy_header(file, dtype, num_rows):
+    """Write a version 1.0 header of the `.npy` format padded to a fixed size."""
+    header = repr(
+        {
+            "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+            "fortran_order": False,
+            "shape": (num_rows,),
+        }
+    )
+    preamble = np.lib.format.magic(1, 0)
+    header_len = NPY_HEADER_SIZE - len(preamble) - 2
+
+    file.write(preamble)
+    file.write(struct.pack("<H", header_len))
+    file.write(header.ljust(header_len - 1).encode("latin1") + b"\n")
@@ -0,0 +1,390 @@
+"""This module simulates agents in parallel chunks with independent random streams."""
+import collections
+import concurrent.futures
+import functools
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from soepy.shared.shared_constants import DATA_DTYPE_SIM
+from soepy.simulate.initial_states import InitialStatesSampler
+from soepy.simulate.random_draws import CounterDraws
+from soepy.simulate.random_draws import SequentialDraws
+from soepy.simulate.simulate_auxiliary import get_utility_components
+from soepy.simulate.simulate_auxiliary import simulate_agents
+from soepy.solve.create_state_space import create_child_indexes
+
+# Number of agents that share one random number generator. The simulated data depends
+# on the chunk size, but not on the number of workers, unless counter-based draws are
+# used.
+CHUNK_SIZE = 50_000
+
+# Number of chunks per worker which are submitted to the pool ahead of their
+# consumption. It bounds the number of simulated chunks held in memory.
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# Simulation of a chunk in the worker processes
+_WORKER_SIMULATE_CHUNK = None
+
+
+def pyth_simulate_parallel(
+    model_params,
+    model_spec,
+    states,
+    indexer,
+    emaxs,
+    covariates,
+    non_employment_consumption_resources,
+    child_age_update_rule,
+    prob_educ_level,
+    prob_child_age,
+    prob_partner_present,
+    prob_exp_ft,
+    prob_exp_pt,
+    prob_child,
+    prob_partner,
+    is_expected,
+    num_workers=1,
+    chunk_size=CHUNK_SIZE,
+    use_processes=False,
+    counter_based=False,
+    identifiers=None,
+    child_state_indexes=None,
+    columns=None,
+    utility_components=None,
+    initial_states_sampler=None,
+):
+    """Simulate agent experiences in chunks of agents on a pool of workers.
+
+    The agents are split into chunks of `chunk_size` agents. Each chunk draws its
+    initial conditions, wage shocks, and exogenous events from its own generator,
+    which is spawned from a :class:`numpy.random.SeedSequence` seeded with
+    `model_spec.seed_sim`. The initial states are sampled with the alias method of
+    :class:`InitialStatesSampler`. The chunks are simulated against the shared solution and
+    merged in the order of periods and identifiers. Hence, the simulated data is
+    identical for any number of workers. It differs from :func:`pyth_simulate`, which
+    draws from the global random number generator.
+
+    With counter-based draws, every draw of an agent is a function of the seed, the
+    identifier, the period, and the type of event. The simulated data then neither
+    depends on the chunk size, and any subset of agents is simulated exactly as in a
+    simulation of all agents.
+
+    Parameters
+    ----------
+    num_workers : int
+        Number of threads or processes simulating chunks concurrently.
+    chunk_size : int
+        Number of agents per chunk.
+    use_processes : bool
+        If True, the chunks are simulated in a process pool instead of a thread pool.
+    counter_based : bool
+        If True, the draws are taken from a :class:`CounterDraws` generator.
+    identifiers : np.ndarray, optional
+        Identifiers of the agents to simulate. Defaults to all agents. Only available
+        with counter-based draws.
+    child_state_indexes : np.ndarray, optional
+        Indexes of the states in the next period. They are created if not given.
+    columns : list, optional
+        Columns of the simulated data. Defaults to all columns.
+    utility_components : tuple, optional
+        Utility components of the solution. See :func:`get_utility_components`.
+    initial_states_sampler : InitialStatesSampler, optional
+        Sampler of the initial states. It is created from the distributions of the
+        initial conditions if not given.
+
+    Returns
+    -------
+    dataset : pd.DataFrame
+        Simulated data with the same columns as returned by :func:`pyth_simulate`.
+
+    """
+    if columns is None:
+        columns = list(DATA_DTYPE_SIM.names)
+    elif "Identifier" not in columns:
+        raise ValueError("The parallel simulation requires the column 'Identifier'.")
+
+    if identifiers is None:
+        num_agents = model_spec.num_agents_sim
+    elif not counter_based:
+        raise ValueError("A subset of agents requires counter-based draws.")
+    else:
+        identifiers = np.unique(identifiers)
+        num_agents = identifiers.shape[0]
+
+    num_chunks = max(-(-num_agents // chunk_size), 1)
+    if counter_based:
+        seed_sequences = [None] * num_chunks
+    else:
+        seed_sequences = np.random.SeedSequence(model_spec.seed_sim).spawn(num_chunks)
+
+    tasks = [
+        (
+            seed_sequences[num_chunk],
+            num_chunk * chunk_size,
+            min((num_chunk + 1) * chunk_size, num_agents),
+        )
+        for num_chunk in range(num_chunks)
+    ]
+
+    simulate_chunk = partial_simulate_chunk(
+        model_params,
+        model_spec,
+        states,
+        indexer,
+        emaxs,
+        covariates,
+        non_employment_consumption_resources,
+        child_age_update_rule,
+        prob_educ_level,
+        prob_child_age,
+        prob_partner_present,
+        prob_exp_ft,
+        prob_exp_pt,
+        prob_child,
+        prob_partner,
+        is_expected,
+        child_state_indexes,
+        columns,
+        utility_components,
+        initial_states_sampler,
+        identifiers,
+    )
+
+    chunks = list(map_chunks(simulate_chunk, tasks, num_workers, use_processes))
+
+    periods = [sort_by_identifier(merge_columns(blocks)) for blocks in zip(*chunks)]
+    dataset = pd.DataFrame(merge_columns(periods), copy=False)
+
+    return dataset
+
+
+def partial_simulate_chunk(
+    model_params,
+    model_spec,
+    states,
+    indexer,
+    emaxs,
+    covariates,
+    non_employment_consumption_resources,
+    child_age_update_rule,
+    prob_educ_level,
+    prob_child_age,
+    prob_partner_present,
+    prob_exp_ft,
+    prob_exp_pt,
+    prob_child,
+    prob_partner,
+    is_expected,
+    child_state_indexes,
+    columns,
+    utility_components,
+    initial_states_sampler,
+    identifiers=None,
+):
+    """Prepare the simulation of chunks of agents against a shared solution.
+
+    Everything which does not depend on the agents of a chunk, i.e., the utility
+    components, the indexes of the states in the next period, and the sampler of the
+    initial states, is computed once and shared by all chunks.
+
+    Parameters
+    ----------
+    identifiers : np.ndarray, optional
+        Identifiers of the agents which the chunks are cut from. If not given, the
+        identifiers are the positions of the agents.
+
+    Returns
+    -------
+    simulate_chunk : functools.partial
+        Function of a seed sequence and the bounds `start` and `stop` of the positions
+        of the agents in a chunk which returns the columns of each period. See
+        :func:`_simulate_chunk`.
+
+    """
+    log_wage_systematic, non_consumption_utilities = get_utility_components(
+        model_params, model_spec, states, covariates, is_expected, utility_components
+    )
+
+    if child_state_indexes is None:
+        child_state_indexes = create_child_indexes(
+            states, indexer, model_spec, child_age_update_rule
+        )
+
+    if initial_states_sampler is None:
+        initial_states_sampler = InitialStatesSampler(
+            model_params,
+            model_spec,
+            prob_educ_level,
+            prob_child_age,
+            prob_partner_present,
+            prob_exp_ft,
+            prob_exp_pt,
+        )
+
+    # The model parameters and specification are namedtuples with classes created at
+    # runtime. They cannot be pickled and are sent to worker processes as dictionaries.
+    return functools.partial(
+        _simulate_chunk,
+        model_params=_dump_namedtuple(model_params),
+        model_spec=_dump_namedtuple(model_spec),
+        states=states,
+        indexer=indexer,
+        child_state_indexes=child_state_indexes,
+        emaxs=emaxs,
+        covariates=covariates,
+        log_wage_systematic=log_wage_systematic,
+        non_consumption_utilities=non_consumption_utilities,
+        non_employment_consumption_resources=non_employment_consumption_resources,
+        initial_states_sampler=initial_states_sampler,
+        prob_child=prob_child,
+        prob_partner=prob_partner,
+        columns=columns,
+        identifiers=identifiers,
+    )
+
+
+def map_chunks(simulate_chunk, tasks, num_workers=1, use_processes=False):
+    """Simulate chunks of agents on a pool of workers.
+
+    The solution is sent to each worker process once, when the process starts, and
+    the tasks only carry the seed sequence and the bounds of their chunk. The workers
+    of a thread pool share the solution. At most
+    :data:`CHUNKS_IN_FLIGHT_PER_WORKER` chunks per worker are submitted ahead of
+    their consumption, so only these chunks are held in memory.
+
+    Parameters
+    ----------
+    simulate_chunk : functools.partial
+        Function returned by :func:`partial_simulate_chunk`.
+    tasks : list
+        Tuples of the seed sequence and the bounds `start` and `stop` of the positions
+        of the agents of each chunk.
+
+    Yields
+    ------
+    blocks : list
+        Columns of each period of the chunks in the order of `tasks`.
+
+    """
+    if use_processes:
+        # The workers are spawned, as forking a process in which a parallel kernel
+        # ran is not safe with the tbb and omp threading layers of numba
+        executor = concurrent.futures.ProcessPoolExecutor(
+            num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_set_worker_simulate_chunk,
+            initargs=(simulate_chunk,),
+        )
+        simulate_chunk = _simulate_worker_chunk
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(num_workers)
+
+    max_in_flight = CHUNKS_IN_FLIGHT_PER_WORKER * num_workers
+    with executor:
+        futures = collections.deque()
+        for task in tasks:
+            if len(futures) == max_in_flight:
+                yield futures.popleft().result()
+            futures.append(executor.submit(simulate_chunk, *task))
+
+        while futures:
+            yield futures.popleft().result()
+
+
+def merge_columns(blocks):
+    """Concatenate the columns of several blocks of simulated data."""
+    return {
+        label: np.concatenate([block[label] for block in blocks]) for label in blocks[0]
+    }
+
+
+def sort_by_identifier(columns):
+    """Sort the rows of a block of simulated data by the agents' identifiers."""
+    order = np.argsort(columns["Identifier"], kind="stable")
+
+    return {label: column[order] for label, column in columns.items()}
+
+
+def _simulate_chunk(
+    seed_sequence,
+    start,
+    stop,
+    model_params,
+    model_spec,
+    states,
+    indexer,
+    child_state_indexes,
+    emaxs,
+    covariates,
+    log_wage_systematic,
+    non_consumption_utilities,
+    non_employment_consumption_resources,
+    initial_states_sampler,
+    prob_child,
+    prob_partner,
+    columns,
+    identifiers,
+):
+    """Simulate one chunk of agents and return the columns of each period.
+
+    The chunk consists of the agents at the positions `start` to `stop` in
+    `identifiers`, or of the agents with these identifiers if `identifiers` is None.
+    It draws from a sequential generator seeded with `seed_sequence` or, if
+    `seed_sequence` is None, from a counter-based generator.
+
+    """
+    model_params = _load_namedtuple(*model_params)
+    model_spec = _load_namedtuple(*model_spec)
+
+    if identifiers is None:
+        identifiers = np.arange(start, stop)
+    else:
+        identifiers = identifiers[start:stop]
+
+    if seed_sequence is None:
+        draws = CounterDraws(model_spec.seed_sim, model_params)
+        initial_states = initial_states_sampler.sample(
+            draws.initial_uniforms(identifiers), identifiers
+        )
+    else:
+        rng = np.random.default_rng(seed_sequence)
+        draws = SequentialDraws(rng, model_params)
+        initial_states = initial_states_sampler.draw(rng, identifiers)
+
+    blocks = simulate_agents(
+        initial_states,
+        draws,
+        model_spec,
+        states,
+        indexer,
+        child_state_indexes,
+        emaxs,
+        covariates,
+        log_wage_systematic,
+        non_consumption_utilities,
+        non_employment_consumption_resources,
+        prob_child,
+        prob_partner,
+        columns=columns,
+    )
+
+    return list(blocks)
+
+
+def _set_worker_simulate_chunk(simulate_chunk):
+    global _WORKER_SIMULATE_CHUNK
+    _WORKER_SIMULATE_CHUNK = simulate_chunk
+
+
+def _simulate_worker_chunk(seed_sequence, start, stop):
+    return _WORKER_SIMULATE_CHUNK(seed_sequence, start, stop)
+
+
+def _dump_namedtuple(namedtuple):
+    return type(namedtuple).__name__, namedtuple._asdict()
+
+
+def _load_namedtuple(typename, fields):
+    return collections.namedtuple(typename, fields)(**fields)
@@ -1,20 +1,396 @@
 from functools import partial
 
-from soepy.exogenous_processes.children import gen_prob_child_init_age_vector
-from soepy.exogenous_processes.children import gen_prob_child_vector
-from soepy.exogenous_processes.education import gen_prob_educ_level_vector
-from soepy.exogenous_processes.experience import gen_prob_init_exp_vector
-from soepy.exogenous_processes.partner import gen_prob_partner
-from soepy.exogenous_processes.partner import gen_prob_partner_present_vector
+from soepy.exogenous_processes.exogenous_model import ExogenousModel
 from soepy.pre_processing.model_processing import read_model_params_init
 from soepy.pre_processing.model_processing import read_model_spec_init
+from soepy.shared.shared_auxiliary import calculate_utility_components
+from soepy.simulate.initial_states import stack_initial_population
+from soepy.simulate.pipeline import Pipeline
+from soepy.simulate.simulate_auxiliary import get_utility_components
+from soepy.simulate.simulate_auxiliary import pyth_derive_columns
 from soepy.simulate.simulate_auxiliary import pyth_simulate
+from soepy.simulate.simulate_auxiliary import pyth_simulate_periods
+from soepy.simulate.simulate_distribution import pyth_simulate_distribution
+from soepy.simulate.simulate_moments import accumulate_moments
+from soepy.simulate.simulate_moments import get_moment_columns
+from soepy.simulate.simulate_output import write_simulated_data
+from soepy.simulate.simulate_parallel import CHUNK_SIZE
+from soepy.simulate.simulate_parallel import pyth_simulate_parallel
+from soepy.simulate.simulate_replications import pyth_simulate_replications
+from soepy.simulate.simulate_scenarios import run_scenarios
 from soepy.solve.create_state_space import create_state_space_objects
 from soepy.solve.solve_python import pyth_solve
 
 
-def simulate(model_params_init_file_name, model_spec_init_file_name, is_expected=True):
-    """Create a data frame of individuals' simulated experiences."""
+def simulate(
+    model_params_init_file_name,
+    model_spec_init_file_name,
+    is_expected=True,
+    float32=False,
+    columns=None,
+    initial_population=None,
+    exogenous_model=None,
+):
+    """Create a data frame of individuals' simulated experiences.
+
+    The states and the choice are stored as small integers. If `float32` is True, the
+    float columns are stored in single precision. If `columns` is given, only these
+    columns are stored. The columns which depend on the state only can be added later
+    with :func:`derive_columns`. If `initial_population` is given, the individuals are
+    simulated from their initial states in the population instead of drawing them.
+    See :func:`stack_initial_population` for its format. If `exogenous_model` is
+    given, the probabilities of the exogenous processes are taken from it instead of
+    the files in the model specification, see :class:`ExogenousModel`. The other
+    simulation functions accept it as well.
+
+    """
+
+    simulate_inputs, child_state_indexes, utility_components = _get_simulate_inputs(
+        model_params_init_file_name,
+        model_spec_init_file_name,
+        is_expected,
+        exogenous_model,
+    )
+    initial_states = _get_initial_states(initial_population, simulate_inputs)
+
+    # Simulate agents experiences according to parameters in the model specification
+    df = pyth_simulate(
+        *simulate_inputs,
+        is_expected=False,
+        child_state_indexes=child_state_indexes,
+        float32=float32,
+        columns=columns,
+        utility_components=utility_components,
+        initial_states=initial_states,
+    )
+
+    return df
+
+
+def simulate_periods(
+    model_params_init_file_name,
+    model_spec_init_file_name,
+    is_expected=True,
+    as_frame=True,
+    columns=None,
+    initial_population=None,
+    exogenous_model=None,
+):
+    """Yield individuals' simulated experiences one period at a time.
+
+    The blocks are identical to the rows of the respective period in the data frame
+    returned by :func:`simulate`. See :func:`pyth_simulate_periods` for details.
+
+    """
+
+    simulate_inputs, child_state_indexes, utility_components = _get_simulate_inputs(
+        model_params_init_file_name,
+        model_spec_init_file_name,
+        is_expected,
+        exogenous_model,
+    )
+    initial_states = _get_initial_states(initial_population, simulate_inputs)
+
+    yield from pyth_simulate_periods(
+        *simulate_inputs,
+        is_expected=False,
+        as_frame=as_frame,
+        child_state_indexes=child_state_indexes,
+        columns=columns,
+        utility_components=utility_components,
+        initial_states=initial_states,
+    )
+
+
+def simulate_to_file(
+    model_params_init_file_name,
+    model_spec_init_file_name,
+    path,
+    file_format="npy",
+    columns=None,
+    float32=False,
+    is_expected=True,
+    initial_population=None,
+    exogenous_model=None,
+):
+    """Write individuals' simulated experiences to disk while they are simulated.
+
+    Only one period of the simulated data is held in memory at a time. See
+    :func:`write_simulated_data` for the file formats and the remaining arguments.
+
+    Returns
+    -------
+    num_rows : int
+        Number of rows written to disk.
+
+    """
+
+    blocks = simulate_periods(
+        model_params_init_file_name,
+        model_spec_init_file_name,
+        is_expected=is_expected,
+        as_frame=False,
+        columns=columns,
+        initial_population=initial_population,
+        exogenous_model=exogenous_model,
+    )
+
+    return write_simulated_data(
+        blocks, path, file_format=file_format, columns=columns, float32=float32
+    )
+
+
+def simulate_moments(
+    model_params_init_file_name,
+    model_spec_init_file_name,
+    moments,
+    is_expected=True,
+    initial_population=None,
+    exogenous_model=None,
+):
+    """Compute moments of individuals' simulated experiences.
+
+    The moments are accumulated period by period while the agents are simulated, such
+    that the simulated panel is never held in memory. Only the columns required by the
+    moments are stored for the agents in the current period. See
+    :mod:`soepy.simulate.simulate_moments` for the specification of the moments.
+
+    Returns
+    -------
+    results : dict
+        Dictionary mapping the names of the moments to their values.
+
+    """
+
+    blocks = simulate_periods(
+        model_params_init_file_name,
+        model_spec_init_file_name,
+        is_expected=is_expected,
+        as_frame=False,
+        columns=get_moment_columns(moments),
+        initial_population=initial_population,
+        exogenous_model=exogenous_model,
+    )
+
+    return accumulate_moments(blocks, moments)
+
+
+def simulate_distribution(
+    model_params_init_file_name,
+    model_spec_init_file_name,
+    is_expected=True,
+    exogenous_model=None,
+):
+    """Compute the distribution of individuals over the states and choices.
+
+    The distribution of the initial conditions is propagated through the model
+    without sampling individuals. Choice shares are obtained with
+    :func:`get_choice_shares`. See :func:`pyth_simulate_distribution` for details.
+
+    """
+
+    simulate_inputs, child_state_indexes, utility_components = _get_simulate_inputs(
+        model_params_init_file_name,
+        model_spec_init_file_name,
+        is_expected,
+        exogenous_model,
+    )
+
+    distribution = pyth_simulate_distribution(
+        *simulate_inputs,
+        is_expected=False,
+        child_state_indexes=child_state_indexes,
+        utility_components=utility_components,
+    )
+
+    return distribution
+
+
+def simulate_parallel(
+    model_params_init_file_name,
+    model_spec_init_file_name,
+    num_workers=1,
+    chunk_size=CHUNK_SIZE,
+    use_processes=False,
+    counter_based=False,
+    identifiers=None,
+    is_expected=True,
+    columns=None,
+    exogenous_model=None,
+):
+    """Create a data frame of individuals' simulated experiences on a pool of workers.
+
+    The agents are simulated in chunks with independent random number streams. The
+    data frame is identical for any number of workers, but differs from the one
+    returned by :func:`simulate`. With counter-based draws, any subset of `identifiers`
+    can be simulated on its own. See :func:`pyth_simulate_parallel` for details.
+
+    """
+
+    simulate_inputs, child_state_indexes, utility_components = _get_simulate_inputs(
+        model_params_init_file_name,
+        model_spec_init_file_name,
+        is_expected,
+        exogenous_model,
+    )
+
+    df = pyth_simulate_parallel(
+        *simulate_inputs,
+        is_expected=False,
+        num_workers=num_workers,
+        chunk_size=chunk_size,
+        use_processes=use_processes,
+        counter_based=counter_based,
+        identifiers=identifiers,
+        child_state_indexes=child_state_indexes,
+        columns=columns,
+        utility_components=utility_components,
+    )
+
+    return df
+
+
+def simulate_replications(
+    model_params_init_file_name,
+    model_spec_init_file_name,
+    num_replications,
+    moments=None,
+    num_workers=1,
+    chunk_size=CHUNK_SIZE,
+    use_processes=False,
+    is_expected=True,
+    columns=None,
+    exogenous_model=None,
+):
+    """Simulate independent replications of individuals' experiences.
+
+    The model is solved once and all replications are simulated against the same
+    solution. If `moments` are given, the moments of each replication are returned
+    instead of the simulated data. See :func:`pyth_simulate_replications` for details.
+
+    """
+
+    simulate_inputs, child_state_indexes, utility_components = _get_simulate_inputs(
+        model_params_init_file_name,
+        model_spec_init_file_name,
+        is_expected,
+        exogenous_model,
+    )
+
+    results = pyth_simulate_replications(
+        *simulate_inputs,
+        is_expected=False,
+        num_replications=num_replications,
+        moments=moments,
+        num_workers=num_workers,
+        chunk_size=chunk_size,
+        use_processes=use_processes,
+        child_state_indexes=child_state_indexes,
+        columns=columns,
+        utility_components=utility_components,
+    )
+
+    return results
+
+
+def simulate_scenarios(
+    model_params_init_file_name,
+    model_spec_init_file_name,
+    scenarios,
+    moments,
+    num_workers=1,
+    use_processes=False,
+    is_expected=True,
+    exogenous_model=None,
+):
+    """Compute moments of individuals' simulated experiences for counterfactual
+    scenarios.
+
+    Each scenario overrides entries of the model specification, e.g., the parameters
+    of the tax and transfer system. The scenarios share the stages of the solution
+    which do not depend on the overridden entries and run concurrently. The moments of
+    each scenario are identical to the ones of :func:`simulate_moments` for its model
+    specification. See :func:`run_scenarios` for details.
+
+    """
+    pipeline = Pipeline(is_expected, exogenous_model)
+
+    results = run_scenarios(
+        pipeline,
+        model_params_init_file_name,
+        model_spec_init_file_name,
+        scenarios,
+        moments,
+        num_workers=num_workers,
+        use_processes=use_processes,
+    )
+
+    return results
+
+
+def derive_columns(
+    model_params_init_file_name,
+    model_spec_init_file_name,
+    data,
+    labels,
+    is_expected=True,
+    exogenous_model=None,
+):
+    """Derive columns of simulated data which only depend on the state.
+
+    The model is solved again, such that `data` can be simulated with only the
+    state space components and the choice. See :func:`pyth_derive_columns`.
+
+    Returns
+    -------
+    derived : dict
+        Dictionary mapping the labels to the derived columns.
+
+    """
+
+    simulate_inputs, _, utility_components = _get_simulate_inputs(
+        model_params_init_file_name,
+        model_spec_init_file_name,
+        is_expected,
+        exogenous_model,
+    )
+    (
+        model_params,
+        model_spec,
+        states,
+        indexer,
+        emaxs,
+        covariates,
+        non_employment_consumption_resources,
+    ) = simulate_inputs[:7]
+
+    # The simulation uses the human capital accumulation generated by the market
+    log_wage_systematic, non_consumption_utilities = get_utility_components(
+        model_params, model_spec, states, covariates, False, utility_components
+    )
+
+    return pyth_derive_columns(
+        data,
+        labels,
+        model_spec,
+        indexer,
+        emaxs,
+        covariates,
+        log_wage_systematic,
+        non_consumption_utilities,
+        non_employment_consumption_resources,
+    )
+
+
+def _get_simulate_inputs(
+    model_params_init_file_name,
+    model_spec_init_file_name,
+    is_expected,
+    exogenous_model=None,
+):
+    """Solve the model and collect the positional arguments of the simulation as well
+    as the indexes of the states in the next period and the utility components of the
+    solution."""
 
     # Read in model specification from yaml file
     model_params_df, model_params = read_model_params_init(model_params_init_file_name)
@@ -22,17 +398,17 @@ def simulate(model_params_init_file_name, model_spec_init_file_name, is_expected
     model_spec = read_model_spec_init(model_spec_init_file_name, model_params_df)
 
     # Get information concerning exogenous processes
-    prob_educ_level = gen_prob_educ_level_vector(model_spec)
-    prob_child_age = gen_prob_child_init_age_vector(model_spec)
-    prob_partner_present = gen_prob_partner_present_vector(model_spec)
-    prob_exp_ft = gen_prob_init_exp_vector(
-        model_spec, model_spec.ft_exp_shares_file_name
-    )
-    prob_exp_pt = gen_prob_init_exp_vector(
-        model_spec, model_spec.pt_exp_shares_file_name
-    )
-    prob_child = gen_prob_child_vector(model_spec)
-    prob_partner = gen_prob_partner(model_spec)
+    if exogenous_model is None:
+        exogenous_model = ExogenousModel.from_frames(model_spec)
+    (
+        prob_educ_level,
+        prob_child_age,
+        prob_partner_present,
+        prob_exp_ft,
+        prob_exp_pt,
+        prob_child,
+        prob_partner,
+    ) = exogenous_model.to_tuple()
 
     # Create state space
     (
@@ -43,7 +419,10 @@ def simulate(model_params_init_file_name, model_spec_init_file_name, is_expected
         child_state_indexes,
     ) = create_state_space_objects(model_spec)
 
-    # Obtain model solution
+    # Obtain model solution. The utility components are handed on to the simulation.
+    log_wage_systematic, non_consumption_utilities = calculate_utility_components(
+        model_params, model_spec, states, covariates, is_expected
+    )
     non_employment_consumption_resources, emaxs = pyth_solve(
         states,
         covariates,
@@ -53,10 +432,11 @@ def simulate(model_params_init_file_name, model_spec_init_file_name, is_expected
         prob_child,
         prob_partner,
         is_expected,
+        utility_components=(log_wage_systematic, non_consumption_utilities),
     )
+    utility_components = (log_wage_systematic, non_consumption_utilities, is_expected)
 
-    # Simulate agents experiences according to parameters in the model specification
-    df = pyth_simulate(
+    simulate_inputs = (
         model_params,
         model_spec,
         states,
@@ -72,13 +452,22 @@ def simulate(model_params_init_file_name, model_spec_init_file_name, is_expected
         prob_exp_pt,
         prob_child,
         prob_partner,
-        is_expected=False,
     )
 
-    return df
+    return simulate_inputs, child_state_indexes, utility_components
+
+
+def _get_initial_states(initial_population, simulate_inputs):
+    """Validate the initial population against the state space of the solution."""
+    if initial_population is None:
+        return None
 
+    return stack_initial_population(initial_population, simulate_inputs[3])
 
-def get_simulate_func(model_params_init_file_name, model_spec_init_file_name):
+
+def get_simulate_func(
+    model_params_init_file_name, model_spec_init_file_name, exogenous_model=None
+):
     """Create the simulation function, such that the state space creation is already
     done ."""
 
@@ -88,17 +477,17 @@ def get_simulate_func(model_params_init_file_name, model_spec_init_file_name):
     model_spec = read_model_spec_init(model_spec_init_file_name, model_params_df)
 
     # Get information concerning exogenous processes
-    prob_educ_level = gen_prob_educ_level_vector(model_spec)
-    prob_child_age = gen_prob_child_init_age_vector(model_spec)
-    prob_partner_present = gen_prob_partner_present_vector(model_spec)
-    prob_exp_ft = gen_prob_init_exp_vector(
-        model_spec, model_spec.ft_exp_shares_file_name
-    )
-    prob_exp_pt = gen_prob_init_exp_vector(
-        model_spec, model_spec.pt_exp_shares_file_name
-    )
-    prob_child = gen_prob_child_vector(model_spec)
-    prob_partner = gen_prob_partner(model_spec)
+    if exogenous_model is None:
+        exogenous_model = ExogenousModel.from_frames(model_spec)
+    (
+        prob_educ_level,
+        prob_child_age,
+        prob_partner_present,
+        prob_exp_ft,
+        prob_exp_pt,
+        prob_child,
+        prob_partner,
+    ) = exogenous_model.to_tuple()
 
     # Create state space
     (
@@ -149,7 +538,10 @@ def partiable_simulate(
 
     model_spec = read_model_spec_init(model_spec_init_file_name, model_params_df)
 
-    # Obtain model solution
+    # Obtain model solution. The utility components are handed on to the simulation.
+    log_wage_systematic, non_consumption_utilities = calculate_utility_components(
+        model_params, model_spec, states, covariates, is_expected
+    )
     non_employment_consumption_resources, emaxs = pyth_solve(
         states,
         covariates,
@@ -159,7 +551,9 @@ def partiable_simulate(
         prob_child,
         prob_partner,
         is_expected,
+        utility_components=(log_wage_systematic, non_consumption_utilities),
     )
+    utility_components = (log_wage_systematic, non_consumption_utilities, is_expected)
 
     # Simulate agents experiences according to parameters in the model specification
     df = pyth_simulate(
@@ -179,6 +573,8 @@ def partiable_simulate(
         prob_child,
         prob_partner,
         is_expected=False,
+        child_state_indexes=child_state_indexes,
+        utility_components=utility_components,
     )
 
     return df
@@ -0,0 +1,167 @@
+"""This module runs independent replications of the simulation against one solution.
+
+Each replication simulates `model_spec.num_agents_sim` agents with counter-based
+draws. The agents of replication `r` are the agents with the identifiers
+`r * num_agents_sim` to `(r + 1) * num_agents_sim - 1` of one large counter-based
+population, so their draws are independent across replications. All replications
+share the solution, the utility components, the indexes of the states in the next
+period, and the sampler of the initial states. Their chunks are simulated in one pass
+on a pool of workers, which holds a bounded number of chunks in memory, see
+:func:`soepy.simulate.simulate_parallel.map_chunks`.
+"""
+import numpy as np
+import pandas as pd
+
+from soepy.shared.shared_constants import DATA_DTYPE_SIM
+from soepy.simulate.simulate_moments import MomentAccumulator
+from soepy.simulate.simulate_parallel import CHUNK_SIZE
+from soepy.simulate.simulate_parallel import map_chunks
+from soepy.simulate.simulate_parallel import merge_columns
+from soepy.simulate.simulate_parallel import partial_simulate_chunk
+from soepy.simulate.simulate_parallel import sort_by_identifier
+
+
+def pyth_simulate_replications(
+    model_params,
+    model_spec,
+    states,
+    indexer,
+    emaxs,
+    covariates,
+    non_employment_consumption_resources,
+    child_age_update_rule,
+    prob_educ_level,
+    prob_child_age,
+    prob_partner_present,
+    prob_exp_ft,
+    prob_exp_pt,
+    prob_child,
+    prob_partner,
+    is_expected,
+    num_replications,
+    moments=None,
+    num_workers=1,
+    chunk_size=CHUNK_SIZE,
+    use_processes=False,
+    child_state_indexes=None,
+    columns=None,
+    utility_components=None,
+):
+    """Simulate independent replications of the agents' experiences.
+
+    Parameters
+    ----------
+    num_replications : int
+        Number of replications.
+    moments : dict, optional
+        Specification of moments as described in
+        :mod:`soepy.simulate.simulate_moments`. If given, the moments of each
+        replication are accumulated while the chunks are simulated and the simulated
+        data is not returned.
+    num_workers, chunk_size, use_processes
+        See :func:`pyth_simulate_parallel`. A chunk never spans two replications.
+    columns : list, optional
+        Columns of the simulated data. Defaults to all columns. Ignored for moments.
+
+    Returns
+    -------
+    results : pd.DataFrame or dict
+        Without moments, the simulated data of all replications with the additional
+        column "Replication". The rows are ordered by replication, period, and
+        identifier. Each replication is identical to :func:`pyth_simulate_parallel`
+        with counter-based draws for its identifiers, which are counted from zero in
+        the column "Identifier". With moments, a dictionary mapping the names of the
+        moments to their values with the replication as the outermost index.
+
+    """
+    num_agents = model_spec.num_agents_sim
+
+    if moments is not None:
+        accumulators = [
+            {name: MomentAccumulator(**spec) for name, spec in moments.items()}
+            for _ in range(num_replications)
+        ]
+        columns = list(
+            dict.fromkeys(
+                column
+                for accumulator in accumulators[0].values()
+                for column in accumulator.columns
+            )
+        )
+    elif columns is None:
+        columns = list(DATA_DTYPE_SIM.names)
+    elif "Identifier" not in columns:
+        raise ValueError("The replications require the column 'Identifier'.")
+
+    tasks, replications = [], []
+    for replication in range(num_replications):
+        for start in range(0, num_agents, chunk_size):
+            stop = min(start + chunk_size, num_agents)
+            offset = replication * num_agents
+            tasks.append((None, offset + start, offset + stop))
+            replications.append(replication)
+
+    simulate_chunk = partial_simulate_chunk(
+        model_params,
+        model_spec,
+        states,
+        indexer,
+        emaxs,
+        covariates,
+        non_employment_consumption_resources,
+        child_age_update_rule,
+        prob_educ_level,
+        prob_child_age,
+        prob_partner_present,
+        prob_exp_ft,
+        prob_exp_pt,
+        prob_child,
+        prob_partner,
+        is_expected,
+        child_state_indexes,
+        columns,
+        utility_components,
+        None,
+    )
+    chunks = map_chunks(simulate_chunk, tasks, num_workers, use_processes)
+
+    if moments is not None:
+        # The moments are accumulated as the chunks arrive, such that only the chunks
+        # in flight on the pool are held in memory, see map_chunks.
+        for replication, blocks in zip(replications, chunks):
+            for block in blocks:
+                for accumulator in accumulators[replication].values():
+                    accumulator.update(block)
+
+        return {
+            name: _stack_replications(
+                [accumulators[r][name].result() for r in range(num_replications)]
+            )
+            for name in moments
+        }
+
+    chunks_by_replication = [[] for _ in range(num_replications)]
+    for replication, blocks in zip(replications, chunks):
+        chunks_by_replication[replication].append(blocks)
+
+    data = []
+    for replication, replication_chunks in enumerate(chunks_by_replication):
+        for blocks in zip(*replication_chunks):
+            period = sort_by_identifier(merge_columns(blocks))
+            period["Identifier"] -= replication * num_agents
+            replication_column = np.full(
+                period["Identifier"].shape[0], replication, dtype=np.int32
+            )
+            data.append({"Replication": replication_column, **period})
+
+    dataset = pd.DataFrame(merge_columns(data), copy=False)
+
+    return dataset
+
+
+def _stack_replications(results):
+    """Stack the values of a moment across replications."""
+    if isinstance(results[0], (pd.Series, pd.DataFrame)):
+        return pd.concat(results, keys=range(len(results)), names=["Replication"])
+
+    return pd.Series(results, index=pd.RangeIndex(len(results), name="Replication"))
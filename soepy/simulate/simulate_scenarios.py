@@ -0,0 +1,179 @@
+"""This module evaluates counterfactual scenarios of the model specification.
+
+A scenario overrides entries of a base model specification, e.g., the parameters of
+the tax and transfer system. All scenarios are run through one :class:`Pipeline`.
+The stages which do not depend on the overridden entries, e.g., the exogenous
+processes, the state space, and the draws of the solution, are computed once for the
+base specification before the workers start and are shared by all scenarios. Each
+worker then only runs the remaining stages of its scenario.
+"""
+import concurrent.futures
+import multiprocessing
+
+import pandas as pd
+import yaml
+
+from soepy.pre_processing.model_processing import read_model_params_init
+from soepy.pre_processing.model_processing import YAML_LOADER
+from soepy.simulate.simulate_moments import stack_moments
+
+# Last stage which is computed for the base specification and shared by the scenarios
+SHARED_STAGES_UNTIL = "draws_emax"
+
+# Pipeline of the worker processes
+_WORKER_PIPELINE = None
+
+
+def run_scenarios(
+    pipeline,
+    model_params_init_file_name,
+    model_spec_init_file_name,
+    scenarios,
+    moments,
+    num_workers=1,
+    use_processes=False,
+):
+    """Compute the moments of the simulation for each scenario.
+
+    Parameters
+    ----------
+    pipeline : Pipeline
+        Pipeline which runs the scenarios.
+    model_params_init_file_name : str or pd.DataFrame
+        Parameters of the model.
+    model_spec_init_file_name : str or dict
+        Base model specification.
+    scenarios : dict or list
+        Dictionary mapping the names of the scenarios to their overrides, or a list of
+        overrides which are named by their position. The overrides are dictionaries
+        mapping entries of the base model specification to their values in the
+        scenario, see :func:`apply_overrides`.
+    moments : dict
+        Specification of moments as described in
+        :mod:`soepy.simulate.simulate_moments`.
+    num_workers : int
+        Number of threads or processes running scenarios concurrently.
+    use_processes : bool
+        If True, the scenarios run in a pool of spawned processes instead of a thread
+        pool. Each process receives a copy of the pipeline with the shared stages. The
+        numba kernels are loaded from the cache on disk.
+
+    Returns
+    -------
+    results : pd.DataFrame
+        Data frame with the column "Scenario" and the moments of each scenario as
+        returned by :func:`stack_moments`.
+
+    """
+    if not isinstance(scenarios, dict):
+        scenarios = dict(enumerate(scenarios))
+    if not scenarios:
+        raise ValueError("At least one scenario is required.")
+
+    model_params_df, _ = read_model_params_init(model_params_init_file_name)
+    model_spec_init_dict = read_model_spec_dict(model_spec_init_file_name)
+    tasks = [
+        (model_params_df, apply_overrides(model_spec_init_dict, overrides), moments)
+        for overrides in scenarios.values()
+    ]
+
+    pipeline.solve(model_params_df, model_spec_init_dict, until=SHARED_STAGES_UNTIL)
+
+    moments_scenarios = list(map_scenarios(pipeline, tasks, num_workers, use_processes))
+
+    frames = []
+    for name, results in zip(scenarios, moments_scenarios):
+        frame = stack_moments(results)
+        frame.insert(0, "Scenario", name)
+        frames.append(frame)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def apply_overrides(model_spec_init_dict, overrides):
+    """Override entries of a nested model specification.
+
+    The entries are identified by their names, independent of their group. The base
+    specification is left unchanged.
+
+    Parameters
+    ----------
+    model_spec_init_dict : dict
+        Nested model specification as read from a yaml file.
+    overrides : dict
+        Dictionary mapping the names of entries to their new values, e.g.,
+        ``{"tax_splitting": False, "child_care_costs": {"under_3": [219, 381],
+        "3_to_6": [122, 128]}}``.
+
+    Returns
+    -------
+    model_spec_init_dict : dict
+        Nested model specification with the overridden entries.
+
+    """
+    model_spec_init_dict = {
+        group: dict(values) for group, values in model_spec_init_dict.items()
+    }
+    groups = {
+        key: group for group, values in model_spec_init_dict.items() for key in values
+    }
+
+    unknown = sorted(set(overrides) - set(groups))
+    if unknown:
+        raise ValueError(f"The model specification has no entries {unknown}.")
+
+    for key, value in overrides.items():
+        model_spec_init_dict[groups[key]][key] = value
+
+    return model_spec_init_dict
+
+
+def read_model_spec_dict(model_spec_init_file_name):
+    """Read the nested model specification from a yaml file."""
+    if isinstance(model_spec_init_file_name, dict):
+        return model_spec_init_file_name
+
+    with open(model_spec_init_file_name) as y:
+        return yaml.load(y, Loader=YAML_LOADER)
+
+
+def map_scenarios(pipeline, tasks, num_workers=1, use_processes=False):
+    """Compute the moments of the scenarios on a pool of workers.
+
+    Parameters
+    ----------
+    tasks : list
+        Tuples of the parameters, the model specification, and the moments of each
+        scenario.
+
+    Yields
+    ------
+    results : dict
+        Moments of the scenarios in the order of `tasks`.
+
+    """
+    if use_processes:
+        # The workers are spawned, as forking a process in which a parallel kernel
+        # ran is not safe with the tbb and omp threading layers of numba
+        executor = concurrent.futures.ProcessPoolExecutor(
+            num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_set_worker_pipeline,
+            initargs=(pipeline,),
+        )
+        run_scenario = _run_scenario
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(num_workers)
+        run_scenario = pipeline.moments
+
+    with executor:
+        yield from executor.map(run_scenario, *zip(*tasks))
+
+
+def _set_worker_pipeline(pipeline):
+    global _WORKER_PIPELINE
+    _WORKER_PIPELINE = pipeline
+
+
+def _run_scenario(model_params_df, model_spec_init_dict, moments):
+    return _WORKER_PIPELINE.moments(model_params_df, model_spec_init_dict, moments)
@@ -0,0 +1,280 @@
+"""This module provides a simulation session for repeated simulations.
+
+An estimation evaluates the simulation for many parameter vectors of the same model.
+Large parts of the work do not depend on the parameters: the model specification, the
+distributions of the exogenous processes, the state space, the indexes of the states
+in the next period, and the standard normal draws of the solution. A
+:class:`Simulator` sets these up once. Each call of :meth:`Simulator.simulate` or
+:meth:`Simulator.moments` then only parses the parameters, computes the utility
+components, solves the model, and simulates.
+"""
+import numpy as np
+
+from soepy.exogenous_processes.exogenous_model import ExogenousModel
+from soepy.pre_processing.model_processing import read_model_params_init
+from soepy.pre_processing.model_processing import read_model_spec_init
+from soepy.pre_processing.params_vector import ParamsVector
+from soepy.shared.shared_auxiliary import calculate_utility_components
+from soepy.shared.shared_auxiliary import draw_standard_normals
+from soepy.shared.shared_auxiliary import scale_standard_normals
+from soepy.shared.shared_constants import NUM_CHOICES
+from soepy.simulate.simulate_auxiliary import pyth_simulate
+from soepy.simulate.simulate_auxiliary import pyth_simulate_periods
+from soepy.simulate.simulate_moments import accumulate_moments
+from soepy.simulate.simulate_moments import get_moment_columns
+from soepy.solve.create_state_space import create_state_space_objects
+from soepy.solve.solution_cache import get_digest
+from soepy.solve.solve_python import pyth_solve
+
+
+class Simulator:
+    """Simulation session which keeps the parameter-independent objects alive.
+
+    The results of :meth:`simulate` are identical to the ones of :func:`simulate` with
+    the same parameters and model specification.
+
+    Parameters
+    ----------
+    model_params_init_file_name : str or pd.DataFrame
+        Parameters which determine the number of types of the model and the order of
+        the entries of flat parameter vectors.
+    model_spec_init_file_name : str or dict
+        Model specification.
+    is_expected : bool
+        Whether the model is solved with the human capital accumulation process that
+        agents expect.
+    exogenous_model : ExogenousModel, optional
+        Probabilities of the exogenous processes. They are read from the files in the
+        model specification if not given.
+    cache : SolutionCache, optional
+        Cache of the solutions and the moments. Parameters which were evaluated before
+        are then not solved again. The cache can be shared between simulators, as its
+        keys include the fingerprint of the model.
+
+    """
+
+    def __init__(
+        self,
+        model_params_init_file_name,
+        model_spec_init_file_name,
+        is_expected=True,
+        exogenous_model=None,
+        cache=None,
+    ):
+        model_params_df, _ = read_model_params_init(model_params_init_file_name)
+        self.model_spec = read_model_spec_init(
+            model_spec_init_file_name, model_params_df
+        )
+        self.params_vector = ParamsVector(model_params_df)
+        self.is_expected = is_expected
+
+        # Get information concerning exogenous processes
+        if exogenous_model is None:
+            exogenous_model = ExogenousModel.from_frames(self.model_spec)
+        self.exogenous_model = exogenous_model
+        (
+            self.prob_educ_level,
+            self.prob_child_age,
+            self.prob_partner_present,
+            self.prob_exp_ft,
+            self.prob_exp_pt,
+            self.prob_child,
+            self.prob_partner,
+        ) = exogenous_model.to_tuple()
+
+        # Create state space
+        (
+            self.states,
+            self.indexer,
+            self.covariates,
+            self.child_age_update_rule,
+            self.child_state_indexes,
+        ) = create_state_space_objects(self.model_spec)
+
+        # The draws of the solution are rescaled with the variances of the shocks
+        self.standard_normals_emax = draw_standard_normals(
+            self.model_spec.seed_emax,
+            self.model_spec.num_periods,
+            self.model_spec.num_draws_emax,
+        )
+        self.emaxs = np.empty((self.states.shape[0], NUM_CHOICES + 1))
+
+        # The solution depends on the parameters and the fingerprint of the model only
+        self.cache = cache
+        self.fingerprint = get_digest(
+            self.model_spec, exogenous_model.to_tuple(), is_expected
+        )
+
+    def solve(self, params):
+        """Solve the model for the parameters.
+
+        Parameters
+        ----------
+        params : str, pd.DataFrame, or np.ndarray
+            Parameters of the model. A flat vector contains the values of the
+            parameters in the order of the rows of the parameters the simulator was
+            set up with, see :class:`ParamsVector`.
+
+        Returns
+        -------
+        model_params : namedtuple
+            Parsed parameters.
+        non_employment_consumption_resources : np.ndarray
+            Consumption resources of non-employment of all states.
+        emaxs : np.ndarray
+            Continuation values and expected maximum value functions of all states. The
+            array is reused and overwritten by the next solution, unless the solution
+            is cached. Cached solutions must not be modified.
+        utility_components : tuple
+            Utility components of the solution as passed to :func:`pyth_simulate`.
+
+        """
+        model_params = self._read_params(params)
+
+        return (model_params, *self._get_solution(model_params))
+
+    def simulate(self, params, float32=False, columns=None):
+        """Create a data frame of individuals' simulated experiences.
+
+        See :meth:`solve` for `params` and
+        :func:`soepy.simulate.simulate_python.simulate` for the other arguments.
+
+        """
+        simulate_inputs, utility_components = self._get_simulate_inputs(
+            self._read_params(params)
+        )
+
+        df = pyth_simulate(
+            *simulate_inputs,
+            is_expected=False,
+            child_state_indexes=self.child_state_indexes,
+            float32=float32,
+            columns=columns,
+            utility_components=utility_components,
+        )
+
+        return df
+
+    def moments(self, params, moments):
+        """Compute moments of individuals' simulated experiences.
+
+        The moments are identical to the ones of
+        :func:`soepy.simulate.simulate_python.simulate_moments`. If the simulator has a
+        cache, the moments are cached as well and must not be modified.
+
+        """
+        model_params = self._read_params(params)
+
+        if self.cache is None:
+            return self._simulate_moments(model_params, moments)
+
+        key = get_digest("moments", self.fingerprint, model_params, moments)
+        results = self.cache.get(key)
+        if results is None:
+            results = self._simulate_moments(model_params, moments)
+            self.cache.put(key, results)
+
+        return results
+
+    def _read_params(self, params):
+        """Parse the parameters and check them against the model specification."""
+        if isinstance(params, np.ndarray):
+            return self.params_vector.to_model_params(params)
+
+        _, model_params = read_model_params_init(params)
+
+        if len(model_params.type_shares) != self.model_spec.num_types:
+            raise ValueError(
+                f"The parameters specify {len(model_params.type_shares)} types, but "
+                f"the simulator was set up for {self.model_spec.num_types} types."
+            )
+
+        return model_params
+
+    def _get_solution(self, model_params):
+        """Look up the solution in the cache or solve the model."""
+        if self.cache is None:
+            return self._solve(model_params, out=self.emaxs)
+
+        key = get_digest("solve", self.fingerprint, model_params)
+        solution = self.cache.get(key)
+        if solution is None:
+            solution = self._solve(model_params)
+            self.cache.put(key, solution)
+
+        return solution
+
+    def _solve(self, model_params, out=None):
+        """Solve the model and collect the utility components of the solution."""
+        log_wage_systematic, non_consumption_utilities = calculate_utility_components(
+            model_params,
+            self.model_spec,
+            self.states,
+            self.covariates,
+            self.is_expected,
+        )
+        non_employment_consumption_resources, emaxs = pyth_solve(
+            self.states,
+            self.covariates,
+            self.child_state_indexes,
+            model_params,
+            self.model_spec,
+            self.prob_child,
+            self.prob_partner,
+            self.is_expected,
+            utility_components=(log_wage_systematic, non_consumption_utilities),
+            draws_emax=scale_standard_normals(
+                self.standard_normals_emax, model_params.shocks_cov
+            ),
+            out=out,
+        )
+        utility_components = (
+            log_wage_systematic,
+            non_consumption_utilities,
+            self.is_expected,
+        )
+
+        return non_employment_consumption_resources, emaxs, utility_components
+
+    def _simulate_moments(self, model_params, moments):
+        """Solve the model and accumulate the moments of the simulation."""
+        simulate_inputs, utility_components = self._get_simulate_inputs(model_params)
+
+        blocks = pyth_simulate_periods(
+            *simulate_inputs,
+            is_expected=False,
+            as_frame=False,
+            child_state_indexes=self.child_state_indexes,
+            columns=get_moment_columns(moments),
+            utility_components=utility_components,
+        )
+
+        return accumulate_moments(blocks, moments)
+
+    def _get_simulate_inputs(self, model_params):
+        """Solve the model and collect the positional arguments of the simulation."""
+        (
+            non_employment_consumption_resources,
+            emaxs,
+            utility_components,
+        ) = self._get_solution(model_params)
+
+        simulate_inputs = (
+            model_params,
+            self.model_spec,
+            self.states,
+            self.indexer,
+            emaxs,
+            self.covariates,
+            non_employment_consumption_resources,
+            self.child_age_update_rule,
+            self.prob_educ_level,
+            self.prob_child_age,
+            self.prob_partner_present,
+            self.prob_exp_ft,
+            self.prob_exp_pt,
+            self.prob_child,
+            self.prob_partner,
+        )
+
+        return simulate_inputs, utility_components
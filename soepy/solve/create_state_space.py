@@ -26,7 +26,6 @@ def create_state_space_objects(model_spec):
     return states, indexer, covariates, child_age_update_rule, child_state_indexes
 
 
-@numba.jit(nopython=True)
 def pyth_create_state_space(model_spec):
     """Create state space object.
 
@@ -60,17 +59,43 @@ def pyth_create_state_space(model_spec):
         A matrix where each dimension represents a characteristic of the state space.
         Switching from one state is possible via incrementing appropriate indices by 1.
     """
+    # The compiled kernel only receives scalars and arrays. The model specification
+    # is a freshly created namedtuple class on every read, which would otherwise
+    # trigger a recompilation and defeat the on-disk cache.
+    return _create_state_space(
+        model_spec.num_periods,
+        model_spec.num_educ_levels,
+        model_spec.num_types,
+        model_spec.last_child_bearing_period,
+        model_spec.child_age_max,
+        np.array(model_spec.educ_years, dtype=np.int64),
+        model_spec.child_age_init_max,
+        model_spec.init_exp_max,
+    )
+
+
+@numba.njit(cache=True)
+def _create_state_space(
+    num_periods,
+    num_educ_levels,
+    num_types,
+    last_child_bearing_period,
+    child_age_max,
+    educ_years,
+    child_age_init_max,
+    init_exp_max,
+):
     data = []
-    kids_ages = np.arange(-1, model_spec.child_age_max + 1)
+    kids_ages = np.arange(-1, child_age_max + 1)
 
     # Array for mapping the state space points (states) to indices
     shape = (
-        model_spec.num_periods,
-        model_spec.num_educ_levels,
+        num_periods,
+        num_educ_levels,
         NUM_CHOICES,
-        model_spec.num_periods + model_spec.init_exp_max,
-        model_spec.num_periods + model_spec.init_exp_max,
-        model_spec.num_types,
+        num_periods + init_exp_max,
+        num_periods + init_exp_max,
+        num_types,
         kids_ages.shape[0],
         2,
     )
@@ -81,10 +106,10 @@ def pyth_create_state_space(model_spec):
     i = 0
 
     # Loop over all periods / all ages
-    for period in range(model_spec.num_periods):
+    for period in range(num_periods):
 
         # Loop over all types
-        for type_ in range(model_spec.num_types):
+        for type_ in range(num_types):
 
             for partner_indicator in range(2):
 
@@ -95,62 +120,53 @@ def pyth_create_state_space(model_spec):
                     # Can be relaxed, e.g., we assume that 1st kid can arrive earliest when
                     # a woman is 16 years old, the condition becomes:
                     # if age_kid > period + 1.
-                    if age_kid - model_spec.child_age_init_max > period:
+                    if age_kid - child_age_init_max > period:
                         continue
                     # Make sure that women above 42 do not get kids
                     # For periods corresponding to ages > 40, the `age_kid`
                     # state space component can only take values -1, for no child ever,
                     # 11, for a child above 11, and 0 - 10 in such a fashion that no
                     # birth after 40 years of age is possible.
-                    if (
-                        period > model_spec.last_child_bearing_period
-                        and 0
-                        <= age_kid
-                        <= min(period - (model_spec.last_child_bearing_period + 1), 10)
+                    if period > last_child_bearing_period and 0 <= age_kid <= min(
+                        period - (last_child_bearing_period + 1), 10
                     ):
                         continue
 
                     # Loop over all possible initial conditions for education
-                    for educ_level in range(model_spec.num_educ_levels):
+                    for educ_level in range(num_educ_levels):
 
                         # Check if individual has already completed education
                         # and will make a labor supply choice in the period
-                        if model_spec.educ_years[educ_level] > period:
+                        if educ_years[educ_level] > period:
                             continue
 
                         # Loop over all admissible years of experience
                         # accumulated in full-time
-                        for exp_f in range(
-                            model_spec.num_periods + model_spec.init_exp_max + 1
-                        ):
+                        for exp_f in range(num_periods + init_exp_max + 1):
 
                             # Loop over all admissible years of experience accumulated
                             # in part-time
-                            for exp_p in range(
-                                model_spec.num_periods + model_spec.init_exp_max + 1
-                            ):
+                            for exp_p in range(num_periods + init_exp_max + 1):
 
                                 # The accumulation of experience cannot exceed time elapsed
                                 # since individual entered the model
                                 if (
                                     exp_f + exp_p
-                                    > period
-                                    + model_spec.init_exp_max * 2
-                                    - model_spec.educ_years[educ_level]
+                                    > period + init_exp_max * 2 - educ_years[educ_level]
                                 ):
                                     continue
 
-                                if exp_f > period + model_spec.init_exp_max:
+                                if exp_f > period + init_exp_max:
                                     continue
 
-                                if exp_p > period + model_spec.init_exp_max:
+                                if exp_p > period + init_exp_max:
                                     continue
 
                                 # Add an additional entry state
                                 # [educ_years + model_params.educ_min, 0, 0, 0]
                                 # for individuals who have just completed education
                                 # and still have no experience in any occupation.
-                                if period == model_spec.educ_years[educ_level]:
+                                if period == educ_years[educ_level]:
 
                                     # Assign an additional integer count i
                                     # for entry state
@@ -193,8 +209,8 @@ def pyth_create_state_space(model_spec):
                                         if (choice_lagged != 2) and (
                                             exp_f
                                             == period
-                                            + model_spec.init_exp_max
-                                            - model_spec.educ_years[educ_level]
+                                            + init_exp_max
+                                            - educ_years[educ_level]
                                         ):
                                             continue
 
@@ -203,8 +219,8 @@ def pyth_create_state_space(model_spec):
                                         if (choice_lagged != 1) and (
                                             exp_p
                                             == period
-                                            + model_spec.init_exp_max
-                                            - model_spec.educ_years[educ_level]
+                                            + init_exp_max
+                                            - educ_years[educ_level]
                                         ):
                                             continue
 
@@ -223,8 +239,8 @@ def pyth_create_state_space(model_spec):
                                         if (choice_lagged == 0) and (
                                             exp_f + exp_p
                                             == period
-                                            + 2 * model_spec.init_exp_max
-                                            - model_spec.educ_years[educ_level]
+                                            + 2 * init_exp_max
+                                            - educ_years[educ_level]
                                         ):
                                             continue
 
@@ -282,8 +298,20 @@ def pyth_create_state_space(model_spec):
     return states, indexer
 
 
-@numba.njit(nogil=True)
 def create_child_indexes(states, indexer, model_spec, child_age_update_rule):
+    """Map each state and choice to the indexes of the four potential child states.
+
+    The child states differ by the arrival of a child and the partner status in the
+    next period.
+
+    """
+    return _create_child_indexes(
+        states, indexer, model_spec.num_periods, child_age_update_rule
+    )
+
+
+@numba.njit(nogil=True, cache=True)
+def _create_child_indexes(states, indexer, num_periods, child_age_update_rule):
     child_indexes = np.full((states.shape[0], NUM_CHOICES, 2, 2), MISSING_INT)
 
     for num_state in range(states.shape[0]):
@@ -298,7 +326,7 @@ def create_child_indexes(states, indexer, model_spec, child_age_update_rule):
             partner_indicator,
         ) = states[num_state]
 
-        if period < model_spec.num_periods - 1:
+        if period < num_periods - 1:
 
             k_parent = indexer[
                 period,
@@ -346,7 +374,7 @@ def create_child_indexes(states, indexer, model_spec, child_age_update_rule):
     return child_indexes
 
 
-@numba.njit(nogil=True)
+@numba.njit(nogil=True, cache=True)
 def get_child_states_index(
     indexer,
     next_period,
@@ -6,7 +6,7 @@ from soepy.shared.shared_constants import NUM_CHOICES
 from soepy.shared.tax_and_transfers import calculate_net_income
 
 
-@numba.njit
+@numba.njit(cache=True)
 def _get_max_aggregated_utilities(
     delta,
     log_wage_systematic,
@@ -55,7 +55,7 @@ def _get_max_aggregated_utilities(
     return current_max_value_function
 
 
-@numba.njit(nogil=True)
+@numba.njit(nogil=True, cache=True)
 def do_weighting_emax(child_emaxs, prob_child, prob_partner):
     weight_01 = (1 - prob_child) * prob_partner[1] * child_emaxs[0, 1]
     weight_00 = (1 - prob_child) * prob_partner[0] * child_emaxs[0, 0]
@@ -75,6 +75,7 @@ def do_weighting_emax(child_emaxs, prob_child, prob_partner):
     "n_age_child_costs), (), (), (), (), (), (num_outputs) -> (num_outputs)",
     nopython=True,
     target="parallel",
+    cache=True,
 )
 def construct_emax(
     delta,
@@ -0,0 +1,163 @@
+"""This module provides a cache of model solutions for repeated evaluations.
+
+Derivative-free optimizers often evaluate the same parameters more than once. A
+:class:`SolutionCache` keeps the results of recent evaluations in memory, keyed by a
+digest of the parameters and the fingerprint of the model. The memory is bounded by
+the number of bytes of the cached arrays, and the least recently used results are
+evicted first. Results can additionally be written to a directory, such that they
+survive the eviction and can be shared between processes.
+"""
+import collections
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from soepy.pre_processing.model_processing import get_hash_key
+
+# Default bound of the number of bytes of the results kept in memory
+SOLUTION_CACHE_MAX_BYTES = 2 ** 30
+
+CacheInfo = collections.namedtuple(
+    "CacheInfo",
+    ["hits", "disk_hits", "misses", "evictions", "num_entries", "nbytes", "max_bytes"],
+)
+
+
+class SolutionCache:
+    """Least recently used cache of model solutions bounded by their size in bytes.
+
+    The cached results are shared with all callers which retrieve them and must not be
+    modified.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Bound of the number of bytes of the results kept in memory. Results which are
+        larger on their own are not kept in memory.
+    directory : str, optional
+        Directory to which all results are written in addition. Results which are not
+        in memory are read from it.
+
+    """
+
+    def __init__(self, max_bytes=SOLUTION_CACHE_MAX_BYTES, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        self._entries = collections.OrderedDict()
+        self._nbytes = 0
+        self._stats = collections.Counter()
+
+    def get(self, key, default=None):
+        """Return the result for `key` or `default` if it is not cached."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return self._entries[key][0]
+
+        path = self._get_path(key)
+        if path is not None and os.path.exists(path):
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            self._insert(key, value)
+            self._stats["disk_hits"] += 1
+            return value
+
+        self._stats["misses"] += 1
+
+        return default
+
+    def put(self, key, value):
+        """Cache the result for `key`."""
+        self._insert(key, value)
+
+        path = self._get_path(key)
+        if path is not None:
+            # Write to a temporary file first, such that concurrent readers never see
+            # a partial file
+            with tempfile.NamedTemporaryFile(
+                dir=self.directory, suffix=".tmp", delete=False
+            ) as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f.name, path)
+
+    def clear(self):
+        """Remove all results from memory. The files in the directory are kept."""
+        self._entries.clear()
+        self._nbytes = 0
+
+    def cache_info(self):
+        """Report the statistics of the cache."""
+        return CacheInfo(
+            self._stats["hits"],
+            self._stats["disk_hits"],
+            self._stats["misses"],
+            self._stats["evictions"],
+            len(self._entries),
+            self._nbytes,
+            self.max_bytes,
+        )
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _insert(self, key, value):
+        """Keep the result in memory and evict the least recently used results."""
+        if key in self._entries:
+            self._nbytes -= self._entries.pop(key)[1]
+
+        nbytes = get_nbytes(value)
+        if nbytes > self.max_bytes:
+            return
+
+        self._entries[key] = (value, nbytes)
+        self._nbytes += nbytes
+        while self._nbytes > self.max_bytes:
+            _, (_, evicted_nbytes) = self._entries.popitem(last=False)
+            self._nbytes -= evicted_nbytes
+            self._stats["evictions"] += 1
+
+    def _get_path(self, key):
+        if self.directory is None:
+            return None
+
+        return os.path.join(self.directory, f"{key}.pickle")
+
+
+def get_digest(*values):
+    """Compute a digest of values of the model specification or the parameters.
+
+    Equal values have equal digests in all processes, see :func:`get_hash_key`.
+
+    """
+    # The representation of the key does not depend on the identity of its items,
+    # unlike its pickle
+    key = get_hash_key(values)
+
+    return hashlib.sha256(repr(key).encode()).hexdigest()
+
+
+def get_nbytes(value):
+    """Estimate the number of bytes of a cached result."""
+    if isinstance(value, np.ndarray):
+        nbytes = value.nbytes
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        nbytes = int(np.sum(value.memory_usage(deep=True)))
+    elif isinstance(value, (list, tuple)):
+        nbytes = sum(get_nbytes(item) for item in value)
+    elif isinstance(value, dict):
+        nbytes = sum(get_nbytes(item) for item in value.values())
+    else:
+        nbytes = sys.getsizeof(value)
+
+    return nbytes
@@ -4,6 +4,7 @@ from soepy.shared.non_employment_benefits import calculate_non_employment_benefi
 from soepy.shared.shared_auxiliary import calculate_non_employment_consumption_resources
 from soepy.shared.shared_auxiliary import calculate_utility_components
 from soepy.shared.shared_auxiliary import draw_disturbances
+from soepy.shared.shared_auxiliary import KERNEL_LOCK
 from soepy.shared.shared_constants import HOURS
 from soepy.shared.shared_constants import NUM_CHOICES
 from soepy.solve.emaxs import construct_emax
@@ -18,6 +19,9 @@ def pyth_solve(
     prob_child,
     prob_partner,
     is_expected,
+    utility_components=None,
+    draws_emax=None,
+    out=None,
 ):
     """Solve the model by backward induction.
 
@@ -42,6 +46,16 @@ def pyth_solve(
         A boolean indicator that differentiates between the human capital accumulation
         process that agents expect (is_expected = True) and that the market generates
         (is_expected = False)
+    utility_components : tuple, optional
+        Systematic log wages and non-consumption utilities of all states as returned
+        by :func:`calculate_utility_components` for `is_expected`. They are computed
+        if not given, and can be handed on to the simulation.
+    draws_emax : np.ndarray, optional
+        Draws of the shocks with shape (num_periods, num_draws_emax, 2) as returned by
+        :func:`draw_disturbances`. They are drawn if not given.
+    out : np.ndarray, optional
+        Array with shape (num_states, num_choices + 1) to which the expected maximum
+        value functions are written. See :func:`pyth_backward_induction`.
 
     Returns
     _______
@@ -61,27 +75,20 @@ def pyth_solve(
         Lat element contains the expected maximum value function of the state space point.
     """
 
-    attrs_spec = ["seed_emax", "num_periods", "num_draws_emax"]
-    draws_emax = draw_disturbances(
-        *[getattr(model_spec, attr) for attr in attrs_spec], model_params
-    )
-
-    log_wage_systematic, non_consumption_utilities = calculate_utility_components(
-        model_params, model_spec, states, covariates, is_expected
-    )
-
-    non_employment_benefits = calculate_non_employment_benefits(
-        model_spec, states, log_wage_systematic
-    )
+    if draws_emax is None:
+        attrs_spec = ["seed_emax", "num_periods", "num_draws_emax"]
+        draws_emax = draw_disturbances(
+            *[getattr(model_spec, attr) for attr in attrs_spec], model_params
+        )
 
-    tax_splitting = model_spec.tax_splitting
+    if utility_components is None:
+        utility_components = calculate_utility_components(
+            model_params, model_spec, states, covariates, is_expected
+        )
+    log_wage_systematic, non_consumption_utilities = utility_components
 
-    non_employment_consumption_resources = calculate_non_employment_consumption_resources(
-        model_spec.ssc_deductions,
-        model_spec.tax_params,
-        covariates[:, 1],
-        non_employment_benefits,
-        tax_splitting,
+    non_employment_consumption_resources = get_non_employment_consumption_resources(
+        model_spec, states, covariates, log_wage_systematic
     )
 
     # Solve the model in a backward induction procedure
@@ -99,6 +106,7 @@ def pyth_solve(
         prob_partner,
         non_employment_consumption_resources,
         model_spec.ssc_deductions,
+        out=out,
     )
 
     # Return function output
@@ -108,6 +116,30 @@ def pyth_solve(
     )
 
 
+def get_non_employment_consumption_resources(
+    model_spec, states, covariates, log_wage_systematic
+):
+    """Get the consumption resources of non-employment at every state space point.
+
+    The resources consist of the non-employment benefits and the net income of the
+    partner.
+
+    """
+    non_employment_benefits = calculate_non_employment_benefits(
+        model_spec, states, log_wage_systematic
+    )
+
+    non_employment_consumption_resources = calculate_non_employment_consumption_resources(
+        model_spec.ssc_deductions,
+        model_spec.tax_params,
+        covariates[:, 1],
+        non_employment_benefits,
+        model_spec.tax_splitting,
+    )
+
+    return non_employment_consumption_resources
+
+
 def pyth_backward_induction(
     model_spec,
     states,
@@ -120,6 +152,7 @@ def pyth_backward_induction(
     prob_partner,
     non_employment_consumption_resources,
     deductions_spec,
+    out=None,
 ):
     """Get expected maximum value function at every state space point.
     Backward induction is performed all at once for all states in a given period.
@@ -148,6 +181,10 @@ def pyth_backward_induction(
     non_consumption_utilities : np.ndarray
         Array of dimension (num_states, num_choices) containing the utility
         contribution of non-pecuniary factors.
+    out : np.ndarray, optional
+        Array with shape (num_states, num_choices + 1) to which the results are
+        written, e.g., to reuse the memory across repeated solutions. All of its
+        entries are overwritten.
 
     Returns
     -------
@@ -159,7 +196,10 @@ def pyth_backward_induction(
     """
     dummy_array = np.zeros(4)  # Need this array to define output for construct_emaxs
 
-    emaxs = np.zeros((states.shape[0], NUM_CHOICES + 1))
+    if out is None:
+        emaxs = np.zeros((states.shape[0], NUM_CHOICES + 1))
+    else:
+        emaxs = out
 
     # Set taxing type
     tax_splitting = model_spec.tax_splitting
@@ -205,27 +245,28 @@ def pyth_backward_induction(
             emaxs_child_states = emaxs[:, 3][child_states_ind_period]
 
         # Calculate emax for current period reached by the loop
-        emaxs_period = construct_emax(
-            model_spec.delta,
-            log_wage_systematic_period,
-            non_consumption_utilities_period,
-            draws[period],
-            emaxs_child_states,
-            prob_child_period,
-            prob_partner_period,
-            HOURS,
-            model_spec.mu,
-            non_employment_consumption_resources_period,
-            deductions_spec,
-            model_spec.tax_params,
-            model_spec.child_care_costs,
-            index_child_care_costs,
-            male_wage_period,
-            child_benefits_period,
-            equivalence_scale_period,
-            tax_splitting,
-            dummy_array,
-        )
+        with KERNEL_LOCK:
+            emaxs_period = construct_emax(
+                model_spec.delta,
+                log_wage_systematic_period,
+                non_consumption_utilities_period,
+                draws[period],
+                emaxs_child_states,
+                prob_child_period,
+                prob_partner_period,
+                HOURS,
+                model_spec.mu,
+                non_employment_consumption_resources_period,
+                deductions_spec,
+                model_spec.tax_params,
+                model_spec.child_care_costs,
+                index_child_care_costs,
+                male_wage_period,
+                child_benefits_period,
+                equivalence_scale_period,
+                tax_splitting,
+                dummy_array,
+            )
 
         emaxs[state_period_cond] = emaxs_period
 
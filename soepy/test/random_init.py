@@ -410,9 +410,13 @@ def print_dict(model_spec_init_dict, file_name="test"):
 
 
 def namedtuple_to_dict(named_tuple):
-    """Converts named tuple to flat dictionary"""
+    """Converts named tuple to flat dictionary. The tuples of the compiled model
+    specification are converted back to lists."""
 
-    init_dict_flat = dict(named_tuple._asdict())
+    init_dict_flat = {
+        key: list(value) if isinstance(value, tuple) else value
+        for key, value in named_tuple._asdict().items()
+    }
 
     return init_dict_flat
 
@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from soepy.exogenous_processes.exogenous_model import EXOGENOUS_FRAMES
+from soepy.exogenous_processes.exogenous_model import ExogenousModel
+from soepy.pre_processing.model_processing import read_model_params_init
+from soepy.pre_processing.model_processing import read_model_spec_init
+from soepy.simulate.simulate_python import simulate
+from soepy.simulate.simulator import Simulator
+from soepy.test.random_init import random_init
+
+
+@pytest.fixture(scope="module")
+def model_spec():
+    random_init({"AGENTS": 100, "PERIODS": np.random.randint(3, 6)})
+    model_params_df, _ = read_model_params_init("test.soepy.pkl")
+    return read_model_spec_init("test.soepy.yml", model_params_df)
+
+
+def test_exogenous_model_from_frames_in_memory(model_spec):
+    """This test ensures that the simulation with the exogenous processes built from
+    data frames in memory does not read the files and is identical to the simulation
+    with the files."""
+    expected = simulate("test.soepy.pkl", "test.soepy.yml")
+
+    frames = {
+        name: pd.read_pickle(getattr(model_spec, file_key))
+        for name, file_key in EXOGENOUS_FRAMES.items()
+    }
+    exogenous_model = ExogenousModel.from_frames(model_spec, **frames)
+
+    os.mkdir("moved")
+    for file_key in EXOGENOUS_FRAMES.values():
+        os.rename(getattr(model_spec, file_key), f"moved/{file_key}")
+
+    df = simulate("test.soepy.pkl", "test.soepy.yml", exogenous_model=exogenous_model)
+
+    for file_key in EXOGENOUS_FRAMES.values():
+        os.rename(f"moved/{file_key}", getattr(model_spec, file_key))
+
+    pd.testing.assert_frame_equal(df, expected)
+
+    simulator = Simulator(
+        "test.soepy.pkl", "test.soepy.yml", exogenous_model=exogenous_model
+    )
+    pd.testing.assert_frame_equal(simulator.simulate("test.soepy.pkl"), expected)
+
+
+def test_exogenous_model_bundle(model_spec):
+    """This test ensures that the exogenous processes are restored from the bundle."""
+    exogenous_model = ExogenousModel.from_frames(model_spec)
+    exogenous_model.save("exogenous.npz")
+
+    loaded = ExogenousModel.load("exogenous.npz", model_spec)
+
+    for name in ExogenousModel.names:
+        np.testing.assert_array_equal(
+            getattr(loaded, name), getattr(exogenous_model, name)
+        )
+
+
+def test_exogenous_model_validates_shapes(model_spec):
+    exogenous_model = ExogenousModel.from_frames(model_spec)
+    arrays = list(exogenous_model.to_tuple())
+    arrays[5] = arrays[5][:-1]
+
+    with pytest.raises(ValueError, match="prob_child has shape"):
+        ExogenousModel(model_spec, *arrays)
+
+    with pytest.raises(ValueError, match="do not exist"):
+        ExogenousModel.from_frames(model_spec, educ_share=None)
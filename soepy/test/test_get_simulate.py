@@ -1,12 +1,14 @@
 import pickle
 import random
 
+import numpy as np
 import pandas as pd
 import pytest
 
 from development.tests.auxiliary.auxiliary import cleanup
 from soepy.simulate.simulate_python import get_simulate_func
 from soepy.simulate.simulate_python import simulate
+from soepy.simulate.simulate_python import simulate_periods
 from soepy.soepy_config import TEST_RESOURCES_DIR
 
 CASES_TEST = random.sample(range(0, 100), 10)
@@ -59,3 +61,51 @@ def test_simulation_func(input_vault, test_id):
         df_sim.sum(axis=0), df_partial_sim.sum(axis=0),
     )
     cleanup()
+
+
+@pytest.mark.parametrize("test_id", CASES_TEST[:3])
+def test_simulate_periods(input_vault, test_id):
+    """This test ensures that the period blocks of the streaming simulation add up to
+    the data frame of the simulation.
+    """
+    (
+        model_spec_init_dict,
+        random_model_params_df,
+        exog_educ_shares,
+        exog_child_age_shares,
+        exog_partner_shares,
+        exog_exper_shares_pt,
+        exog_exper_shares_ft,
+        exog_child_info,
+        exog_partner_arrival_info,
+        exog_partner_separation_info,
+        expected_df_sim_func,
+        expected_df_sim_sol,
+    ) = input_vault[test_id]
+
+    exog_educ_shares.to_pickle("test.soepy.educ.shares.pkl")
+    exog_child_age_shares.to_pickle("test.soepy.child.age.shares.pkl")
+    exog_child_info.to_pickle("test.soepy.child.pkl")
+    exog_partner_shares.to_pickle("test.soepy.partner.shares.pkl")
+    exog_exper_shares_pt.to_pickle("test.soepy.pt.exp.shares.pkl")
+    exog_exper_shares_ft.to_pickle("test.soepy.ft.exp.shares.pkl")
+    exog_partner_arrival_info.to_pickle("test.soepy.partner.arrival.pkl")
+    exog_partner_separation_info.to_pickle("test.soepy.partner.separation.pkl")
+
+    df_sim = simulate(random_model_params_df, model_spec_init_dict)
+
+    blocks = list(simulate_periods(random_model_params_df, model_spec_init_dict))
+    for period, block in enumerate(blocks):
+        np.testing.assert_equal(block["Period"].unique(), [period])
+
+    pd.testing.assert_frame_equal(pd.concat(blocks, ignore_index=True), df_sim)
+
+    records = np.concatenate(
+        list(
+            simulate_periods(
+                random_model_params_df, model_spec_init_dict, as_frame=False
+            )
+        )
+    )
+    pd.testing.assert_frame_equal(pd.DataFrame(records), df_sim)
+    cleanup()
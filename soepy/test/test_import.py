@@ -0,0 +1,35 @@
+import subprocess
+import sys
+
+import numpy as np
+
+from soepy.soepy_config import PACKAGE_DIR
+
+
+def test_import_is_lazy():
+    """This test ensures that importing the package does not import any of the heavy
+    dependencies."""
+    cmd = [
+        sys.executable,
+        "-c",
+        "import sys; import soepy; "
+        "print(' '.join(m for m in ['numba', 'numpy', 'pandas', 'pytest', 'yaml'] "
+        "if m in sys.modules))",
+    ]
+    imported = subprocess.check_output(cmd, cwd=PACKAGE_DIR.parent).decode().split()
+
+    np.testing.assert_equal(imported, [])
+
+
+def test_simulate_remains_callable():
+    """This test ensures that `soepy.simulate` refers to the simulation function even
+    after the simulation subpackage is imported directly."""
+    cmd = [
+        sys.executable,
+        "-c",
+        "import soepy; import soepy.simulate.simulate_python; "
+        "print(callable(soepy.simulate), soepy.solve.__name__)",
+    ]
+    output = subprocess.check_output(cmd, cwd=PACKAGE_DIR.parent).decode().split()
+
+    np.testing.assert_equal(output, ["True", "soepy.solve"])
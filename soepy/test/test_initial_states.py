@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from soepy.shared.shared_constants import DATA_LABLES_SIM
+from soepy.simulate.initial_states import create_alias_table
+from soepy.simulate.initial_states import InitialStatesSampler
+from soepy.simulate.initial_states import sample_alias_table
+from soepy.simulate.simulate_python import _get_simulate_inputs
+from soepy.simulate.simulate_python import simulate
+from soepy.test.random_init import random_init
+
+
+@pytest.fixture(scope="module")
+def sampler():
+    random_init({"AGENTS": 100, "PERIODS": np.random.randint(3, 6)})
+    simulate_inputs = _get_simulate_inputs("test.soepy.pkl", "test.soepy.yml", True)[0]
+
+    return InitialStatesSampler(*simulate_inputs[:2], *simulate_inputs[8:13])
+
+
+def test_alias_table_represents_distribution():
+    """This test ensures that the alias table assigns each outcome its probability."""
+    probs = np.random.dirichlet(np.ones(np.random.randint(1, 50)))
+    probs[np.random.choice(probs.shape[0], size=probs.shape[0] // 3)] = 0
+
+    alias_probs, aliases = create_alias_table(probs)
+
+    represented = alias_probs + np.bincount(
+        aliases, 1 - alias_probs, minlength=probs.shape[0]
+    )
+    np.testing.assert_allclose(represented / probs.shape[0], probs / probs.sum())
+
+
+def test_sampler_frequencies(sampler):
+    """This test ensures that the frequencies of the sampled initial states match the
+    probabilities of the initial conditions."""
+    num_agents = 200_000
+    rng = np.random.default_rng(0)
+
+    indexes = sample_alias_table(
+        sampler.alias_probs, sampler.aliases, rng.random((num_agents, 2))
+    )
+    np.testing.assert_allclose(
+        np.bincount(indexes, minlength=sampler.probs.shape[0]) / num_agents,
+        sampler.probs / sampler.probs.sum(),
+        atol=0.005,
+    )
+
+    initial_states = sampler.draw(rng, np.arange(num_agents))
+    np.testing.assert_array_equal(initial_states[:, 0], np.arange(num_agents))
+
+    educ_shares = np.bincount(initial_states[:, 2], minlength=3) / num_agents
+    expected = np.bincount(sampler.outcomes[:, 1], sampler.probs, minlength=3)
+    np.testing.assert_allclose(educ_shares, expected, atol=0.005)
+
+
+def test_sampler_uniforms(sampler):
+    """This test ensures that the initial state of an agent only depends on its own
+    uniform draws."""
+    uniforms = np.random.uniform(size=(50, 2))
+    identifiers = np.arange(50) + 7
+    subset = np.sort(np.random.choice(50, size=10, replace=False))
+
+    np.testing.assert_array_equal(
+        sampler.sample(uniforms[subset], identifiers[subset]),
+        sampler.sample(uniforms, identifiers)[subset],
+    )
+
+
+def test_simulate_initial_population():
+    """This test ensures that agents are simulated from the initial states of a given
+    population."""
+    random_init({"AGENTS": 200, "PERIODS": np.random.randint(3, 6)})
+    df = simulate("test.soepy.pkl", "test.soepy.yml")
+
+    population = df.groupby("Identifier").first().reset_index()
+    population["Identifier"] += 1000
+    df_population = simulate(
+        "test.soepy.pkl", "test.soepy.yml", initial_population=population
+    )
+
+    pd.testing.assert_series_equal(
+        df_population.groupby("Identifier").size(),
+        df.groupby("Identifier").size().rename(lambda x: x + 1000),
+    )
+
+    entry = df_population.groupby("Identifier").first().reset_index()
+    labels = DATA_LABLES_SIM[:9]
+    pd.testing.assert_frame_equal(entry[labels], population[labels])
+
+
+def test_invalid_initial_population():
+    """This test ensures that a population with states outside of the state space is
+    rejected."""
+    random_init({"AGENTS": 20, "PERIODS": 3})
+    population = pd.DataFrame(
+        np.zeros((4, 8), dtype=np.int64), columns=DATA_LABLES_SIM[1:9]
+    )
+
+    population.loc[2, "Experience_Part_Time"] = -1
+    with pytest.raises(ValueError, match="initial states of 1 agents"):
+        simulate("test.soepy.pkl", "test.soepy.yml", initial_population=population)
+
+    # Missing and non-integral values are reported instead of being truncated
+    fractional = population.astype(np.float64)
+    fractional.loc[1, "Experience_Full_Time"] = 2.7
+    fractional.loc[3, "Type"] = np.nan
+    fractional["Identifier"] = [10, 11, 12, 13]
+    with pytest.raises(ValueError, match=r"of 2 agents .* identifiers \[11, 13\]"):
+        simulate("test.soepy.pkl", "test.soepy.yml", initial_population=fractional)
+
+    fractional.loc[0, "Identifier"] = 10.5
+    with pytest.raises(ValueError, match="identifiers of 1 agents"):
+        simulate("test.soepy.pkl", "test.soepy.yml", initial_population=fractional)
+
+    with pytest.raises(ValueError, match="lacks the columns"):
+        simulate(
+            "test.soepy.pkl",
+            "test.soepy.yml",
+            initial_population=population.drop(columns="Type"),
+        )
@@ -0,0 +1,58 @@
+import copy
+import pickle
+
+import pandas as pd
+import pytest
+import yaml
+
+from soepy.pre_processing.model_processing import read_model_spec_init
+from soepy.test.random_init import random_init
+
+
+def test_compiled_model_spec():
+    """This test ensures that the compiled model specification leaves its input
+    unchanged, is cached for files, and is compared and hashed by its values."""
+    random_init({"AGENTS": 10, "PERIODS": 3})
+    model_params_df = pd.read_pickle("test.soepy.pkl")
+
+    model_spec = read_model_spec_init("test.soepy.yml", model_params_df)
+    assert read_model_spec_init("test.soepy.yml", model_params_df) is model_spec
+
+    with open("test.soepy.yml") as y:
+        model_spec_init_dict = yaml.load(y, Loader=yaml.Loader)
+    expected_dict = copy.deepcopy(model_spec_init_dict)
+
+    model_spec_dict = read_model_spec_init(model_spec_init_dict, model_params_df)
+    assert model_spec_init_dict == expected_dict
+
+    assert model_spec_dict is not model_spec
+    assert model_spec_dict == model_spec
+    assert {model_spec: 1}[model_spec_dict] == 1
+    assert pickle.loads(pickle.dumps(model_spec)) == model_spec
+
+    other_model_spec = model_spec_dict._replace(seed_sim=model_spec.seed_sim + 1)
+    assert other_model_spec != model_spec
+
+    additional_type = pd.DataFrame(
+        {"value": [0.1]},
+        index=pd.MultiIndex.from_tuples(
+            [("shares", "share_additional")], names=model_params_df.index.names
+        ),
+    )
+    model_params_df = pd.concat([model_params_df, additional_type])
+    assert read_model_spec_init("test.soepy.yml", model_params_df) != model_spec
+
+
+def test_model_spec_arrays_are_read_only():
+    """This test ensures that the arrays of a cached model specification cannot be
+    modified in place, such that later reads of the file are not corrupted."""
+    random_init({"AGENTS": 10, "PERIODS": 3})
+    model_params_df = pd.read_pickle("test.soepy.pkl")
+
+    model_spec = read_model_spec_init("test.soepy.yml", model_params_df)
+    unpickled = pickle.loads(pickle.dumps(model_spec))
+
+    for label in ["tax_params", "child_care_costs", "ssc_deductions"]:
+        with pytest.raises(ValueError, match="read-only"):
+            getattr(model_spec, label)[0] = 1
+        assert not getattr(unpickled, label).flags.writeable
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from soepy.pre_processing.model_processing import read_model_params_init
+from soepy.pre_processing.params_vector import ParamsVector
+from soepy.simulate.simulator import Simulator
+from soepy.test.random_init import random_init
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_params_vector_equals_data_frame(seed):
+    """This test ensures that the conversion of flat vectors yields the parameters
+    parsed from the data frame with the same values."""
+    np.random.seed(seed)
+    random_init({"AGENTS": 10, "PERIODS": 3})
+    params = pd.read_pickle("test.soepy.pkl")
+
+    params_vector = ParamsVector(params)
+    x = params_vector.to_vector(params)
+    np.testing.assert_equal(x, params["value"].to_numpy())
+
+    x_new = x * np.random.uniform(0.5, 1.5, x.shape[0])
+    params_new = params.copy()
+    params_new["value"] = x_new
+
+    _, expected = read_model_params_init(params_new)
+    model_params = params_vector.to_model_params(x_new)
+
+    assert model_params._fields == expected._fields
+    for field in expected._fields:
+        np.testing.assert_array_equal(
+            getattr(model_params, field), getattr(expected, field)
+        )
+
+
+def test_params_vector_rejects_wrong_shape():
+    random_init({"AGENTS": 10, "PERIODS": 3})
+    params_vector = ParamsVector("test.soepy.pkl")
+
+    with pytest.raises(ValueError, match="parameters are expected"):
+        params_vector.to_model_params(np.zeros(3))
+
+
+def test_simulator_accepts_params_vector():
+    """This test ensures that the simulation session simulates flat vectors as the
+    corresponding data frames."""
+    random_init({"AGENTS": 50, "PERIODS": 3})
+    params = pd.read_pickle("test.soepy.pkl")
+    simulator = Simulator(params, "test.soepy.yml")
+
+    x = simulator.params_vector.to_vector(params) * 1.01
+    params["value"] = x
+
+    pd.testing.assert_frame_equal(simulator.simulate(x), simulator.simulate(params))
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from soepy.simulate.pipeline import Pipeline
+from soepy.simulate.pipeline import STAGES
+from soepy.simulate.simulate_python import simulate
+from soepy.simulate.simulate_python import simulate_moments
+from soepy.test.random_init import random_init
+
+MOMENTS = {
+    "choice_shares": {"statistic": "share", "variable": "Choice", "by": ["Period"]},
+    "wage_mean": {"statistic": "mean", "variable": "Wage_Observed"},
+}
+
+
+@pytest.fixture(scope="module")
+def model_files():
+    random_init({"AGENTS": 100, "PERIODS": np.random.randint(3, 6)})
+    return "test.soepy.pkl", "test.soepy.yml"
+
+
+def test_pipeline_recomputes_changed_stages(model_files):
+    """This test ensures that a change of the wage equation or of the variances of the
+    shocks only reruns the dependent stages and that the results are identical to the
+    simulation."""
+    pipeline = Pipeline()
+
+    params = pd.read_pickle(model_files[0])
+    wages = params.copy()
+    wages.loc[["const_wage_eq"], "value"] += 0.1
+    shocks = wages.copy()
+    shocks.loc[["sd_wage_shock"], "value"] *= 1.5
+
+    for model_params in [params, wages, shocks, shocks]:
+        pd.testing.assert_frame_equal(
+            pipeline.simulate(model_params, model_files[1]),
+            simulate(model_params, model_files[1]),
+        )
+
+    np.testing.assert_equal(
+        dict(pipeline.num_computations),
+        {
+            "exogenous_model": 1,
+            "state_space": 1,
+            "covariates": 1,
+            "utility_components": 2,
+            "non_employment_consumption_resources": 2,
+            "draws_emax": 2,
+            "emaxs": 3,
+        },
+    )
+
+
+def test_pipeline_recomputes_changed_specification(model_files):
+    """This test ensures that a change of the model specification only reruns the
+    dependent stages and that the results are identical to the simulation."""
+    pipeline = Pipeline()
+
+    with open(model_files[1]) as y:
+        model_spec_init_dict = yaml.load(y, Loader=yaml.Loader)
+
+    agents = {group: dict(values) for group, values in model_spec_init_dict.items()}
+    agents["SIMULATION"]["num_agents_sim"] = 50
+    benefits = {group: dict(values) for group, values in agents.items()}
+    benefits["TAXES_TRANSFERS"]["alg1_replacement_no_child"] = 0.5
+
+    for model_spec in [model_spec_init_dict, agents, benefits]:
+        pd.testing.assert_frame_equal(
+            pipeline.simulate(model_files[0], model_spec),
+            simulate(model_files[0], model_spec),
+        )
+
+    expected = {name: 1 for name in STAGES}
+    expected["non_employment_consumption_resources"] = 2
+    expected["emaxs"] = 2
+    np.testing.assert_equal(dict(pipeline.num_computations), expected)
+
+
+def test_pipeline_moments(model_files):
+    """This test ensures that the moments of the pipeline are the moments of the
+    simulation and that the solution is reused."""
+    pipeline = Pipeline()
+
+    pipeline.simulate(*model_files)
+    results = pipeline.moments(*model_files, MOMENTS)
+    expected = simulate_moments(*model_files, MOMENTS)
+
+    pd.testing.assert_frame_equal(results["choice_shares"], expected["choice_shares"])
+    np.testing.assert_equal(results["wage_mean"], expected["wage_mean"])
+    np.testing.assert_equal(pipeline.num_computations["emaxs"], 1)
+
+    pipeline.clear()
+    pipeline.simulate(*model_files)
+    np.testing.assert_equal(pipeline.num_computations["emaxs"], 2)
@@ -0,0 +1,116 @@
+import collections
+
+import numpy as np
+import pytest
+
+from soepy.shared.shared_auxiliary import draw_disturbances
+from soepy.shared.shared_auxiliary import draw_standard_normals
+from soepy.simulate.random_draws import CounterDraws
+from soepy.simulate.random_draws import LegacyDraws
+from soepy.simulate.random_draws import philox4x32
+
+# Known-answer tests of the Random123 library for Philox4x32-10
+PHILOX_KAT = [
+    ([0x0] * 4, [0x0] * 2, [0x6627E8D5, 0xE169C58D, 0xBC57AC4C, 0x9B00DBD8]),
+    (
+        [0xFFFFFFFF] * 4,
+        [0xFFFFFFFF] * 2,
+        [0x408F276D, 0x41C83B0E, 0xA20BC7C6, 0x6D5451FD],
+    ),
+    (
+        [0x243F6A88, 0x85A308D3, 0x13198A2E, 0x03707344],
+        [0xA4093822, 0x299F31D0],
+        [0xD16CFE09, 0x94FDCCEB, 0x5001E420, 0x24126EA1],
+    ),
+]
+
+
+@pytest.mark.parametrize("shocks_cov", [[0.3, 0.7], [0.9, 0.2]])
+def test_legacy_draws_per_period(shocks_cov):
+    """This test ensures that the shocks drawn period by period are identical to the
+    shocks drawn at once and that the global generator ends up in the same state."""
+    model_params = collections.namedtuple("model_params", "shocks_cov")(shocks_cov)
+    num_periods, num_agents = 4, 1001
+
+    np.random.seed(123)
+    draws_sim = np.random.multivariate_normal(
+        np.zeros(2), np.diag(shocks_cov), (num_periods, num_agents)
+    )
+    expected = np.random.uniform(size=10)
+
+    draws = LegacyDraws(123, num_periods, num_agents, model_params)
+    next_draws = np.random.uniform(size=10)
+
+    identifiers = np.random.RandomState(0).choice(num_agents, 100, replace=False)
+    for period in range(num_periods):
+        np.testing.assert_array_equal(
+            draws.shocks(period, identifiers), draws_sim[period, identifiers]
+        )
+    np.testing.assert_array_equal(next_draws, expected)
+
+
+@pytest.mark.parametrize("counter, key, expected", PHILOX_KAT)
+def test_philox_known_answers(counter, key, expected):
+    """This test ensures that our implementation of Philox4x32-10 reproduces the
+    reference implementation."""
+    words = philox4x32(*[np.uint64(word) for word in counter + key])
+
+    np.testing.assert_array_equal([int(word) for word in words], expected)
+
+
+def test_counter_draws_random_access():
+    """This test ensures that the draws of an agent do not depend on the other agents
+    and that the draws follow their distributions."""
+    model_params = collections.namedtuple("model_params", "shocks_cov")([0.25, 4.0])
+    draws = CounterDraws(123, model_params)
+
+    identifiers = np.arange(100_000)
+    subset = np.array([99_999, 7, 50_000])
+
+    np.testing.assert_array_equal(
+        draws.shocks(3, subset), draws.shocks(3, identifiers)[subset]
+    )
+    np.testing.assert_array_equal(
+        draws.initial_uniforms(subset), draws.initial_uniforms(identifiers)[subset]
+    )
+
+    shocks = draws.shocks(3, identifiers)
+    np.testing.assert_allclose(shocks.mean(axis=0), 0, atol=0.02)
+    np.testing.assert_allclose(shocks.std(axis=0), [0.5, 2.0], rtol=0.01)
+    assert not np.array_equal(shocks, draws.shocks(4, identifiers))
+
+    child = draws.child_arrival(3, identifiers, np.full(identifiers.shape[0], 0.3))
+    np.testing.assert_allclose(child.mean(), 0.3, atol=0.01)
+
+    prob_partner = np.tile([[0.8, 0.2], [0.1, 0.9]], (identifiers.shape[0], 1, 1))
+    partner_status = identifiers % 2
+    new_partner_status = draws.partner_status(
+        3, identifiers, partner_status, prob_partner
+    )
+    np.testing.assert_allclose(
+        [
+            new_partner_status[partner_status == 0].mean(),
+            new_partner_status[partner_status == 1].mean(),
+        ],
+        [0.2, 0.9],
+        atol=0.01,
+    )
+
+
+@pytest.mark.parametrize("shocks_cov", [[0.3, 0.7], [0.9, 0.2], [1.0, 1.0]])
+def test_disturbances_rescale_cached_draws(shocks_cov):
+    """This test ensures that the disturbances rescaled from the cached standard normal
+    draws are identical to the draws of the seeded global generator, and that the
+    global generator is left unchanged."""
+    model_params = collections.namedtuple("model_params", "shocks_cov")(shocks_cov)
+
+    np.random.seed(123)
+    expected = np.random.multivariate_normal(np.zeros(2), np.diag(shocks_cov), (3, 50))
+
+    state = np.random.get_state()
+    for _ in range(2):
+        draws = draw_disturbances(123, 3, 50, model_params)
+        np.testing.assert_array_equal(draws, expected)
+    np.testing.assert_equal(np.random.get_state(), state)
+
+    assert draw_standard_normals(123, 3, 50) is draw_standard_normals(123, 3, 50)
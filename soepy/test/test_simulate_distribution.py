@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from soepy.exogenous_processes.education import gen_prob_educ_level_vector
+from soepy.pre_processing.model_processing import read_model_params_init
+from soepy.pre_processing.model_processing import read_model_spec_init
+from soepy.simulate.simulate_distribution import get_choice_shares
+from soepy.simulate.simulate_python import simulate
+from soepy.simulate.simulate_python import simulate_distribution
+from soepy.test.random_init import random_init
+
+
+def test_distribution_mass():
+    """This test ensures that the population mass enters the model with the education
+    levels and is conserved afterwards."""
+    random_init({"AGENTS": 100, "PERIODS": np.random.randint(3, 8)})
+
+    distribution = simulate_distribution("test.soepy.pkl", "test.soepy.yml")
+
+    model_params_df, _ = read_model_params_init("test.soepy.pkl")
+    model_spec = read_model_spec_init("test.soepy.yml", model_params_df)
+    prob_educ_level = gen_prob_educ_level_vector(model_spec)
+
+    mass = distribution.groupby("Period")["Mass"].sum()
+    for period, mass_period in mass.items():
+        has_entered = np.array(model_spec.educ_years) <= period
+        np.testing.assert_allclose(
+            mass_period, np.asarray(prob_educ_level)[has_entered].sum()
+        )
+
+    probabilities = distribution.filter(like="Choice_Probability")
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1)
+
+
+def test_distribution_equals_simulation():
+    """This test ensures that the choice shares of the distribution are close to the
+    ones of a large simulated sample."""
+    random_init({"AGENTS": 10000, "PERIODS": np.random.randint(3, 6)})
+
+    distribution = simulate_distribution("test.soepy.pkl", "test.soepy.yml")
+    df = simulate("test.soepy.pkl", "test.soepy.yml")
+
+    choice_shares = get_choice_shares(distribution)
+    choice_shares_sim = (
+        df.groupby("Period")["Choice"]
+        .value_counts(normalize=True)
+        .unstack(fill_value=0)
+    )
+    choice_shares_sim = choice_shares_sim.reindex(
+        index=choice_shares.index, columns=choice_shares.columns, fill_value=0
+    )
+
+    # Compare periods with enough simulated agents only
+    is_large = df.groupby("Period").size().reindex(choice_shares.index) > 1000
+    pd.testing.assert_frame_equal(
+        choice_shares[is_large], choice_shares_sim[is_large], atol=0.05
+    )
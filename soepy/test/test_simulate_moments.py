@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from soepy.simulate.simulate_moments import MomentAccumulator
+from soepy.simulate.simulate_python import simulate
+from soepy.simulate.simulate_python import simulate_moments
+from soepy.test.random_init import random_init
+
+
+def test_moments_equal_pandas():
+    """This test ensures that the moments accumulated during the simulation equal the
+    moments computed from the simulated data frame."""
+    random_init({"AGENTS": 300, "PERIODS": np.random.randint(3, 6)})
+
+    moments = {
+        "choice_shares": {
+            "statistic": "share",
+            "variable": "Choice",
+            "by": ["Period", "Education_Level"],
+        },
+        "transitions": {
+            "statistic": "share",
+            "variable": "Choice",
+            "by": ["Lagged_Choice"],
+        },
+        "shares": {"statistic": "share", "variable": "Choice"},
+        "wage_mean": {
+            "statistic": "mean",
+            "variable": "Wage_Observed",
+            "by": ["Experience_Full_Time"],
+            "bins": {"Experience_Full_Time": [0, 2, 4]},
+        },
+        "wage_var": {
+            "statistic": "var",
+            "variable": "Wage_Observed",
+            "by": ["Period", "Education_Level"],
+        },
+        "wage_var_total": {"statistic": "var", "variable": "Wage_Observed"},
+    }
+
+    results = simulate_moments("test.soepy.pkl", "test.soepy.yml", moments)
+    df = simulate("test.soepy.pkl", "test.soepy.yml")
+
+    choice_shares = (
+        df.groupby(["Period", "Education_Level"])["Choice"]
+        .value_counts(normalize=True)
+        .unstack(fill_value=0)
+    )
+    pd.testing.assert_frame_equal(
+        results["choice_shares"], choice_shares, check_names=False, check_dtype=False
+    )
+
+    transitions = (
+        df.groupby("Lagged_Choice")["Choice"]
+        .value_counts(normalize=True)
+        .unstack(fill_value=0)
+    )
+    pd.testing.assert_frame_equal(
+        results["transitions"], transitions, check_names=False, check_dtype=False
+    )
+
+    shares = df["Choice"].value_counts(normalize=True).sort_index()
+    pd.testing.assert_series_equal(
+        results["shares"], shares, check_names=False, check_index_type=False
+    )
+
+    bins = np.array([0, 2, 4])[
+        np.searchsorted([0, 2, 4], df["Experience_Full_Time"], side="right") - 1
+    ]
+    wage_mean = df.groupby(bins)["Wage_Observed"].mean()
+    pd.testing.assert_series_equal(
+        results["wage_mean"], wage_mean, check_names=False, check_index_type=False
+    )
+
+    wage_var = df.groupby(["Period", "Education_Level"])["Wage_Observed"].var()
+    pd.testing.assert_series_equal(
+        results["wage_var"], wage_var, check_names=False, check_index_type=False
+    )
+
+    np.testing.assert_allclose(results["wage_var_total"], df["Wage_Observed"].var())
+
+
+def test_unknown_moment():
+    with pytest.raises(NotImplementedError):
+        MomentAccumulator("median", "Wage_Observed")
+    with pytest.raises(ValueError):
+        MomentAccumulator("mean", "Wage")
@@ -0,0 +1,135 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from soepy.shared.shared_constants import DATA_FORMATS_SIM_COMPACT
+from soepy.simulate.simulate_auxiliary import DERIVED_COLUMNS
+from soepy.simulate.simulate_output import get_output_dtype
+from soepy.simulate.simulate_output import load_simulated_data
+from soepy.simulate.simulate_output import write_simulated_data
+from soepy.simulate.simulate_python import derive_columns
+from soepy.simulate.simulate_python import simulate
+from soepy.simulate.simulate_python import simulate_to_file
+from soepy.test.random_init import random_init
+
+
+@pytest.fixture(scope="module")
+def expected_df():
+    random_init({"AGENTS": 200, "PERIODS": np.random.randint(3, 6)})
+    return simulate("test.soepy.pkl", "test.soepy.yml")
+
+
+def test_write_npy(expected_df):
+    """This test ensures that the memory-mapped columns written to disk correspond to
+    the simulated data frame."""
+    num_rows = simulate_to_file("test.soepy.pkl", "test.soepy.yml", "sim.soepy.npy")
+
+    data = load_simulated_data("sim.soepy.npy")
+
+    np.testing.assert_equal(num_rows, expected_df.shape[0])
+    np.testing.assert_equal(list(data.keys()), list(expected_df.columns))
+    for label, column in data.items():
+        assert isinstance(column, np.memmap)
+        if label in DATA_FORMATS_SIM_COMPACT:
+            np.testing.assert_equal(column.dtype, DATA_FORMATS_SIM_COMPACT[label])
+        np.testing.assert_array_equal(column, expected_df[label].to_numpy())
+
+
+def test_write_selected_columns_float32(expected_df):
+    """This test ensures that only the requested columns are written to disk."""
+    columns = ["Identifier", "Period", "Choice", "Wage_Observed"]
+    simulate_to_file(
+        "test.soepy.pkl",
+        "test.soepy.yml",
+        "sim.soepy.selected",
+        columns=columns,
+        float32=True,
+    )
+
+    data = load_simulated_data("sim.soepy.selected")
+
+    np.testing.assert_equal(list(data.keys()), columns)
+    np.testing.assert_equal(data["Wage_Observed"].dtype, np.float32)
+    np.testing.assert_allclose(
+        data["Wage_Observed"], expected_df["Wage_Observed"], rtol=1e-6
+    )
+
+
+def test_interrupted_write_removes_output(expected_df):
+    """This test ensures that no column file is left behind if the stream of blocks
+    fails part-way through."""
+    dtype = get_output_dtype()
+
+    def blocks():
+        yield np.zeros(10, dtype=dtype)
+        raise RuntimeError("Interrupted.")
+
+    with pytest.raises(RuntimeError, match="Interrupted"):
+        write_simulated_data(blocks(), "sim.soepy.interrupted")
+
+    np.testing.assert_equal(list(Path("sim.soepy.interrupted").iterdir()), [])
+
+
+def test_failed_open_removes_output(expected_df):
+    """This test ensures that the column files opened before one of them fails to
+    open are closed and removed."""
+    dtype = get_output_dtype()
+    Path("sim.soepy.failed", f"{dtype.names[1]}.npy").mkdir(parents=True)
+
+    with pytest.raises(OSError):
+        write_simulated_data([], "sim.soepy.failed")
+
+    assert not Path("sim.soepy.failed", f"{dtype.names[0]}.npy").exists()
+
+
+@pytest.mark.parametrize("file_format", ["feather", "parquet"])
+def test_write_arrow(expected_df, file_format):
+    """This test ensures that the Arrow based file formats can be read by pandas."""
+    pytest.importorskip("pyarrow")
+
+    file_name = f"sim.soepy.{file_format}"
+    simulate_to_file(
+        "test.soepy.pkl", "test.soepy.yml", file_name, file_format=file_format
+    )
+
+    df = getattr(pd, f"read_{file_format}")(file_name)
+
+    pd.testing.assert_frame_equal(df, expected_df, check_dtype=False)
+
+
+def test_simulate_float32(expected_df):
+    """This test ensures that the simulated data frame can be stored in single
+    precision."""
+    df = simulate("test.soepy.pkl", "test.soepy.yml", float32=True)
+
+    for label in expected_df.columns:
+        if label in DATA_FORMATS_SIM_COMPACT:
+            np.testing.assert_equal(df[label].dtype, DATA_FORMATS_SIM_COMPACT[label])
+            np.testing.assert_array_equal(df[label], expected_df[label])
+        else:
+            np.testing.assert_equal(df[label].dtype, np.float32)
+            np.testing.assert_allclose(df[label], expected_df[label], rtol=1e-6)
+
+
+def test_simulate_selected_columns(expected_df):
+    """This test ensures that the selected columns are simulated as in the full data
+    and that the columns which depend on the state can be derived afterwards."""
+    columns = list(expected_df.columns[:10]) + ["Wage_Observed"]
+    df = simulate("test.soepy.pkl", "test.soepy.yml", columns=columns)
+
+    pd.testing.assert_frame_equal(df, expected_df[columns])
+
+    derived = derive_columns("test.soepy.pkl", "test.soepy.yml", df, DERIVED_COLUMNS)
+
+    for label, column in derived.items():
+        np.testing.assert_allclose(column, expected_df[label], rtol=1e-12)
+
+    with pytest.raises(ValueError):
+        derive_columns("test.soepy.pkl", "test.soepy.yml", df, ["Flow_Utility_P"])
+
+
+def test_unknown_column():
+    with pytest.raises(ValueError):
+        get_output_dtype(["Identifier", "Wage"])
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from soepy.simulate.simulate_parallel import CHUNKS_IN_FLIGHT_PER_WORKER
+from soepy.simulate.simulate_parallel import map_chunks
+from soepy.simulate.simulate_python import simulate
+from soepy.simulate.simulate_python import simulate_parallel
+from soepy.test.random_init import random_init
+
+
+@pytest.fixture(scope="module")
+def model_files():
+    random_init({"AGENTS": 250, "PERIODS": np.random.randint(3, 6)})
+    return "test.soepy.pkl", "test.soepy.yml"
+
+
+@pytest.mark.parametrize("num_workers, use_processes", [(3, False), (2, True)])
+def test_parallel_independent_of_workers(model_files, num_workers, use_processes):
+    """This test ensures that the simulated data does not depend on the number of
+    workers or the type of the pool."""
+    df_serial = simulate_parallel(*model_files, chunk_size=60)
+    df_parallel = simulate_parallel(
+        *model_files,
+        num_workers=num_workers,
+        chunk_size=60,
+        use_processes=use_processes,
+    )
+
+    pd.testing.assert_frame_equal(df_serial, df_parallel)
+
+
+def test_parallel_data_structure(model_files):
+    """This test ensures that the data of the parallel simulation has the structure of
+    the sequential simulation."""
+    df_sim = simulate(*model_files)
+    df_parallel = simulate_parallel(*model_files, num_workers=2, chunk_size=100)
+
+    np.testing.assert_equal(list(df_parallel.columns), list(df_sim.columns))
+    np.testing.assert_equal(df_parallel.dtypes.to_numpy(), df_sim.dtypes.to_numpy())
+
+    # Rows are ordered by period and identifier
+    np.testing.assert_array_equal(
+        df_parallel.sort_values(["Period", "Identifier"]).index, df_parallel.index
+    )
+
+    # Agents are observed in all periods after they enter the model
+    periods = df_parallel.groupby("Identifier")["Period"].agg(["min", "max", "count"])
+    np.testing.assert_array_equal(periods["max"], df_sim["Period"].max())
+    np.testing.assert_array_equal(periods["count"], periods["max"] - periods["min"] + 1)
+
+    # Agents keep their initial conditions over the periods
+    constant = df_parallel.groupby("Identifier")[["Education_Level", "Type"]].nunique()
+    assert (constant == 1).all().all()
+
+
+def test_counter_based_subset(model_files):
+    """This test ensures that a subset of agents is simulated exactly as in the
+    simulation of all agents if the draws are counter-based."""
+    df_full = simulate_parallel(*model_files, chunk_size=70, counter_based=True)
+    df_chunks = simulate_parallel(
+        *model_files, num_workers=3, chunk_size=20, counter_based=True
+    )
+
+    pd.testing.assert_frame_equal(df_full, df_chunks)
+
+    subset = np.random.choice(250, size=10, replace=False)
+    df_subset = simulate_parallel(*model_files, counter_based=True, identifiers=subset)
+
+    pd.testing.assert_frame_equal(
+        df_subset, df_full[df_full["Identifier"].isin(subset)].reset_index(drop=True)
+    )
+
+    # The worker processes receive the identifiers once and cut the chunks from them
+    df_processes = simulate_parallel(
+        *model_files,
+        num_workers=2,
+        chunk_size=4,
+        use_processes=True,
+        counter_based=True,
+        identifiers=subset,
+    )
+    pd.testing.assert_frame_equal(df_processes, df_subset)
+
+    with pytest.raises(ValueError):
+        simulate_parallel(*model_files, identifiers=subset)
+
+
+def test_large_identifiers(model_files):
+    """This test ensures that identifiers beyond the range of 32 bits are stored
+    without overflow."""
+    identifiers = np.array([2 ** 31 + 5, 3 * 2 ** 32])
+    df = simulate_parallel(*model_files, counter_based=True, identifiers=identifiers)
+
+    np.testing.assert_array_equal(df["Identifier"].unique(), identifiers)
+
+
+def test_map_chunks_bounds_chunks_in_flight():
+    """This test ensures that the chunks are returned in order and that only a
+    bounded number of chunks is submitted ahead of their consumption."""
+    num_workers = 2
+    started = []
+
+    def simulate_chunk(seed_sequence, start, stop):
+        started.append(start)
+        return start
+
+    tasks = [(None, start, start + 1) for start in range(20)]
+    chunks = map_chunks(simulate_chunk, tasks, num_workers)
+
+    for num_consumed, start in enumerate(chunks, 1):
+        np.testing.assert_equal(start, num_consumed - 1)
+        assert len(started) < num_consumed + CHUNKS_IN_FLIGHT_PER_WORKER * num_workers
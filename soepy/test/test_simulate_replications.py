@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from soepy.simulate.simulate_moments import accumulate_moments
+from soepy.simulate.simulate_python import simulate_parallel
+from soepy.simulate.simulate_python import simulate_replications
+from soepy.test.random_init import random_init
+
+MOMENTS = {
+    "choice_shares": {"statistic": "share", "variable": "Choice", "by": ["Period"]},
+    "wage_mean": {"statistic": "mean", "variable": "Wage_Observed"},
+}
+
+
+@pytest.fixture(scope="module")
+def model_files():
+    random_init({"AGENTS": 120, "PERIODS": np.random.randint(3, 6)})
+    return "test.soepy.pkl", "test.soepy.yml"
+
+
+def test_replications_are_counter_based_subsets(model_files):
+    """This test ensures that each replication is simulated as the corresponding
+    agents of a counter-based simulation."""
+    df = simulate_replications(*model_files, num_replications=3, chunk_size=50)
+
+    np.testing.assert_array_equal(df["Replication"].unique(), np.arange(3))
+
+    num_agents = 120
+    for replication in [0, 2]:
+        expected = simulate_parallel(
+            *model_files,
+            counter_based=True,
+            identifiers=np.arange(num_agents) + replication * num_agents,
+        )
+        expected["Identifier"] -= replication * num_agents
+
+        result = df[df["Replication"] == replication].drop(columns="Replication")
+        pd.testing.assert_frame_equal(result.reset_index(drop=True), expected)
+
+
+def test_replication_moments(model_files):
+    """This test ensures that the moments of the replications are the moments of the
+    simulated data of each replication."""
+    df = simulate_replications(*model_files, num_replications=2, chunk_size=70)
+    results = simulate_replications(
+        *model_files, num_replications=2, moments=MOMENTS, num_workers=2
+    )
+
+    for replication in range(2):
+        expected = accumulate_moments([df[df["Replication"] == replication]], MOMENTS)
+        pd.testing.assert_frame_equal(
+            results["choice_shares"].loc[replication], expected["choice_shares"]
+        )
+        np.testing.assert_allclose(
+            results["wage_mean"].loc[replication], expected["wage_mean"]
+        )
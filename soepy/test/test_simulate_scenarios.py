@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from soepy.simulate.pipeline import Pipeline
+from soepy.simulate.simulate_moments import stack_moments
+from soepy.simulate.simulate_python import simulate_moments
+from soepy.simulate.simulate_scenarios import apply_overrides
+from soepy.simulate.simulate_scenarios import run_scenarios
+from soepy.soepy_config import PACKAGE_DIR
+from soepy.test.random_init import random_init
+
+MOMENTS = {
+    "choice_shares": {"statistic": "share", "variable": "Choice", "by": ["Period"]},
+    "wage_mean": {"statistic": "mean", "variable": "Wage_Observed"},
+}
+
+
+@pytest.fixture(scope="module")
+def model_files():
+    random_init({"AGENTS": 100, "PERIODS": np.random.randint(3, 6)})
+    return "test.soepy.pkl", "test.soepy.yml"
+
+
+def test_scenarios_equal_simulated_moments(model_files):
+    """This test ensures that the moments of each scenario are the moments of the
+    simulation with the overridden model specification and that the scenarios share
+    the stages which do not depend on the overrides."""
+    with open(model_files[1]) as y:
+        model_spec_init_dict = yaml.load(y, Loader=yaml.Loader)
+
+    tax_splitting = model_spec_init_dict["TAXES_TRANSFERS"]["tax_splitting"]
+
+    scenarios = {
+        "base": {},
+        "splitting": {"tax_splitting": not tax_splitting},
+        "benefits": {"alg1_replacement_no_child": 0.5, "child_benefits": 100},
+    }
+
+    pipeline = Pipeline()
+    results = run_scenarios(pipeline, *model_files, scenarios, MOMENTS, num_workers=2)
+
+    for name, overrides in scenarios.items():
+        expected = stack_moments(
+            simulate_moments(
+                model_files[0],
+                apply_overrides(model_spec_init_dict, overrides),
+                MOMENTS,
+            )
+        )
+        scenario = results[results["Scenario"] == name].drop(columns="Scenario")
+
+        pd.testing.assert_frame_equal(scenario.reset_index(drop=True), expected)
+
+    for name in ["exogenous_model", "state_space", "draws_emax"]:
+        np.testing.assert_equal(pipeline.num_computations[name], 1)
+    np.testing.assert_equal(pipeline.num_computations["emaxs"], len(scenarios))
+
+
+def test_overrides_leave_base_unchanged(model_files):
+    """This test ensures that the overrides do not change the base specification and
+    that unknown entries are rejected."""
+    with open(model_files[1]) as y:
+        model_spec_init_dict = yaml.load(y, Loader=yaml.Loader)
+    regelsatz_single = model_spec_init_dict["TAXES_TRANSFERS"]["regelsatz_single"]
+
+    overridden = apply_overrides(
+        model_spec_init_dict, {"regelsatz_single": regelsatz_single + 1}
+    )
+
+    np.testing.assert_equal(
+        overridden["TAXES_TRANSFERS"]["regelsatz_single"], regelsatz_single + 1
+    )
+    np.testing.assert_equal(
+        model_spec_init_dict["TAXES_TRANSFERS"]["regelsatz_single"], regelsatz_single
+    )
+    with pytest.raises(ValueError, match="regelsatz"):
+        apply_overrides(model_spec_init_dict, {"regelsatz": 1})
+
+
+def test_scenarios_on_threads_with_workqueue(model_files):
+    """This test ensures that scenarios run on threads with the workqueue threading
+    layer of numba, which does not support concurrent launches of parallel kernels."""
+    script = (
+        "from soepy.simulate.pipeline import Pipeline; "
+        "from soepy.simulate.simulate_scenarios import run_scenarios; "
+        f"run_scenarios(Pipeline(), *{model_files}, "
+        "[{}, {'alg1_replacement_no_child': 0.5}, {'child_benefits': 100}], "
+        f"{MOMENTS}, num_workers=3); "
+        "import numba; print(numba.threading_layer())"
+    )
+    env = {
+        **os.environ,
+        "NUMBA_THREADING_LAYER": "workqueue",
+        "PYTHONPATH": str(PACKAGE_DIR.parent),
+    }
+    output = subprocess.check_output([sys.executable, "-c", script], env=env)
+
+    np.testing.assert_equal(output.decode().split(), ["workqueue"])
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from soepy.simulate.simulate_python import simulate
+from soepy.simulate.simulate_python import simulate_moments
+from soepy.simulate.simulator import Simulator
+from soepy.test.random_init import random_init
+
+MOMENTS = {
+    "choice_shares": {"statistic": "share", "variable": "Choice", "by": ["Period"]},
+    "wage_mean": {"statistic": "mean", "variable": "Wage_Observed"},
+}
+
+
+@pytest.fixture(scope="module")
+def model_files():
+    random_init({"AGENTS": 100, "PERIODS": np.random.randint(3, 6)})
+    return "test.soepy.pkl", "test.soepy.yml"
+
+
+def test_simulator_equals_simulate(model_files):
+    """This test ensures that the simulation session reproduces the simulation for
+    different parameters in repeated calls."""
+    simulator = Simulator(*model_files)
+
+    params = pd.read_pickle(model_files[0])
+    perturbed = params.copy()
+    perturbed.loc[["sd_wage_shock"], "value"] *= 1.5
+    perturbed.loc[["const_wage_eq"], "value"] += 0.1
+
+    for model_params in [params, perturbed, model_files[0]]:
+        pd.testing.assert_frame_equal(
+            simulator.simulate(model_params), simulate(model_params, model_files[1])
+        )
+
+
+def test_simulator_moments(model_files):
+    """This test ensures that the moments of the simulation session are the moments
+    of the simulation."""
+    simulator = Simulator(*model_files)
+
+    results = simulator.moments(model_files[0], MOMENTS)
+    expected = simulate_moments(*model_files, MOMENTS)
+
+    pd.testing.assert_frame_equal(results["choice_shares"], expected["choice_shares"])
+    np.testing.assert_equal(results["wage_mean"], expected["wage_mean"])
+
+
+def test_simulator_rejects_other_number_of_types(model_files):
+    """This test ensures that the parameters have to specify the number of types the
+    simulation session was set up for."""
+    params = pd.read_pickle(model_files[0])
+    params = params.drop(index=["hetrg_unobs", "shares"], level="category")
+
+    additional_type = pd.DataFrame(
+        {"value": [0.1, 0.1, 0.5]},
+        index=pd.MultiIndex.from_tuples(
+            [
+                ("hetrg_unobs", "theta_p1"),
+                ("hetrg_unobs", "theta_f1"),
+                ("shares", "share_1"),
+            ],
+            names=params.index.names,
+        ),
+    )
+
+    simulator = Simulator(params, model_files[1])
+    with pytest.raises(ValueError, match="2 types"):
+        simulator.simulate(pd.concat([params, additional_type]))
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from soepy.pre_processing.model_processing import read_model_params_init
+from soepy.pre_processing.params_vector import ParamsVector
+from soepy.simulate.simulate_python import simulate
+from soepy.simulate.simulate_python import simulate_moments
+from soepy.simulate.simulator import Simulator
+from soepy.solve.solution_cache import get_digest
+from soepy.solve.solution_cache import SolutionCache
+from soepy.test.random_init import random_init
+
+MOMENTS = {
+    "choice_shares": {"statistic": "share", "variable": "Choice", "by": ["Period"]},
+    "wage_mean": {"statistic": "mean", "variable": "Wage_Observed"},
+}
+
+
+@pytest.fixture(scope="module")
+def model_files():
+    random_init({"AGENTS": 100, "PERIODS": np.random.randint(3, 6)})
+    return "test.soepy.pkl", "test.soepy.yml"
+
+
+def test_solution_cache_evicts_least_recently_used():
+    """This test ensures that the cache evicts the least recently used results once
+    their size exceeds the bound and keeps track of the hits and misses."""
+    cache = SolutionCache(max_bytes=2000)
+
+    for key in ["a", "b"]:
+        cache.put(key, np.zeros(100))
+    np.testing.assert_equal(cache.get("a").shape, (100,))
+
+    cache.put("c", np.zeros(100))
+    cache.put("d", np.zeros(1000))
+
+    np.testing.assert_equal(["a" in cache, "b" in cache, "c" in cache], [1, 0, 1])
+    np.testing.assert_equal(cache.get("b"), None)
+    np.testing.assert_equal(cache.cache_info(), (1, 0, 1, 1, 2, 1600, 2000))
+
+
+def test_digest_depends_on_values():
+    """This test ensures that equal values have equal digests, independent of the
+    types of the scalars and containers."""
+    np.testing.assert_equal(
+        get_digest({"a": [1.5, np.arange(3.0)]}),
+        get_digest({"a": (np.float64(1.5), np.arange(3.0))}),
+    )
+    np.testing.assert_equal(get_digest([0.5, 1.5]), get_digest(np.array([0.5, 1.5])))
+    assert get_digest(np.arange(3.0)) != get_digest(np.arange(3))
+
+
+def test_digest_of_parameters_from_vector(model_files):
+    """This test ensures that the parameters read from a data frame and converted from
+    a flat vector have the same digest."""
+    model_params_df, model_params = read_model_params_init(model_files[0])
+    params_vector = ParamsVector(model_params_df)
+    x = params_vector.to_vector(model_params_df)
+
+    np.testing.assert_equal(
+        get_digest(model_params), get_digest(params_vector.to_model_params(x))
+    )
+
+
+def test_simulator_reuses_cached_solutions(model_files):
+    """This test ensures that a simulator with a cache solves revisited parameters only
+    once and that the results are identical to the simulation."""
+    cache = SolutionCache()
+    simulator = Simulator(*model_files, cache=cache)
+
+    x = simulator.params_vector.to_vector(model_files[0])
+    y = x.copy()
+    y[simulator.params_vector.index.get_loc(("const_wage_eq", "gamma_0_low"))] += 0.1
+
+    for params in [x, y, x]:
+        df = simulator.simulate(params)
+
+    pd.testing.assert_frame_equal(df, simulate(*model_files))
+    np.testing.assert_equal(cache.cache_info()[:3], (1, 0, 2))
+
+
+def test_simulator_reads_cached_moments_from_disk(model_files, tmp_path):
+    """This test ensures that the moments written to the directory of the cache are
+    found by another simulator."""
+    expected = simulate_moments(*model_files, MOMENTS)
+
+    for _ in range(2):
+        cache = SolutionCache(directory=str(tmp_path))
+        simulator = Simulator(*model_files, cache=cache)
+        results = simulator.moments(model_files[0], MOMENTS)
+
+        pd.testing.assert_frame_equal(
+            results["choice_shares"], expected["choice_shares"]
+        )
+        np.testing.assert_equal(results["wage_mean"], expected["wage_mean"])
+
+    np.testing.assert_equal(cache.cache_info()[:3], (0, 1, 0))
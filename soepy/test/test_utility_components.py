@@ -8,6 +8,8 @@ import pytest
 from soepy.pre_processing.model_processing import read_model_params_init
 from soepy.pre_processing.model_processing import read_model_spec_init
 from soepy.shared.shared_auxiliary import calculate_utility_components
+from soepy.simulate.simulate_auxiliary import get_utility_components
+from soepy.simulate.simulate_auxiliary import VisitedLogWageSystematic
 from soepy.soepy_config import TEST_RESOURCES_DIR
 from soepy.solve.create_state_space import create_state_space_objects
 
@@ -95,3 +97,52 @@ def test_pyth_simulate(input_vault, test_id, is_expected):
             log_wage_systematic[relevant_states_ind],
             np.full(log_wage_systematic[relevant_states_ind].shape, wage_calc),
         )
+
+
+@pytest.mark.parametrize("is_expected", SUBJ_BELIEFS)
+def test_reuse_utility_components(input_vault, is_expected):
+    """This test ensures that the utility components of the solution are reused in the
+    simulation and that the systematic wages of the market are computed correctly for
+    the visited states only."""
+    random_model_params_df, model_spec_init_dict = input_vault[0][1], input_vault[0][0]
+
+    model_params_df, model_params = read_model_params_init(random_model_params_df)
+    model_spec = read_model_spec_init(model_spec_init_dict, model_params_df)
+    states, _, covariates, _, _ = create_state_space_objects(model_spec)
+
+    utility_components = calculate_utility_components(
+        model_params, model_spec, states, covariates, is_expected
+    )
+    expected = calculate_utility_components(
+        model_params, model_spec, states, covariates, False
+    )
+
+    log_wage_systematic, non_consumption_utilities = get_utility_components(
+        model_params,
+        model_spec,
+        states,
+        covariates,
+        False,
+        (*utility_components, is_expected),
+    )
+    np.testing.assert_array_equal(log_wage_systematic, expected[0])
+    np.testing.assert_array_equal(non_consumption_utilities, expected[1])
+    if not is_expected:
+        assert log_wage_systematic is utility_components[0]
+
+    log_wage_systematic, _ = get_utility_components(
+        model_params,
+        model_spec,
+        states,
+        covariates,
+        False,
+        (*utility_components, is_expected),
+        visited_only=True,
+    )
+    if is_expected:
+        assert isinstance(log_wage_systematic, VisitedLogWageSystematic)
+
+        visited = np.random.choice(states.shape[0], size=20)
+        values = log_wage_systematic.update(visited)
+        np.testing.assert_array_equal(values[visited], expected[0][visited])
+        assert np.isnan(values).sum() == states.shape[0] - np.unique(visited).size
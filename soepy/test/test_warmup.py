@@ -0,0 +1,42 @@
+import numpy as np
+
+from soepy.shared.shared_auxiliary import calculate_employment_consumption_resources
+from soepy.shared.shared_auxiliary import calculate_non_employment_consumption_resources
+from soepy.shared.warmup import warmup
+from soepy.simulate.initial_states import create_alias_table
+from soepy.simulate.simulate_distribution import _calculate_choice_probabilities
+from soepy.simulate.simulate_kernel import _simulate_period
+from soepy.simulate.simulate_python import simulate
+from soepy.simulate.simulate_python import simulate_distribution
+from soepy.simulate.simulate_python import simulate_parallel
+from soepy.solve.create_state_space import _create_child_indexes
+from soepy.solve.create_state_space import _create_state_space
+from soepy.test.random_init import random_init
+
+
+def test_warmup_covers_all_signatures():
+    """This test ensures that a simulation after the warm-up does not compile any
+    additional signatures of the numba kernels."""
+    report = warmup()
+
+    assert all(seconds >= 0 for seconds in report.values())
+
+    kernels = [
+        _create_state_space,
+        _create_child_indexes,
+        calculate_non_employment_consumption_resources,
+        calculate_employment_consumption_resources,
+        _simulate_period,
+        _calculate_choice_probabilities,
+        create_alias_table,
+    ]
+    num_signatures = [len(kernel.signatures) for kernel in kernels]
+
+    random_init({"AGENTS": 50, "PERIODS": np.random.randint(3, 5)})
+    simulate("test.soepy.pkl", "test.soepy.yml")
+    simulate_distribution("test.soepy.pkl", "test.soepy.yml")
+    simulate_parallel("test.soepy.pkl", "test.soepy.yml", chunk_size=20)
+
+    np.testing.assert_equal(
+        [len(kernel.signatures) for kernel in kernels], num_signatures
+    )